@@ -32,20 +32,22 @@ for config_type, file_path in files.items():
 agents_config = configs['agents']
 tasks_config = configs['tasks']
 
-# ## Using FileReadTool
-from crewai_tools import FileReadTool
-csv_tool = FileReadTool(file_path='./support_tickets_data.csv')
+# ## Using TicketAnalyticsTool
+# Las métricas se calculan una vez con pandas (ticket_analytics.py): los agentes
+# reciben cifras exactas y el prompt no crece con el número de tickets
+from ticket_analytics import TicketAnalyticsTool
+analytics_tool = TicketAnalyticsTool.from_csv('./support_tickets_data.csv')
 
 # ## Creating Agents, Tasks and Crew
 # Creating Agents
 suggestion_generation_agent = Agent(
   config=agents_config['suggestion_generation_agent'],
-  tools=[csv_tool]
+  tools=[analytics_tool]
 )
 
 reporting_agent = Agent(
   config=agents_config['reporting_agent'],
-  tools=[csv_tool]
+  tools=[analytics_tool]
 )
 
 chart_generation_agent = Agent(
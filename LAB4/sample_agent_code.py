@@ -2,35 +2,26 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
 
-# Data
-issue_data = {
-	'Issue Type': ['API Issue', 'Login Issue', 'Report Generation', 'Data Import', 'Feature Request', 'Billing Issue', 'UI Bug'],
-    'Frequency': [10, 10, 8, 10, 8, 12, 8]
-}
-priority_data = {
-	'Issue Type': ['API Issue', 'Login Issue', 'Report Generation', 'Data Import', 'Feature Request', 'Billing Issue', 'UI Bug'],
-    'High': [5, 4, 3, 4, 3, 5, 3],
-    'Medium': [3, 2, 2, 4, 3, 5, 3],
-    'Low': [2, 3, 3, 2, 2, 2, 2],
-    'Critical': [2, 1, 0, 0, 2, 3, 2]
-}
-agent_performance_data = {
-	'Agent ID': ['A001', 'A002', 'A003', 'A004', 'A005'],
-    'Total Tickets': [10, 10, 10, 10, 10],
-    'Average Response Time (mins)': [134.9, 117.9, 147.6, 137.5, 140.5],
-    'Average Resolution Time (mins)': [813.6, 770.3, 735.4, 650.9, 753.1],
-    'Average Satisfaction Rating': [2.4, 3.5, 2.6, 3.3, 3.1]
-}
-customer_satisfaction_data = {
-	'Month': ['January', 'February', 'March', 'April', 'May', 'June', 'July'],
-    'Average Satisfaction Rating': [2.8, 3.1, 2.8, 2.9, 3.0, 3.2, 3.0]
-}
+from ticket_analytics import compute_analytics, load_tickets
 
-# Convert to DataFrames
-issue_df = pd.DataFrame(issue_data)
-priority_df = pd.DataFrame(priority_data)
-agent_performance_df = pd.DataFrame(agent_performance_data)
-customer_satisfaction_df = pd.DataFrame(customer_satisfaction_data)
+# Data: calculada a partir del CSV en lugar de copiada a mano
+analytics = compute_analytics(load_tickets('support_tickets_data.csv'))
+issue_df = pd.DataFrame(
+    [(issue, row['tickets']) for issue, row in analytics['issue_distribution'].items()],
+    columns=['Issue Type', 'Frequency'],
+)
+priority_df = pd.DataFrame.from_dict(analytics['priority_levels']['by_issue_type'], orient='index') \
+    .rename_axis('Issue Type').reset_index()
+agent_performance_df = pd.DataFrame(
+    [(agent, row['tickets'], row['avg_response_min'], row['avg_resolution_min'], row['avg_satisfaction'])
+     for agent, row in analytics['agent_performance'].items() if agent != 'others'],
+    columns=['Agent ID', 'Total Tickets', 'Average Response Time (mins)',
+             'Average Resolution Time (mins)', 'Average Satisfaction Rating'],
+).sort_values('Agent ID')
+customer_satisfaction_df = pd.DataFrame(
+    [(month, row['avg_satisfaction']) for month, row in analytics['monthly_trend'].items()],
+    columns=['Month', 'Average Satisfaction Rating'],
+)
 
 # Issue Distribution
 plt.figure(figsize=(10, 6))
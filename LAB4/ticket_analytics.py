@@ -0,0 +1,166 @@
+"""Métricas de los tickets de soporte calculadas con pandas para el crew de LAB4.
+
+Antes suggestion_generation_agent y reporting_agent leían el CSV completo con
+FileReadTool y hacían las agregaciones "leyendo": el prompt crecía con el
+número de tickets y las cifras eran aproximadas. Aquí se calculan una sola
+vez, con operaciones vectorizadas (value_counts, crosstab, groupby), la
+distribución de incidencias, los tickets por prioridad, el rendimiento de
+cada agente, la evolución mensual y los comentarios más repetidos, y
+TicketAnalyticsTool las entrega a los agentes como JSON de tamaño acotado.
+Los tickets se leen de la caché Parquet de ticket_ingest.py, solo con las
+columnas que hacen falta.
+
+    python ticket_analytics.py support_tickets_data.csv
+"""
+
+import json
+import sys
+from typing import Type
+
+import numpy as np
+import pandas as pd
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+import ticket_ingest
+
+SECTIONS = ("summary", "issue_distribution", "priority_levels", "agent_performance", "monthly_trend", "customer_feedback")
+PRIORITY_ORDER = ["Critical", "High", "Medium", "Low"]
+MAX_AGENTS = 25  # Agentes por respuesta (los de más tickets); el resto se resume en una línea
+TOP_COMMENTS = 3
+COMMENT_CHARS = 120
+
+ANALYTICS_COLUMNS = [
+    "issue_type", "priority", "agent_id", "date_submitted", "response_time_minutes",
+    "resolution_time_minutes", "satisfaction_rating", "customer_comments", "resolved",
+]
+
+
+def load_tickets(path):
+    """DataFrame con las columnas que usa compute_analytics (vía la caché Parquet)"""
+    return ticket_ingest.load_tickets(path, columns=ANALYTICS_COLUMNS)
+
+
+def _round(frame, digits=2):
+    return frame.astype(float).round(digits).replace({np.nan: None})
+
+
+def compute_analytics(tickets):
+    """Diccionario con todas las secciones de SECTIONS"""
+    total = len(tickets)
+    resolved = tickets["resolved"].fillna(False).astype(bool)
+
+    issues = tickets["issue_type"].value_counts()
+    issue_distribution = {
+        str(issue): {"tickets": int(count), "share_pct": round(100 * count / total, 1)}
+        for issue, count in issues.items()
+    }
+
+    by_priority = pd.crosstab(tickets["issue_type"], tickets["priority"])
+    columns = [p for p in PRIORITY_ORDER if p in by_priority.columns] + \
+              [p for p in by_priority.columns if p not in PRIORITY_ORDER]
+    by_priority = by_priority[columns]
+    priority_levels = {
+        "totals": {str(p): int(n) for p, n in by_priority.sum().items()},
+        "by_issue_type": {str(issue): {str(p): int(n) for p, n in row.items()} for issue, row in by_priority.iterrows()},
+    }
+
+    agents = tickets.assign(resolved=resolved).groupby("agent_id", observed=True).agg(
+        tickets=("issue_type", "size"),
+        avg_response_min=("response_time_minutes", "mean"),
+        avg_resolution_min=("resolution_time_minutes", "mean"),
+        median_resolution_min=("resolution_time_minutes", "median"),
+        avg_satisfaction=("satisfaction_rating", "mean"),
+        resolved_pct=("resolved", "mean"),
+    )
+    agents["resolved_pct"] *= 100
+    agents = agents.sort_values("tickets", ascending=False)
+    metrics = _round(agents.drop(columns="tickets"))
+    agent_performance = {
+        str(agent): {"tickets": int(agents.at[agent, "tickets"]), **metrics.loc[agent].to_dict()}
+        for agent in agents.index[:MAX_AGENTS]
+    }
+    if len(agents) > MAX_AGENTS:
+        rest = agents.iloc[MAX_AGENTS:]
+        agent_performance["others"] = {
+            "agents": int(len(rest)), "tickets": int(rest["tickets"].sum()),
+            "avg_satisfaction": round(float(np.average(rest["avg_satisfaction"], weights=rest["tickets"])), 2),
+        }
+
+    month = tickets["date_submitted"].dt.to_period("M")
+    monthly = tickets.groupby(month).agg(
+        tickets=("issue_type", "size"),
+        avg_satisfaction=("satisfaction_rating", "mean"),
+        avg_resolution_min=("resolution_time_minutes", "mean"),
+    )
+    monthly_metrics = _round(monthly.drop(columns="tickets"))
+    monthly_trend = {
+        str(period): {"tickets": int(monthly.at[period, "tickets"]), **monthly_metrics.loc[period].to_dict()}
+        for period in monthly.index
+    }
+
+    low = (tickets["satisfaction_rating"] <= 2).groupby(tickets["issue_type"], observed=True).mean() * 100
+    customer_feedback = {
+        str(issue): {"low_satisfaction_pct": round(float(share), 1), "top_comments": []} for issue, share in low.items()
+    }
+    comments = tickets.groupby("issue_type", observed=True)["customer_comments"].value_counts()
+    # Los comentarios se leen como categoría: value_counts incluye también los que no aparecen en el tipo
+    comments = comments[comments > 0]
+    for (issue, comment), count in comments.groupby(level=0, observed=True).head(TOP_COMMENTS).items():
+        customer_feedback[str(issue)]["top_comments"].append({"comment": str(comment)[:COMMENT_CHARS], "tickets": int(count)})
+
+    summary = {
+        "tickets": total,
+        "resolved_pct": round(100 * float(resolved.mean()), 1) if total else None,
+        "avg_response_min": round(float(tickets["response_time_minutes"].mean()), 2),
+        "avg_resolution_min": round(float(tickets["resolution_time_minutes"].mean()), 2),
+        "avg_satisfaction": round(float(tickets["satisfaction_rating"].mean()), 2),
+        "period": f"{tickets['date_submitted'].min():%Y-%m-%d} to {tickets['date_submitted'].max():%Y-%m-%d}",
+        "issue_types": int(issues.size),
+        "agents": int(len(agents)),
+    }
+    return {
+        "summary": summary,
+        "issue_distribution": issue_distribution,
+        "priority_levels": priority_levels,
+        "agent_performance": agent_performance,
+        "monthly_trend": monthly_trend,
+        "customer_feedback": customer_feedback,
+    }
+
+
+class TicketAnalyticsToolInput(BaseModel):
+    """Input schema for TicketAnalyticsTool."""
+    section: str = Field("all", description=f"One of {', '.join(repr(s) for s in SECTIONS)} or 'all'.")
+
+
+class TicketAnalyticsTool(BaseTool):
+    name: str = "Support ticket analytics"
+    description: str = (
+        "Exact, precomputed metrics of the support tickets dataset, as JSON. "
+        "section='summary' gives totals and averages; 'issue_distribution' the tickets per issue type; "
+        "'priority_levels' the tickets per priority, overall and per issue type; "
+        "'agent_performance' the tickets, response/resolution times, satisfaction and resolution rate per agent; "
+        "'monthly_trend' the tickets, satisfaction and resolution time per month; "
+        "'customer_feedback' the most frequent comments and the share of low ratings per issue type. "
+        "Use these numbers as they are instead of estimating them."
+    )
+    args_schema: Type[BaseModel] = TicketAnalyticsToolInput
+    analytics: dict = Field(default_factory=dict, exclude=True)
+
+    @classmethod
+    def from_csv(cls, path):
+        return cls(analytics=compute_analytics(load_tickets(path)))
+
+    def _run(self, section: str = "all") -> str:
+        section = section.strip().strip("'\"") or "all"
+        if section == "all":
+            return json.dumps(self.analytics)
+        if section not in self.analytics:
+            return f"Unknown section '{section}'. Use one of {', '.join(SECTIONS)} or 'all'."
+        return json.dumps({section: self.analytics[section]})
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "support_tickets_data.csv"
+    print(json.dumps(compute_analytics(load_tickets(path)), indent=2))
@@ -0,0 +1,120 @@
+"""Ingesta por bloques de CSV de tickets grandes con caché en Parquet.
+
+Las exportaciones reales pesan varios GB, así que el CSV no se carga de una
+vez: se lee en bloques de CHUNK_ROWS filas con tipos explícitos
+(issue_type/priority/agent_id como categorías, date_submitted como fecha,
+enteros con nulos) y cada bloque se escribe como un row group de un Parquet
+en .cache/tickets/<sha256 del CSV>-v<CACHE_VERSION>.parquet. La memoria máxima
+depende del tamaño del bloque, no del archivo.
+
+Las ejecuciones siguientes no vuelven a parsear el texto: leen del Parquet,
+con memory map, solo las columnas que necesitan. El sha256 del CSV se
+recuerda junto a su tamaño y mtime (hashes.json), así que tampoco se vuelve
+a leer el CSV entero para calcular la clave si no cambió.
+
+    python ticket_ingest.py support_tickets_data.csv
+"""
+
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEFAULT_CACHE_DIR = Path(".cache/tickets")
+CACHE_VERSION = 1  # Cambiarlo (o cambiar SCHEMA) invalida los Parquet guardados
+CHUNK_ROWS = 250_000
+
+TICKET_DTYPES = {
+    "ticket_id": "string",
+    "customer_id": "string",
+    "issue_type": "category",
+    "issue_description": "string",
+    "priority": "category",
+    "response_time_minutes": "Int32",
+    "resolution_time_minutes": "Int32",
+    "satisfaction_rating": "Int8",
+    "customer_comments": "string",
+    "agent_id": "category",
+    "resolved": "boolean",
+}
+DATE_COLUMNS = ["date_submitted"]
+
+# Esquema fijo: el índice de las categorías no depende de cuántas haya en cada bloque
+_CATEGORY = pa.dictionary(pa.int32(), pa.string())
+SCHEMA = pa.schema([
+    ("ticket_id", pa.string()),
+    ("customer_id", pa.string()),
+    ("issue_type", _CATEGORY),
+    ("issue_description", pa.string()),
+    ("priority", _CATEGORY),
+    ("date_submitted", pa.timestamp("us")),
+    ("response_time_minutes", pa.int32()),
+    ("resolution_time_minutes", pa.int32()),
+    ("satisfaction_rating", pa.int8()),
+    ("customer_comments", pa.string()),
+    ("agent_id", _CATEGORY),
+    ("resolved", pa.bool_()),
+])
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """sha256 de un archivo leyéndolo por bloques"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _csv_key(path, cache_dir):
+    """sha256 del CSV, reutilizando el guardado si no cambiaron su tamaño ni su mtime"""
+    stat = Path(path).stat()
+    known_path = cache_dir / "hashes.json"
+    known = json.loads(known_path.read_text()) if known_path.exists() else {}
+    entry = known.get(str(Path(path).resolve()))
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["sha256"]
+    digest = hash_file(path)
+    known[str(Path(path).resolve())] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+    known_path.write_text(json.dumps(known, indent=2))
+    return digest
+
+
+def ingest(path, cache_dir=DEFAULT_CACHE_DIR, chunk_rows=CHUNK_ROWS):
+    """Ruta del Parquet con los tickets de path; lo genera por bloques si no existe"""
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    target = cache_dir / f"{_csv_key(path, cache_dir)}-v{CACHE_VERSION}.parquet"
+    if target.exists():
+        return target
+
+    print(f"# Convirtiendo {path} a Parquet por bloques de {chunk_rows} filas")
+    tmp = target.with_suffix(f".{os.getpid()}.tmp")
+    rows = 0
+    with pq.ParquetWriter(tmp, SCHEMA) as writer:
+        for chunk in pd.read_csv(path, dtype=TICKET_DTYPES, parse_dates=DATE_COLUMNS, chunksize=chunk_rows):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            writer.write_table(table.select(SCHEMA.names).cast(SCHEMA))
+            rows += len(chunk)
+    os.replace(tmp, target)
+    print(f"# {rows} tickets guardados en {target}")
+    return target
+
+
+def load_tickets(path, columns=None, cache_dir=DEFAULT_CACHE_DIR):
+    """DataFrame con las columnas pedidas (todas por defecto), leído del Parquet con memory map"""
+    table = pq.read_table(ingest(path, cache_dir), columns=columns, memory_map=True,
+                          read_dictionary=["customer_comments"] if not columns or "customer_comments" in columns else None)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "support_tickets_data.csv"
+    parquet = ingest(path)
+    metadata = pq.ParquetFile(parquet).metadata
+    print(f"{parquet}: {metadata.num_rows} tickets, {metadata.num_row_groups} row groups")
@@ -17,7 +17,12 @@ load_env()
 
 import os
 import yaml
-from crewai import Agent, Task, Crew
+from crewai import Agent, Task, Crew, LLM
+try:
+    from rate_limit import limited  # Con la raíz del repositorio en PYTHONPATH
+except ImportError:
+    def limited(llm):
+        return llm
 from pydantic import BaseModel, Field, ValidationError
 from typing import List
 from crewai_tools import SerperDevTool, ScrapeWebsiteTool, WebsiteSearchTool
@@ -57,7 +62,7 @@ tasks_config = configs['tasks']
 # Setup Multi LLM models
 os.environ['OPENAI_MODEL_NAME'] = 'gpt-4o-mini'
 # groq_llm = "groq/llama-3.1-70b-versatile"
-groq_llm = "groq/llama3-8b-8192"
+groq_llm = limited(LLM(model="groq/llama3-8b-8192"))  # Límite de peticiones/tokens y backoff ante 429
 
 # Creating Agents
 market_news_monitor_agent = Agent(
@@ -3,6 +3,11 @@ from crewai import Agent, Task, Crew, Process, LLM
 from crewai_tools import SerperDevTool
 import os
 from dotenv import load_dotenv
+try:
+    from rate_limit import limited  # Con la raíz del repositorio en PYTHONPATH
+except ImportError:
+    def limited(llm):
+        return llm
 
 load_dotenv()
 
@@ -16,6 +21,8 @@ cerebras_llm = LLM(
     # max_completion_tokens=8192, # Max tokens for the response
     # response_format={ "type": "json_object" } # This will ensure the response is in JSON object format
 )
+# Límite de peticiones/tokens y backoff ante 429, compartido por proveedor
+limited(cerebras_llm)
 
 # Agent definition
 researcher = Agent(
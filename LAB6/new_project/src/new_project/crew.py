@@ -2,6 +2,13 @@ from crewai import Agent, Crew, Process, Task, LLM
 from crewai.project import CrewBase, agent, crew, task
 from crewai_tools import SerperDevTool
 import os
+try:
+    from rate_limit import limited
+except ImportError:
+    # rate_limit.py vive en la raíz del repositorio, fuera de este paquete: sin él,
+    # cada LLM conserva los reintentos de su propio cliente
+    def limited(llm):
+        return llm
 
 groq_llm = LLM(
     model="groq/llama3-8b-8192",
@@ -20,6 +27,10 @@ cerebras_llm = LLM(
     temperature=0.5,
 	max_tokens=8192,
 )
+# Límite de peticiones/tokens y backoff ante 429, compartido por proveedor
+limited(groq_llm)
+limited(llm)
+limited(cerebras_llm)
 
 import warnings
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
@@ -5,6 +5,11 @@ from crewai_tools import SerperDevTool
 
 import os
 from dotenv import load_dotenv
+try:
+    from rate_limit import limited  # Con la raíz del repositorio en PYTHONPATH
+except ImportError:
+    def limited(llm):
+        return llm
 load_dotenv()
 
 # Configure the LLM to use Cerebras
@@ -22,6 +27,9 @@ string_source = StringKnowledgeSource(
 
 # Create an LLM with a temperature of 0 to ensure deterministic outputs
 llm = LLM(model="gpt-4o-mini", temperature=0)
+# Límite de peticiones/tokens y backoff ante 429, compartido por proveedor
+limited(cerebras_llm)
+limited(llm)
 
 # Create an agent with the knowledge store
 agent = Agent(
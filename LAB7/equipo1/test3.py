@@ -10,6 +10,11 @@ from crewai_tools import (
 
 import os
 from dotenv import load_dotenv
+try:
+    from rate_limit import limited  # Con la raíz del repositorio en PYTHONPATH
+except ImportError:
+    def limited(llm):
+        return llm
 load_dotenv()
 
 # Configure the LLM to use Cerebras
@@ -20,6 +25,9 @@ cerebras_llm = LLM(
 )
 # Create an LLM with a temperature of 0 to ensure deterministic outputs
 llm = LLM(model="gpt-4o-mini", temperature=0.1)
+# Límite de peticiones/tokens y backoff ante 429, compartido por proveedor
+limited(cerebras_llm)
+limited(llm)
 
 # Instantiate tools
 docs_tool = DirectoryReadTool(directory='./blog-posts')
@@ -0,0 +1,414 @@
+"""Benchmark de extremo a extremo del generador de documentación.
+
+Ejecuta code_documentation_generator.py contra repositorios sintéticos de
+distintos tamaños y un LLM simulado (mock_llm_server.py) que responde con un
+guion determinista: el planificador recibe un plan fijo, cada agente hace
+tool_rounds llamadas a sus herramientas y los documentos tienen un tamaño y un
+diagrama mermaid válidos. La latencia y los tokens por segundo del servidor
+simulado son configurables, así que los resultados no dependen de un modelo
+remoto.
+
+Cada escenario corre en un subproceso con su propio directorio de trabajo
+(cachés en frío) y se mide a partir de la traza de run_metrics: rendimiento
+(documentos por minuto), latencia por documento (p50/p95), llamadas a
+herramientas y al LLM y pico de memoria (RSS). Antes de los escenarios se
+perfila el arranque (python -X importtime) de los puntos de entrada ligeros:
+si importar la CLI o ejecutar --help supera --max-startup-s, el benchmark
+falla. Los resultados se guardan en JSON y --compare muestra la diferencia
+con una ejecución anterior:
+
+    python benchmark.py --sizes small,medium --latency 0.2
+    python benchmark.py --compare benchmark_results/20250101-120000.json
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import yaml
+
+from mock_llm_server import MockLLMServer
+
+ROOT = Path(__file__).resolve().parent
+DEFAULT_RESULTS_DIR = ROOT / "benchmark_results"
+
+# Tamaño de cada escenario: (archivos del repositorio, documentos del plan)
+SIZES = {
+    "small": (8, 3),
+    "medium": (40, 6),
+    "large": (200, 10),
+}
+
+# Puntos de entrada que deben arrancar sin importar crewAI ni langtrace
+STARTUP_COMMANDS = {
+    "import code_documentation_generator": ["-c", "import code_documentation_generator"],
+    "code_documentation_generator.py --help": ["code_documentation_generator.py", "--help"],
+}
+HEAVY_MODULES = ("crewai", "crewai_tools", "litellm", "langtrace_python_sdk")
+
+# Métricas que compara --compare; True si un valor mayor es mejor
+COMPARED = {
+    "wall_s": False,
+    "docs_per_min": True,
+    "doc_p50_s": False,
+    "doc_p95_s": False,
+    "llm_calls": False,
+    "tool_calls": False,
+    "peak_rss_mb": False,
+}
+
+WORDS = (
+    "request response cache index token parser config buffer stream record "
+    "handler worker queue client server session schema plan review batch"
+).split()
+
+
+def _name(rng, parts=2):
+    return "_".join(rng.choice(WORDS) for _ in range(parts))
+
+
+def make_repo(path, files, seed=0):
+    """Crea un repositorio git sintético con files módulos Python.
+
+    Devuelve (rutas relativas, nombres de símbolos).
+    """
+    rng = random.Random(seed)
+    path = Path(path)
+    paths, symbols = [], []
+    for i in range(files):
+        rel = f"pkg_{i % max(1, files // 8)}/module_{i}.py"
+        lines = [f'"""Módulo sintético {i} para el benchmark."""', "", "import os", ""]
+        for c in range(rng.randint(1, 3)):
+            cls = f"{_name(rng).title().replace('_', '')}{i}{c}"
+            symbols.append(cls)
+            lines += [f"class {cls}:", f'    """{cls} de prueba."""', ""]
+            for m in range(rng.randint(2, 6)):
+                method = f"{_name(rng)}_{m}"
+                lines += [
+                    f"    def {method}(self, value, limit={rng.randint(1, 100)}):",
+                    f"        result = [item for item in range(limit) if item % {rng.randint(2, 9)}]",
+                    "        if value in result:",
+                    "            return os.path.join(str(value), str(limit))",
+                    "        return result",
+                    "",
+                ]
+        for f in range(rng.randint(1, 4)):
+            function = f"{_name(rng)}_{i}_{f}"
+            symbols.append(function)
+            lines += [f"def {function}(data):", "    return sorted(data, reverse=True)", "", ""]
+        target = path / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text("\n".join(lines))
+        paths.append(rel)
+    (path / "README.md").write_text(f"# Repositorio sintético\n\n{files} módulos generados para el benchmark.\n")
+    git = ["git", "-c", "user.name=benchmark", "-c", "user.email=benchmark@localhost"]
+    subprocess.run(["git", "init", "-q", str(path)], check=True)
+    subprocess.run(git + ["-C", str(path), "add", "-A"], check=True)
+    subprocess.run(git + ["-C", str(path), "commit", "-q", "-m", "Synthetic repository"], check=True)
+    return paths, symbols
+
+
+def make_plan(paths, symbols, docs, seed=0):
+    rng = random.Random(seed)
+    return {
+        "overview": "Synthetic repository used to benchmark the documentation pipeline.",
+        "docs": [
+            {
+                "title": f"Component {i}: {_name(rng).replace('_', ' ')}",
+                "description": "How this component works.",
+                "prerequisites": "Python 3.10",
+                "examples": ["Basic usage"],
+                "goal": "Explain the component",
+                "source_files": rng.sample(paths, min(3, len(paths))),
+                "symbols": rng.sample(symbols, min(2, len(symbols))),
+            }
+            for i in range(docs)
+        ],
+    }
+
+
+def _example(schema, defs):
+    """Instancia mínima de un JSON schema (para respuestas estructuradas desconocidas)"""
+    if "$ref" in schema:
+        return _example(defs[schema["$ref"].split("/")[-1]], defs)
+    if "anyOf" in schema:
+        return _example(schema["anyOf"][0], defs)
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: _example(prop, defs) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_example(schema.get("items", {}), defs)]
+    return {"integer": 1, "number": 1.0, "boolean": False, "null": None}.get(kind, "example")
+
+
+class ScriptedReplies:
+    """Guion del LLM simulado: herramientas primero, después la respuesta final"""
+
+    def __init__(self, plan, paths, symbols, tool_rounds=1, doc_tokens=800, seed=0):
+        self.plan = plan
+        self.paths = paths
+        self.symbols = symbols
+        self.tool_rounds = tool_rounds
+        self.doc_tokens = doc_tokens
+        self.rng = random.Random(seed)
+
+    def __call__(self, request):
+        messages = request.get("messages", [])
+        system = " ".join(str(m.get("content") or "") for m in messages if m.get("role") == "system")
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            spec = response_format["json_schema"]
+            if spec.get("name") == "DocPlan":
+                return json.dumps(self.plan)
+            schema = spec.get("schema", {})
+            return json.dumps(_example(schema, schema.get("$defs", {})))
+        tools = request.get("tools") or []
+        rounds = sum(1 for m in messages if m.get("role") == "tool")
+        if tools and rounds < self.tool_rounds:
+            tool = tools[rounds % len(tools)]["function"]
+            return [(tool["name"], self._arguments(tool.get("parameters", {})))]
+        if "Documentation Planner" in system:
+            return json.dumps(self.plan)
+        prompt = str(messages[-1].get("content") or "") if messages else ""
+        if prompt.startswith("You are summarising part of a large code repository"):
+            # Resúmenes por directorio de repo_summary: una línea por directorio
+            return "\n".join(f"{d}: {' '.join(self.rng.sample(WORDS, 12))}" for d in re.findall(r"^## (\S+)", prompt, re.M))
+        return self._document()
+
+    def _arguments(self, parameters):
+        arguments = {}
+        for name, prop in parameters.get("properties", {}).items():
+            if name == "action":
+                # "One of 'list', 'symbols' or 'read'": la primera acción que admite la herramienta
+                actions = re.findall(r"'(\w+)'", prop.get("description", ""))
+                arguments[name] = actions[0] if actions else "list"
+            elif "path" in name or "file" in name:
+                arguments[name] = self.rng.choice(self.paths)
+            elif prop.get("type") in ("integer", "number"):
+                arguments[name] = 1
+            elif prop.get("type") == "boolean":
+                arguments[name] = False
+            else:
+                arguments[name] = self.rng.choice(self.symbols)
+        return arguments
+
+    def _document(self):
+        names = self.rng.sample(self.symbols, min(3, len(self.symbols)))
+        words = " ".join(self.rng.choice(WORDS) for _ in range(self.doc_tokens * 3 // 4))
+        diagram = "\n".join(f"    {a}[{a}] --> {b}[{b}]" for a, b in zip(names, names[1:]))
+        return (
+            f"# {names[0]}\n\n{words}\n\n"
+            f"```mermaid\nflowchart TD\n{diagram}\n```\n\n"
+            f"## Usage\n\n```python\n{names[0]}().run()\n```\n"
+        )
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def read_trace(path):
+    if not Path(path).exists():
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def run_scenario(size, args, results_dir):
+    files, docs = SIZES[size]
+    run_dir = results_dir / "runs" / f"{args.run_id}-{size}"
+    run_dir.mkdir(parents=True)
+    paths, symbols = make_repo(run_dir / "src", files, seed=args.seed)
+    plan = make_plan(paths, symbols, docs, seed=args.seed)
+    replies = ScriptedReplies(plan, paths, symbols, tool_rounds=args.tool_rounds,
+                              doc_tokens=args.doc_tokens, seed=args.seed)
+
+    # El generador lee config/ del directorio de trabajo y escribe ahí docs/, workdir/ y .cache/
+    (run_dir / "config").symlink_to(ROOT / "config")
+    with open(ROOT / "config" / "llm_tiers.yaml") as f:
+        tiers = yaml.safe_load(f)
+
+    with MockLLMServer(latency=args.latency, tokens_per_second=args.tokens_per_second, reply=replies) as server:
+        for tier in tiers["tiers"].values():
+            tier.update(model=args.model, base_url=server.base_url, api_key_env="OPENAI_API_KEY")
+        with open(run_dir / "llm_tiers.yaml", "w") as f:
+            yaml.safe_dump(tiers, f)
+        env = dict(os.environ, OPENAI_API_KEY="mock", OPENAI_BASE_URL=server.base_url,
+                   NVIDIA_NIM_API_KEY="nvapi-mock")
+        command = [
+            sys.executable, str(ROOT / "code_documentation_generator.py"), f"file://{run_dir / 'src'}",
+            "--llm-tiers", "llm_tiers.yaml",
+            "--code-search-embedder", args.embedder,
+            "--mermaid-source", "snapshot",
+            "--max-concurrency", str(args.max_concurrency),
+            "--trace", "trace.jsonl",
+            "--no-llm-cache",
+            *args.generator_args,
+        ]
+        print(f"# Escenario {size}: {files} archivos, {docs} documentos")
+        with open(run_dir / "output.log", "w") as log:
+            started = time.perf_counter()
+            process = subprocess.Popen(command, cwd=run_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+            # wait4 da el uso de recursos de este proceso hijo (ru_maxrss en KiB en Linux)
+            _, status, usage = os.wait4(process.pid, 0)
+            wall = time.perf_counter() - started
+        process.returncode = os.waitstatus_to_exitcode(status)
+        server_stats = server.stats()
+
+    records = read_trace(run_dir / "trace.jsonl")
+    doc_latencies = [r["duration_s"] for r in records if r["kind"] == "crew" and r["name"] == "documentation_crew"]
+    tools = Counter(r["name"] for r in records if r["kind"] == "tool")
+    llm_calls = [r for r in records if r["kind"] == "llm"]
+    written = len(list((run_dir / "docs").glob("*.mdx")))
+    result = {
+        "files": files,
+        "docs_planned": docs,
+        "docs_written": written,
+        "exit_code": process.returncode,
+        "wall_s": round(wall, 3),
+        "docs_per_min": round(written / wall * 60, 2) if wall else 0.0,
+        "doc_p50_s": percentile(doc_latencies, 50),
+        "doc_p95_s": percentile(doc_latencies, 95),
+        "llm_calls": len(llm_calls),
+        "prompt_tokens": sum(r.get("prompt_tokens", 0) for r in llm_calls),
+        "completion_tokens": sum(r.get("completion_tokens", 0) for r in llm_calls),
+        "tool_calls": sum(tools.values()),
+        "tool_calls_by_name": dict(tools),
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        "mock_server": server_stats,
+        "log": str(run_dir / "output.log"),
+    }
+    if process.returncode != 0:
+        print(f"# El escenario {size} terminó con código {process.returncode}; ver {run_dir / 'output.log'}")
+    return result
+
+
+def profile_startup(command, top=8):
+    """Tiempo de arranque de un comando de Python y módulos que más tardan en importarse"""
+    started = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", *command], cwd=ROOT,
+                             capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    # Formato de -X importtime: "import time: self [us] | cumulative | módulo"
+    imports = []
+    for line in process.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, module = line.split("|", 2)
+            imports.append((module.strip(), int(cumulative)))
+    top_level = sorted((item for item in imports if not item[0].startswith(" ")), key=lambda item: -item[1])
+    return {
+        "wall_s": round(wall, 3),
+        "exit_code": process.returncode,
+        "modules": len(imports),
+        "heavy_imported": sorted({name.split(".")[0] for name, _ in imports} & set(HEAVY_MODULES)),
+        "slowest": [{"module": name, "cumulative_s": round(us / 1e6, 4)} for name, us in top_level[:top]],
+    }
+
+
+def check_startup(limit):
+    results, ok = {}, True
+    for name, command in STARTUP_COMMANDS.items():
+        result = profile_startup(command)
+        results[name] = result
+        slow = result["wall_s"] > limit
+        ok = ok and not slow and not result["heavy_imported"] and result["exit_code"] == 0
+        status = "LENTO" if slow else "ok"
+        heavy = f", importa {', '.join(result['heavy_imported'])}" if result["heavy_imported"] else ""
+        print(f"# Arranque de '{name}': {result['wall_s']:.2f} s ({status}{heavy})")
+    return results, ok
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "-C", str(ROOT), "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    header = f"{'escenario':<10} " + " ".join(f"{metric:>14}" for metric in COMPARED)
+    print(f"\n{header}\n{'-' * len(header)}")
+    for size, scenario in results["scenarios"].items():
+        cells = []
+        for metric, higher_is_better in COMPARED.items():
+            value = scenario.get(metric)
+            cell = "n/d" if value is None else f"{value:g}"
+            previous = (baseline or {}).get("scenarios", {}).get(size, {}).get(metric)
+            if value is not None and previous:
+                change = (value - previous) / previous * 100
+                worse = change < 0 if higher_is_better else change > 0
+                cell += f" ({change:+.0f}%{'!' if worse and abs(change) >= 10 else ''})"
+            cells.append(f"{cell:>14}")
+        print(f"{size:<10} " + " ".join(cells))
+    if baseline:
+        print(f"\n# Comparado con {baseline.get('run_id')} ({baseline.get('git_commit')}); '!' = empeora un 10% o más")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del generador de documentación con un LLM simulado")
+    parser.add_argument("--sizes", default="small,medium",
+                        help=f"Escenarios separados por comas ({', '.join(SIZES)})")
+    parser.add_argument("--latency", type=float, default=0.1, help="Segundos de espera por respuesta del LLM simulado")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="Velocidad de generación del LLM simulado (0 = instantánea)")
+    parser.add_argument("--tool-rounds", type=int, default=1, help="Llamadas a herramientas por tarea antes de responder")
+    parser.add_argument("--doc-tokens", type=int, default=800, help="Tamaño aproximado de cada documento generado")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="Documentos en paralelo (--max-concurrency del generador)")
+    parser.add_argument("--embedder", choices=["openai", "hashing"], default="openai",
+                        help="Embedder de la búsqueda de código; 'openai' usa /v1/embeddings del servidor simulado")
+    parser.add_argument("--model", default="gpt-4o-mini", help="Nombre de modelo que se envía al servidor simulado")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--generator-arg", action="append", default=[], dest="generator_args", metavar="ARG",
+                        help="Argumento extra para el generador, p. ej. --generator-arg=--large-repo=on")
+    parser.add_argument("--results-dir", type=Path, default=DEFAULT_RESULTS_DIR)
+    parser.add_argument("--compare", type=Path, metavar="RESULTS_JSON", help="Resultados anteriores con los que comparar")
+    parser.add_argument("--max-startup-s", type=float, default=1.0,
+                        help="Tiempo máximo de arranque de la CLI antes de dar el benchmark por fallido")
+    args = parser.parse_args(argv)
+    unknown = set(args.sizes.split(",")) - set(SIZES)
+    if unknown:
+        parser.error(f"Escenarios desconocidos: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.run_id = time.strftime("%Y%m%d-%H%M%S")
+    args.results_dir.mkdir(parents=True, exist_ok=True)
+    results = {
+        "run_id": args.run_id,
+        "git_commit": git_commit(),
+        "python": sys.version.split()[0],
+        "settings": {key: value for key, value in vars(args).items()
+                     if key not in ("results_dir", "compare", "run_id")},
+        "scenarios": {},
+    }
+    results["startup"], startup_ok = check_startup(args.max_startup_s)
+    for size in args.sizes.split(","):
+        results["scenarios"][size] = run_scenario(size, args, args.results_dir)
+
+    path = args.results_dir / f"{args.run_id}.json"
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    print(f"\n# Resultados guardados en {path}")
+    return 0 if startup_ok and all(s["exit_code"] == 0 for s in results["scenarios"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,33 +1,25 @@
 #!/usr/bin/env python3
 
+import argparse
+import asyncio
 import getpass
 import os
 import sys
 import time
 import threading
-import yaml
-import subprocess
-import re
-from pathlib import Path
-from pydantic import BaseModel
-from typing import List
-from crewai import Agent, Task, Crew, LLM
-from crewai.flow.flow import Flow, listen, start
-from crewai_tools import DirectoryReadTool, FileReadTool, WebsiteSearchTool
-import dotenv
-from dotenv import dotenv_values
-from langtrace_python_sdk import langtrace
-import litellm
 import warnings
+from dataclasses import dataclass
+from run_metrics import DEFAULT_TRACE_PATH
+from llm_cache import DEFAULT_CACHE_PATH
 
-# litellm.set_verbose = True
+# crewAI, crewai_tools, langtrace y los módulos del flujo se importan en main() y build_crews():
+# así `--help`, LoadingAnimation y los workers de corta vida arrancan sin esperar varios segundos.
 
-# Variables globales para los crews
-planning_crew = None
-documentation_crew = None
+def init_tracing():
+    """Inicializa langtrace; debe ejecutarse antes de importar crewAI para instrumentarlo"""
+    from langtrace_python_sdk import langtrace
 
-api_key = os.getenv('LANGTRACE_API_KEY')
-langtrace.init(api_key=api_key)
+    langtrace.init(api_key=os.getenv('LANGTRACE_API_KEY'))
 
 # Clase para animación de carga
 class LoadingAnimation:
@@ -58,103 +50,113 @@ class LoadingAnimation:
             self.animation_thread.join()
         print(f"\r{completion_message} ✓")
 
-# Modelos de datos
-class DocItem(BaseModel):
-    title: str
-    description: str
-    prerequisites: str
-    examples: list[str]
-    goal: str
-
-class DocPlan(BaseModel):
-    overview: str
-    docs: list[DocItem]
-
-class DocumentationState(BaseModel):
-    project_url: str = "https://github.com/crewAIInc/nvidia-demo"  # Valor por defecto
-    repo_path: Path = Path("workdir/")
-    docs: List[str] = []
-
-# Función para verificar sintaxis mermaid
-def check_mermaid_syntax(task_output):
-    text = task_output.raw
-    mermaid_blocks = re.findall(r'```mermaid\n(.*?)\n```', text, re.DOTALL)
-    
-    for block in mermaid_blocks:
-        diagram_text = block.strip()
-        lines = diagram_text.split('\n')
-        corrected_lines = []
-        
-        for line in lines:
-            corrected_line = re.sub(r'\|.*?\|>', lambda match: match.group(0).replace('|>', '|'), line)
-            corrected_lines.append(corrected_line)
-            
-        text = text.replace(block, "\n".join(corrected_lines))
-    
-    task_output.raw = text
-    return (True, task_output)
-
-# Clase principal del flujo de documentación
-class CreateDocumentationFlow(Flow[DocumentationState]):
-    @start()
-    def clone_repo(self):
-        print(f"# Clonando repositorio: {self.state.project_url}\n")
-        repo_name = self.state.project_url.split("/")[-1]
-        self.state.repo_path = Path(f"{self.state.repo_path}/{repo_name}")
-
-        if self.state.repo_path.exists():
-            print(f"# El directorio del repositorio ya existe en {self.state.repo_path}\n")
-            subprocess.run(["rm", "-rf", str(self.state.repo_path)])
-            print("# Directorio existente eliminado\n")
-
-        subprocess.run(["git", "clone", self.state.project_url, str(self.state.repo_path)])
-        return self.state
-
-    @listen(clone_repo)
-    def plan_docs(self):
-        print(f"# Planificando documentación para: {self.state.repo_path}\n")
-        result = planning_crew.kickoff(inputs={'repo_path': str(self.state.repo_path)})
-        print(f"# Documentación planificada para {self.state.repo_path}:")
-        for doc in result.pydantic.docs:
-            print(f"    - {doc.title}")
-        return result
-
-    @listen(plan_docs)
-    def save_plan(self, plan):
-        Path("docs").mkdir(exist_ok=True)
-        with open("docs/plan.json", "w") as f:
-            f.write(plan.raw)
-
-    @listen(plan_docs)
-    def create_docs(self, plan):
-        for doc in plan.pydantic.docs:
-            print(f"\n# Creando documentación para: {doc.title}")
-            result = documentation_crew.kickoff(inputs={
-                'repo_path': str(self.state.repo_path),
-                'title': doc.title,
-                'overview': plan.pydantic.overview,
-                'description': doc.description,
-                'prerequisites': doc.prerequisites,
-                'examples': '\n'.join(doc.examples),
-                'goal': doc.goal
-            })
-
-            docs_dir = Path("docs")
-            docs_dir.mkdir(exist_ok=True)
-            title = doc.title.lower().replace(" ", "_") + ".mdx"
-            self.state.docs.append(str(docs_dir / title))
-            with open(docs_dir / title, "w") as f:
-                f.write(result.raw)
-        print(f"\n# Documentación creada para: {self.state.repo_path}")
-
-def main():
-    # Verificar API key
-    if not os.environ.get("NVIDIA_NIM_API_KEY", "").startswith("nvapi-"):
-        nvapi_key = getpass.getpass("Ingrese su NVIDIA API key: ")
-        assert nvapi_key.startswith("nvapi-"), f"{nvapi_key[:5]}... no es una clave válida"
-        os.environ["NVIDIA_NIM_API_KEY"] = nvapi_key
-        os.environ["NVIDIA_API_KEY"] = nvapi_key
-        os.environ["OPENAI_API_KEY"] = nvapi_key
+def read_batch_file(path):
+    """URLs de un archivo batch, ignorando líneas vacías y comentarios"""
+    with open(path) as f:
+        lines = [line.split("#", 1)[0].strip() for line in f]
+    return [line for line in lines if line]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Genera documentación para un repositorio de GitHub")
+    parser.add_argument("project_urls", nargs="*", metavar="project_url",
+                        help="URL del repositorio a documentar (con varias se activa el modo batch)")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Archivo con una URL de repositorio por línea; cada uno se documenta en docs/<repo>/")
+    parser.add_argument("--batch-concurrency", type=int, default=2,
+                        help="Repositorios documentados en paralelo en modo batch")
+    parser.add_argument("--rpm", type=int, default=0,
+                        help="Límite global de peticiones por minuto al LLM (0 = LLM_RPM o sin límite)")
+    parser.add_argument("--tpm", type=int, default=0,
+                        help="Límite global de tokens por minuto al LLM (0 = LLM_TPM o sin límite)")
+    parser.add_argument("--llm-tiers", default="config/llm_tiers.yaml",
+                        help="Niveles de modelo; cada agente elige el suyo con la clave llm: de su YAML")
+    parser.add_argument("--single-model", metavar="TIER",
+                        help="Usar el mismo nivel de modelo para todos los agentes")
+    parser.add_argument("--large-repo", choices=["auto", "on", "off"], default="auto",
+                        help="Planificar a partir de resúmenes por directorio (map-reduce) en lugar de explorar el repositorio")
+    parser.add_argument("--large-repo-files", type=int, default=300,
+                        help="En modo auto, número de archivos a partir del cual se usa la planificación map-reduce")
+    parser.add_argument("--summary-concurrency", type=int, default=8,
+                        help="Resúmenes de directorios en paralelo como máximo")
+    parser.add_argument("--summary-tier", default="fast",
+                        help="Nivel de modelo de los resúmenes por directorio")
+    parser.add_argument("--context-tokens", type=int, default=None,
+                        help="Tokens de prompt por paso de agente antes de resumir salidas antiguas de herramientas "
+                             "(por defecto, la ventana del modelo menos max_tokens)")
+    parser.add_argument("--llm-max-concurrency", type=int, default=None,
+                        help="Llamadas simultáneas máximas al LLM; se reduce sola ante 429/5xx (por defecto 8)")
+    parser.add_argument("--max-concurrency", type=int, default=4,
+                        help="Número máximo de documentos generados en paralelo (1 = secuencial)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Reutilizar docs/plan.json y regenerar solo los documentos con fuentes modificadas")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continuar una ejecución interrumpida: reutiliza el checkout y docs/plan.json "
+                             "y solo genera los documentos que faltan (según docs/checkpoint.json)")
+    parser.add_argument("--full-clone", action="store_true",
+                        help="Clonar el historial completo, sin clon parcial ni exclusión de multimedia (--sparse-path sigue aplicándose)")
+    parser.add_argument("--sparse-path", action="append", default=[], dest="sparse_paths",
+                        help="Ruta del repositorio a incluir en el checkout (repetible)")
+    parser.add_argument("--code-search-embedder", choices=["openai", "hashing"], default="openai",
+                        help="Embedder del índice de búsqueda de código ('hashing' es local y determinista)")
+    parser.add_argument("--mermaid-source", choices=["web", "snapshot"], default="web",
+                        help="Fuente de la referencia de mermaid ('snapshot' usa config/mermaid_examples.md, sin red)")
+    parser.add_argument("--refresh-mermaid-index", action="store_true",
+                        help="Volver a leer la fuente de mermaid y re-embeberla si cambió")
+    parser.add_argument("--stream", action="store_true",
+                        help="Generar en streaming: los tokens se escriben en docs/*.mdx.partial a medida que llegan")
+    parser.add_argument("--trace", default=str(DEFAULT_TRACE_PATH),
+                        help="Archivo JSONL con las métricas de cada paso, crew, tarea, herramienta y llamada al LLM")
+    parser.add_argument("--no-metrics", action="store_true",
+                        help="No registrar métricas ni imprimir el resumen final")
+    parser.add_argument("--llm-cache", default=str(DEFAULT_CACHE_PATH),
+                        help="Archivo SQLite de la caché de respuestas del LLM")
+    parser.add_argument("--llm-cache-max-mb", type=int, default=256,
+                        help="Tamaño máximo de la caché antes de expulsar entradas (LRU)")
+    parser.add_argument("--llm-cache-ttl-hours", type=float, default=168,
+                        help="Tiempo de vida de las respuestas cacheadas")
+    parser.add_argument("--no-llm-cache", action="store_true",
+                        help="Desactivar la caché de respuestas del LLM")
+    return parser.parse_args(argv)
+
+@dataclass
+class DocumentationRuntime:
+    """Recursos compartidos por todos los flujos, devueltos por build_crews"""
+    router: object
+    limiters: list
+    context_budget: object
+    llm_cache: object = None
+    stream_router: object = None
+
+    def report(self):
+        if self.llm_cache:
+            self.llm_cache.report()
+        self.router.report()
+        for limiter in self.limiters:
+            print(f"# Limitador del LLM: {limiter.stats()}")
+        self.context_budget.report()
+
+def build_crews(options, metrics=None):
+    """Crea los LLM, los crews y el embedder y los deja en documentation_flow.
+
+    options tiene los campos de parse_args. Se llama una vez por proceso (los
+    listeners se registran en el bus de eventos global); después cada petición
+    puede esperar make_flow(url, options, docs_dir).kickoff_async() en el mismo
+    bucle de eventos. Si se quiere langtrace, init_tracing() debe ir antes.
+    """
+    import yaml
+    from crewai import Agent, Task, Crew, LLM
+    import documentation_flow
+    import rate_limit
+    from code_search import CodeSearchTool, HashingEmbedder, OpenAIEmbedder
+    from context_budget import ContextBudget, PagedFileReadTool
+    from doc_index import DocsIndexTool
+    from doc_streaming import DocStreamRouter, TokenRateDisplay
+    from documentation_flow import DocPlan
+    from llm_cache import LLMResponseCache
+    from mermaid_reference import MermaidReferenceIndex, MermaidReferenceTool
+    from mermaid_validator import mermaid_guardrail
+    from model_router import ModelRouter, load_tiers, pop_routing
+    from repo_index import RepositoryIndexTool
 
     # Cargar configuraciones
     with open('config/planner_agents.yaml', 'r') as f:
@@ -170,38 +172,96 @@ def main():
         documentation_tasks_config = yaml.safe_load(f)
 
     # Configurar agentes y tareas
-    global planning_crew, documentation_crew
+    stream_router = None
 
     # Templates para Llama 3.3
     system_template = """<|begin_of_text|><|start_header_id|>system<|end_header_id|>{{ .System }}<|eot_id|>"""
     prompt_template = """<|start_header_id|>user<|end_header_id|>{{ .Prompt }}<|eot_id|>"""
     response_template = """<|start_header_id|>assistant<|end_header_id|>{{ .Response }}<|eot_id|>"""
 
-    # Configurar el LLM base para todos los agentes
-    llm = LLM(
-        model="gpt-3.5-turbo",
-        api_key=os.environ.get("OPENAI_API_KEY"),
-        temperature=0.7,
-        max_tokens=4096
+    if options.stream:
+        stream_router = DocStreamRouter(display=TokenRateDisplay()).register()
+
+    # Cuenta los tokens de cada paso y resume salidas antiguas cerca del límite
+    context_budget = ContextBudget(context_tokens=options.context_tokens).register()
+
+    # Caché de respuestas compartida por todos los modelos (la clave incluye el modelo)
+    llm_cache = None
+    if not options.no_llm_cache:
+        llm_cache = LLMResponseCache(
+            path=options.llm_cache,
+            max_bytes=options.llm_cache_max_mb * 1024 * 1024,
+            ttl_seconds=options.llm_cache_ttl_hours * 3600
+        )
+        if metrics:
+            metrics.watch_cache(llm_cache)
+
+    # Un LLM por nivel de modelo (config/llm_tiers.yaml), compartido por todos los crews y repositorios
+    limiters = []
+
+    def build_llm(tier):
+        llm = LLM(
+            model=tier["model"],
+            api_key=os.environ.get(tier["api_key_env"]) if tier.get("api_key_env") else None,
+            base_url=tier.get("base_url"),
+            temperature=tier.get("temperature", 0.7),
+            max_tokens=tier.get("max_tokens", 4096),
+            stream=options.stream
+        )
+        # Límite de peticiones y tokens por proveedor; los 429/5xx los reintenta el limitador,
+        # no el cliente. Se aplica antes que la caché para que los aciertos no consuman cupo.
+        limiter = rate_limit.shared_limiter(
+            llm.provider,
+            requests_per_minute=options.rpm or None,
+            tokens_per_minute=options.tpm or None,
+            max_concurrency=options.llm_max_concurrency
+        )
+        limiter.wrap(llm)
+        if limiter not in limiters:
+            limiters.append(limiter)
+        if llm_cache:
+            llm_cache.wrap(llm)
+        return llm
+
+    router = ModelRouter(load_tiers(options.llm_tiers), build_llm, single_tier=options.single_model)
+
+    def routed(agent_config):
+        # La clave llm: del YAML del agente elige su nivel de modelo
+        config, tier, steps = pop_routing(agent_config)
+        return config, router.for_agent(tier, steps)
+
+    # Embedder compartido por los índices de búsqueda de código de cada repositorio
+    if options.code_search_embedder == "hashing":
+        embedder = HashingEmbedder()
+    else:
+        embedder = OpenAIEmbedder(model="text-embedding-3-small", api_key=os.environ.get("OPENAI_API_KEY"))
+
+    # Referencia de mermaid: se embebe una vez y después se carga del disco
+    mermaid_index = MermaidReferenceIndex(embedder).load(
+        source=options.mermaid_source,
+        refresh=options.refresh_mermaid_index
     )
+    print(f"# Referencia de mermaid: {mermaid_index.summary()}")
 
     # Crear los agentes para planning_crew
+    explorer_config, explorer_llm = routed(planner_agents_config['code_explorer'])
     code_explorer = Agent(
-        config=planner_agents_config['code_explorer'],
+        config=explorer_config,
         system_template=system_template,
         prompt_template=prompt_template,
         response_template=response_template,
-        tools=[DirectoryReadTool(), FileReadTool()],
-        llm=llm  # Usar la instancia de LLM configurada
+        tools=[RepositoryIndexTool(), CodeSearchTool()],
+        llm=explorer_llm
     )
     
+    planner_config, planner_llm = routed(planner_agents_config['documentation_planner'])
     documentation_planner = Agent(
-        config=planner_agents_config['documentation_planner'],
+        config=planner_config,
         system_template=system_template,
         prompt_template=prompt_template,
         response_template=response_template,
-        tools=[DirectoryReadTool(), FileReadTool()],
-        llm=llm  # Usar la misma instancia de LLM
+        tools=[RepositoryIndexTool(), CodeSearchTool()],
+        llm=planner_llm
     )
 
     # Crear las tareas para planning_crew
@@ -218,39 +278,39 @@ def main():
 
     # Inicializar planning_crew
     planning_crew = Crew(
+        name="planning_crew",
         agents=[code_explorer, documentation_planner],
         tasks=[analyze_codebase, create_documentation_plan],
         verbose=False
     )
 
+    # Repositorios grandes: el planificador parte del mapa resumido, sin code_explorer
+    summary_planning_crew = Crew(
+        name="summary_planning_crew",
+        agents=[documentation_planner],
+        tasks=[create_documentation_plan],
+        verbose=False
+    )
+
     # Crear los agentes para documentation_crew
+    writer_config, writer_llm = routed(documentation_agents_config['overview_writer'])
     overview_writer = Agent(
-        config=documentation_agents_config['overview_writer'],
-        llm=llm,  # Añadir el LLM aquí también
+        config=writer_config,
+        llm=writer_llm,
         tools=[
-            DirectoryReadTool(),
-            FileReadTool(),
-            WebsiteSearchTool(
-                website="https://mermaid.js.org/intro/",
-                config=dict(
-                    embedder=dict(
-                        provider="openai",
-                        config=dict(
-                            model="text-embedding-3-small",
-                            api_key=os.environ.get("OPENAI_API_KEY")
-                        )
-                    )
-                )
-            )
+            RepositoryIndexTool(),
+            CodeSearchTool(),
+            MermaidReferenceTool(index=mermaid_index)
         ]
     )
 
+    reviewer_config, reviewer_llm = routed(documentation_agents_config['documentation_reviewer'])
     documentation_reviewer = Agent(
-        config=documentation_agents_config['documentation_reviewer'],
-        llm=llm,  # Añadir el LLM aquí también
+        config=reviewer_config,
+        llm=reviewer_llm,
         tools=[
-            DirectoryReadTool(directory="docs/", name="Check existing documentation folder"),
-            FileReadTool()
+            DocsIndexTool(),
+            PagedFileReadTool()
         ]
     )
 
@@ -263,27 +323,61 @@ def main():
     qa_review_documentation = Task(
         config=documentation_tasks_config['qa_review_documentation'],
         agent=documentation_reviewer,
-        guardrail=check_mermaid_syntax,
+        guardrail=mermaid_guardrail,  # Repara los diagramas; solo reintenta si no tienen arreglo
         max_retries=5
     )
 
     # Inicializar documentation_crew
     documentation_crew = Crew(
+        name="documentation_crew",
         agents=[overview_writer, documentation_reviewer],
         tasks=[draft_documentation, qa_review_documentation],
         verbose=False
     )
 
-    # Configurar y ejecutar el flujo
-    project_url = "https://github.com/crewAIInc/nvidia-demo"  # URL por defecto
-    if len(sys.argv) > 1:
-        project_url = sys.argv[1]
+    # Los flujos leen los crews y el embedder compartidos de documentation_flow
+    documentation_flow.planning_crew = planning_crew
+    documentation_flow.documentation_crew = documentation_crew
+    documentation_flow.embedder = embedder
+    documentation_flow.stream_router = stream_router
+    documentation_flow.summary_planning_crew = summary_planning_crew
+    documentation_flow.summary_llm = router.for_agent(options.summary_tier)
 
-    flow = CreateDocumentationFlow()
-    if project_url != flow.state.project_url:
-        flow.state.project_url = project_url
-    
-    flow.kickoff()
+    return DocumentationRuntime(router=router, limiters=limiters, context_budget=context_budget,
+                                llm_cache=llm_cache, stream_router=stream_router)
+
+def main():
+    args = parse_args()
+
+    # Dependencias pesadas: solo cuando se va a generar documentación
+    init_tracing()
+    from documentation_flow import make_flow, run_batch
+    from run_metrics import RunMetrics
+
+    metrics = None if args.no_metrics else RunMetrics(args.trace).register()
+
+    # Verificar API key
+    if not os.environ.get("NVIDIA_NIM_API_KEY", "").startswith("nvapi-"):
+        nvapi_key = getpass.getpass("Ingrese su NVIDIA API key: ")
+        assert nvapi_key.startswith("nvapi-"), f"{nvapi_key[:5]}... no es una clave válida"
+        os.environ["NVIDIA_NIM_API_KEY"] = nvapi_key
+        os.environ["NVIDIA_API_KEY"] = nvapi_key
+        os.environ["OPENAI_API_KEY"] = nvapi_key
+
+    runtime = build_crews(args, metrics=metrics)
+
+    # Configurar y ejecutar el flujo (uno por repositorio en modo batch)
+    urls = list(args.project_urls)
+    if args.batch:
+        urls += read_batch_file(args.batch)
+    if args.batch or len(urls) > 1:
+        asyncio.run(run_batch(urls, args))
+    else:
+        asyncio.run(make_flow(urls[0] if urls else None, args).kickoff_async())
+    runtime.report()
+    if metrics:
+        metrics.report()
+        metrics.close()
 
 if __name__ == "__main__":
     warnings.filterwarnings("ignore", category=DeprecationWarning)
@@ -0,0 +1,287 @@
+"""Búsqueda semántica de código sobre un índice vectorial local.
+
+Los archivos de texto del repositorio se dividen en bloques de líneas y se
+embeben por lotes. Los vectores de cada archivo se guardan en
+.cache/code_search/<repo>/files/<clave>.npz, direccionados por su sha256, así
+que después de un cambio en el repositorio solo se embeben los archivos que
+cambiaron; los vectores de versiones anteriores se borran. Para buscar se
+unen en una matriz NumPy mapeada en memoria (.npy) y cada consulta devuelve
+los k bloques más similares (producto escalar exacto sobre vectores
+normalizados), de modo que los agentes leen solo los fragmentos relevantes.
+
+El embedder es intercambiable: cualquier objeto con un atributo ``name`` y un
+método ``embed(texts) -> np.ndarray``. HashingEmbedder es determinista y no
+necesita red, útil para pruebas.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Optional, Type
+
+import numpy as np
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from doc_manifest import hash_file, hash_repo
+from doc_streaming import write_doc
+from repo_index import CHUNK_LINES
+
+DEFAULT_INDEX_DIR = Path(".cache/code_search")
+MAX_CHUNK_CHARS = 4000  # Recorte del texto enviado al embedder
+TOKEN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+
+
+class HashingEmbedder:
+    """Embedder local y determinista basado en feature hashing de tokens"""
+
+    def __init__(self, dim=512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _tokens(self, text):
+        for token in TOKEN_RE.findall(text):
+            yield token.lower()
+            # Dividir identificadores snake_case y camelCase
+            for part in re.split(r"_|(?<=[a-z])(?=[A-Z])", token):
+                if part and part != token:
+                    yield part.lower()
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in self._tokens(text):
+                digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                sign = 1.0 if digest[4] & 1 else -1.0
+                vectors[row, bucket] += sign
+        return vectors
+
+
+class OpenAIEmbedder:
+    """Embedder para endpoints compatibles con OpenAI (OpenAI, NVIDIA NIM...)"""
+
+    def __init__(self, model="text-embedding-3-small", api_key=None, base_url=None, batch_size=64):
+        from openai import OpenAI
+
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        self.model = model
+        self.batch_size = batch_size
+        self.name = model
+
+    def embed(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            response = self.client.embeddings.create(model=self.model, input=batch)
+            vectors += [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def embed_to_memmap(texts, embedder, vectors_path, batch_size=64):
+    """Embebe texts por lotes y escribe los vectores normalizados en un .npy"""
+    if not texts:
+        np.save(vectors_path, np.zeros((0, 1), dtype=np.float32))
+        return
+    matrix = None
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        embedded = normalize(embedder.embed(batch))
+        if matrix is None:
+            matrix = np.lib.format.open_memmap(
+                vectors_path, mode="w+", dtype=np.float32, shape=(len(texts), embedded.shape[1])
+            )
+        matrix[start:start + len(batch)] = embedded
+    matrix.flush()
+    del matrix
+
+
+def nearest(vectors, query_vector, k):
+    """Índices y scores de los k vectores más similares, en orden descendente"""
+    scores = vectors @ query_vector
+    k = min(k, len(scores))
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best])]
+    return best, scores[best]
+
+
+class CodeSearchIndex:
+    def __init__(self, embedder, index_dir=DEFAULT_INDEX_DIR, batch_size=64):
+        self.embedder = embedder
+        self.index_dir = Path(index_dir)
+        self.batch_size = batch_size
+        self.chunks = []
+        self.vectors = None
+        self.root = None
+        self._lock = threading.Lock()
+
+    def _repo_dir(self, repo_path):
+        # El nombre solo no basta: los checkouts de org-a/api y org-b/api se llaman igual
+        resolved = str(Path(repo_path).resolve())
+        return self.index_dir / f"{Path(repo_path).name}-{hashlib.sha256(resolved.encode()).hexdigest()[:12]}"
+
+    def _file_key(self, sha):
+        """Clave de los vectores de un archivo: su contenido y la forma de dividirlo y embeberlo"""
+        return hashlib.sha256(
+            f"{self.embedder.name}\n{CHUNK_LINES}\n{MAX_CHUNK_CHARS}\n{sha}".encode()
+        ).hexdigest()[:32]
+
+    @staticmethod
+    def _file_chunks(root, entry):
+        """(líneas inicial y final, texto) de cada bloque no vacío de un archivo"""
+        lines = (root / entry.path).read_text(errors="replace").split("\n")
+        ranges, texts = [], []
+        for start in range(0, entry.lines, CHUNK_LINES):
+            text = "\n".join(lines[start:start + CHUNK_LINES])
+            if text.strip():
+                ranges.append((start + 1, min(start + CHUNK_LINES, entry.lines)))
+                texts.append(text[:MAX_CHUNK_CHARS])
+        return ranges, texts
+
+    def _embed_files(self, pending, files_dir):
+        """Embebe por lotes los bloques de los archivos pendientes y guarda un .npz por archivo"""
+        batch, size = [], 0
+
+        def flush():
+            texts = [text for _, _, file_texts in batch for text in file_texts]
+            vectors = normalize(self.embedder.embed(texts)) if texts else np.zeros((0, 0), dtype=np.float32)
+            offset = 0
+            for key, ranges, file_texts in batch:
+                tmp = files_dir / f"{key}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    np.savez(f, ranges=np.asarray(ranges, dtype=np.int64).reshape(-1, 2),
+                             vectors=vectors[offset:offset + len(file_texts)])
+                os.replace(tmp, files_dir / f"{key}.npz")
+                offset += len(file_texts)
+            batch.clear()
+
+        for key, (ranges, texts) in pending.items():
+            batch.append((key, ranges, texts))
+            size += len(texts)
+            if size >= self.batch_size:
+                flush()
+                size = 0
+        if batch:
+            flush()
+
+    def build(self, repo_path, repo_index, file_hashes=None):
+        """Carga el índice del disco o lo actualiza si el repositorio cambió.
+
+        Los vectores se guardan por archivo, direccionados por su sha256: un
+        cambio en el repositorio solo vuelve a embeber los archivos que
+        cambiaron. file_hashes ({ruta: sha256}, de hash_repo) evita volver a
+        leer el repositorio.
+        """
+        root = Path(repo_path)
+        if file_hashes is None:
+            file_hashes = hash_repo(root)
+        entries = [e for e in repo_index.files.values() if e.language not in ("binary", "other") and e.lines]
+        keys = {e.path: self._file_key(file_hashes.get(e.path) or hash_file(root / e.path)) for e in entries}
+        fingerprint = hashlib.sha256(json.dumps(keys, sort_keys=True).encode()).hexdigest()[:16]
+
+        target = self._repo_dir(root)
+        files_dir = target / "files"
+        vectors_path, chunks_path, meta_path = target / "vectors.npy", target / "chunks.json", target / "index.json"
+        meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+        if meta.get("fingerprint") != fingerprint or not (vectors_path.exists() and chunks_path.exists()):
+            files_dir.mkdir(parents=True, exist_ok=True)
+            pending = {}
+            for entry in entries:
+                key = keys[entry.path]
+                if key not in pending and not (files_dir / f"{key}.npz").exists():
+                    pending[key] = self._file_chunks(root, entry)
+            if pending:
+                print(f"# Búsqueda de código: embebiendo {len(pending)} de {len(entries)} archivos")
+            self._embed_files(pending, files_dir)
+            self._assemble(entries, keys, files_dir, vectors_path, chunks_path)
+            write_doc(meta_path, json.dumps({"fingerprint": fingerprint}))
+            # Vectores de versiones de archivos que ya no están en el checkout
+            used = {f"{key}.npz" for key in keys.values()}
+            for path in files_dir.glob("*.npz"):
+                if path.name not in used:
+                    path.unlink(missing_ok=True)
+
+        with self._lock:
+            with open(chunks_path) as f:
+                self.chunks = json.load(f)
+            self.vectors = np.load(vectors_path, mmap_mode="r")
+            self.root = root
+        return self
+
+    @staticmethod
+    def _assemble(entries, keys, files_dir, vectors_path, chunks_path):
+        """Une los vectores por archivo en la matriz .npy (mapeada en memoria) que usa search"""
+        parts, chunks, dim = [], [], 1
+        for entry in entries:
+            with np.load(files_dir / f"{keys[entry.path]}.npz") as data:
+                ranges = data["ranges"]
+                if len(ranges):
+                    dim = data["vectors"].shape[1]
+            parts.append((keys[entry.path], ranges))
+            chunks += [{"path": entry.path, "start_line": int(a), "end_line": int(b)} for a, b in ranges]
+        tmp = vectors_path.with_name(f"vectors.{os.getpid()}.tmp.npy")
+        matrix = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(len(chunks), dim))
+        row = 0
+        for key, ranges in parts:
+            if len(ranges):
+                with np.load(files_dir / f"{key}.npz") as data:
+                    matrix[row:row + len(ranges)] = data["vectors"]
+                row += len(ranges)
+        matrix.flush()
+        del matrix
+        os.replace(tmp, vectors_path)
+        write_doc(chunks_path, json.dumps(chunks))
+
+    def search(self, query, top_k=5):
+        """Los top_k bloques más similares como (score, chunk)"""
+        if self.vectors is None or not self.chunks:
+            return []
+        query_vector = normalize(self.embedder.embed([query]))[0]
+        best, scores = nearest(self.vectors, query_vector, top_k)
+        return [(float(score), self.chunks[i]) for i, score in zip(best, scores)]
+
+    def snippet(self, chunk):
+        lines = (self.root / chunk["path"]).read_text(errors="replace").split("\n")
+        start = chunk["start_line"]
+        return "\n".join(f"{start + i:>5} | {line}" for i, line in enumerate(lines[start - 1:chunk["end_line"]]))
+
+    def summary(self):
+        dims = self.vectors.shape[1] if self.vectors is not None else 0
+        return f"{len(self.chunks)} bloques, {dims} dimensiones ({self.embedder.name})"
+
+
+class CodeSearchToolInput(BaseModel):
+    """Input schema for CodeSearchTool."""
+    query: str = Field(..., description="Natural language or code query describing what you are looking for.")
+    top_k: int = Field(5, description="Number of snippets to return (max 10).")
+
+
+class CodeSearchTool(BaseTool):
+    name: str = "Search repository code"
+    description: str = (
+        "Semantic search over the source code of the repository being documented. "
+        "Returns the most relevant code snippets with their file path and line numbers, "
+        "so you don't need to read whole files."
+    )
+    args_schema: Type[BaseModel] = CodeSearchToolInput
+    index: Optional[CodeSearchIndex] = Field(None, exclude=True)
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _run(self, query: str, top_k: int = 5) -> str:
+        results = self.index.search(query, max(1, min(top_k, 10))) if self.index else []
+        if not results:
+            return "The code search index is empty or has not been built yet."
+        return "\n\n".join(
+            f"{chunk['path']}:{chunk['start_line']}-{chunk['end_line']} (score {score:.2f})\n{self.index.snippet(chunk)}"
+            for score, chunk in results
+        )
@@ -0,0 +1,212 @@
+"""Presupuesto de contexto para los agentes y lectura paginada de archivos.
+
+ContextBudget se registra como hook before_llm_call de crewAI: cuenta los
+tokens de los mensajes en cada paso de cada agente y, cuando se acercan al
+límite del modelo (ventana de contexto menos max_tokens), resume las salidas
+de herramientas más antiguas dejando su comienzo y su final. Así el agente
+no desborda el contexto ni el proveedor trunca el prompt, que era lo que
+provocaba reintentos caros.
+
+PagedFileReadTool sustituye a FileReadTool: los archivos pequeños se
+devuelven enteros y los grandes en páginas de líneas completas, ordenadas
+por relevancia respecto a la consulta del agente.
+"""
+
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from code_search import TOKEN_RE
+
+PAGE_TOKENS = 1500  # Tamaño de página de PagedFileReadTool
+SUMMARY_LINES = 6  # Líneas conservadas al principio y al final de una salida resumida
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # Sin tiktoken o sin acceso a su archivo BPE: se usa la aproximación por caracteres
+        return None
+
+
+def count_tokens(text):
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def summarize_output(text, keep_lines=SUMMARY_LINES):
+    """Resumen extractivo de una salida de herramienta: primeras y últimas líneas"""
+    lines = text.split("\n")
+    if len(lines) <= 2 * keep_lines + 1:
+        return text
+    omitted = lines[keep_lines:-keep_lines]
+    note = (f"[... {len(omitted)} lines (~{count_tokens(chr(10).join(omitted))} tokens) of an older "
+            f"tool output were summarised to save context; call the tool again if you need them ...]")
+    return "\n".join(lines[:keep_lines] + [note] + lines[-keep_lines:])
+
+
+class ContextBudget:
+    def __init__(self, context_tokens=None, threshold=0.8, keep_recent=2):
+        """
+        Args:
+            context_tokens: Tokens de prompt disponibles; por defecto, la ventana del
+                modelo menos su max_tokens.
+            threshold: Fracción del presupuesto a partir de la cual se resumen salidas.
+            keep_recent: Salidas de herramientas más recientes que nunca se resumen.
+        """
+        self.context_tokens = context_tokens
+        self.threshold = threshold
+        self.keep_recent = keep_recent
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def register(self):
+        from crewai.hooks import register_before_llm_call_hook
+
+        register_before_llm_call_hook(self.before_llm_call)
+        return self
+
+    def budget(self, llm):
+        if self.context_tokens:
+            return self.context_tokens
+        window = llm.get_context_window_size() if hasattr(llm, "get_context_window_size") else 16385
+        return max(1024, window - (getattr(llm, "max_tokens", None) or 0))
+
+    def _tool_outputs(self, messages):
+        """Índices de los mensajes con salidas de herramientas, del más antiguo al más reciente"""
+        return [
+            i for i, message in enumerate(messages)
+            if isinstance(message.get("content"), str) and (
+                message.get("role") == "tool"
+                or (message.get("role") == "assistant" and "\nObservation:" in message["content"])
+            )
+        ]
+
+    def _compact(self, message):
+        content = message["content"]
+        if message.get("role") == "tool":
+            return summarize_output(content)
+        # Formato ReAct: la salida de la herramienta va tras "Observation:"
+        head, observation = content.split("\nObservation:", 1)
+        return f"{head}\nObservation: {summarize_output(observation.strip())}"
+
+    def before_llm_call(self, context):
+        messages = context.messages
+        limit = self.budget(context.llm) * self.threshold
+        sizes = [count_tokens(m.get("content")) if isinstance(m.get("content"), str) else 0 for m in messages]
+        total = before = sum(sizes)
+        compacted = 0
+        candidates = self._tool_outputs(messages)
+        for i in candidates[:max(0, len(candidates) - self.keep_recent)]:
+            if total <= limit:
+                break
+            content = self._compact(messages[i])
+            if content == messages[i]["content"]:
+                continue
+            messages[i]["content"] = content
+            new_size = count_tokens(content)
+            total -= sizes[i] - new_size
+            sizes[i] = new_size
+            compacted += 1
+
+        role = getattr(context.agent, "role", None) or "llm"
+        with self._lock:
+            row = self.stats.setdefault(role, {"steps": 0, "max_tokens": 0, "tokens": 0, "compacted": 0, "saved": 0})
+            row["steps"] += 1
+            row["tokens"] += total
+            row["max_tokens"] = max(row["max_tokens"], total)
+            row["compacted"] += compacted
+            row["saved"] += before - total
+        return None
+
+    def report(self):
+        with self._lock:
+            rows = dict(self.stats)
+        if not rows:
+            return
+        print("\n# Presupuesto de contexto por agente")
+        for role, row in rows.items():
+            print(f"    - {role.strip()}: {row['steps']} pasos, {row['tokens'] // row['steps']} tokens de media, "
+                  f"máximo {row['max_tokens']}, {row['compacted']} salidas resumidas ({row['saved']} tokens ahorrados)")
+
+
+@lru_cache(maxsize=64)
+def _pages(path, mtime, size, page_tokens):
+    """Páginas (línea inicial, línea final, texto) de líneas completas de ~page_tokens"""
+    lines = Path(path).read_text(errors="replace").split("\n")
+    pages, start, tokens = [], 0, 0
+    for i, line in enumerate(lines):
+        line_tokens = count_tokens(line) + 1
+        if tokens and tokens + line_tokens > page_tokens:
+            pages.append((start + 1, i, "\n".join(lines[start:i])))
+            start, tokens = i, 0
+        tokens += line_tokens
+    pages.append((start + 1, len(lines), "\n".join(lines[start:])))
+    return pages
+
+
+def _rank(pages, query):
+    """Orden de las páginas por número de apariciones de los términos de la consulta"""
+    terms = {t.lower() for t in TOKEN_RE.findall(query or "")}
+    if not terms:
+        return list(range(len(pages)))
+    scores = []
+    for i, (_, _, text) in enumerate(pages):
+        words = [w.lower() for w in TOKEN_RE.findall(text)]
+        scores.append(sum(1 for w in words if w in terms))
+    return sorted(range(len(pages)), key=lambda i: (-scores[i], i))
+
+
+def _numbered(start, text):
+    return "\n".join(f"{start + i:>5} | {line}" for i, line in enumerate(text.split("\n")))
+
+
+class PagedFileReadToolInput(BaseModel):
+    """Input schema for PagedFileReadTool."""
+    file_path: str = Field(..., description="Path of the file to read.")
+    query: Optional[str] = Field(None, description="What you are looking for; used to pick the most relevant page of large files.")
+    page: Optional[int] = Field(None, description="Page number to read (1-based) when the file is split into pages.")
+
+
+class PagedFileReadTool(BaseTool):
+    name: str = "Read a file's content"
+    description: str = (
+        "Read the content of a file. Small files are returned whole. Large files are split into "
+        "pages of whole lines: pass a query to get the most relevant page first, or a page number "
+        "to read a specific page. The answer lists the other pages, ranked by relevance."
+    )
+    args_schema: Type[BaseModel] = PagedFileReadToolInput
+    page_tokens: int = PAGE_TOKENS
+
+    def _run(self, file_path: str, query: Optional[str] = None, page: Optional[int] = None) -> str:
+        path = Path(file_path)
+        if not path.is_file():
+            return f"Error: file not found: {file_path}"
+        stat = path.stat()
+        pages = _pages(str(path.resolve()), stat.st_mtime, stat.st_size, self.page_tokens)
+        if len(pages) == 1:
+            return pages[0][2]
+
+        ranked = _rank(pages, query)
+        current = page - 1 if page and 1 <= page <= len(pages) else ranked[0]
+        start, end, text = pages[current]
+        others = ", ".join(
+            f"{i + 1} (lines {pages[i][0]}-{pages[i][1]})" for i in ranked if i != current
+        )
+        order = "ranked by relevance to the query" if query else "in file order"
+        return (
+            f"{file_path}: page {current + 1} of {len(pages)}, lines {start}-{end}\n"
+            f"{_numbered(start, text)}\n\n"
+            f"Other pages ({order}): {others}"
+        )
@@ -0,0 +1,286 @@
+"""Índice de los documentos ya generados para la revisión de consistencia.
+
+documentation_reviewer tenía que releer con DirectoryReadTool todos los .mdx
+existentes en cada revisión, así que el coste de revisar crecía con el
+cuadrado del número de documentos. DocsIndex mantiene, por documento:
+
+- un resumen (el primer párrafo, recortado),
+- los títulos de sección,
+- un glosario de nombres de componentes (código en línea e identificadores
+  CamelCase) y
+- firmas MinHash de los shingles de palabras de cada sección, para detectar
+  contenido casi duplicado.
+
+create_docs lo actualiza al escribir cada documento y se guarda en
+<docs>/doc_index.json; al cargarlo solo se reindexan los archivos que
+cambiaron. El revisor lo consulta con DocsIndexTool y recibe respuestas de
+tamaño acotado en lugar de documentos completos.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Optional, Type
+
+import numpy as np
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from context_budget import count_tokens
+from doc_streaming import write_doc
+
+DOC_INDEX_NAME = "doc_index.json"
+INDEX_VERSION = 2  # Cambiarlo (o cambiar las funciones del MinHash) reindexa todos los documentos
+DOC_SUFFIXES = (".mdx", ".md")
+SHINGLE_WORDS = 5
+NUM_HASHES = 64
+SUMMARY_WORDS = 40
+OVERVIEW_TOKENS = 1500  # Tamaño máximo de la respuesta de action='overview'
+DUPLICATE_THRESHOLD = 0.3  # Jaccard estimado a partir del cual se informa de un posible duplicado
+MAX_RESULTS = 10
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+INLINE_CODE_RE = re.compile(r"`([^`\n]+)`")
+IDENTIFIER_RE = re.compile(r"^[A-Za-z_][\w.]*(\(\))?$")
+CAMEL_RE = re.compile(r"\b[A-Z][a-z0-9]+(?:[A-Z][a-z0-9]*)+\b")
+WORD_RE = re.compile(r"\w+")
+
+# Coeficientes fijos de las funciones hash (a * x + b) mod P del MinHash. Con a, b < 2**31
+# y x < 2**32, a * x + b < 2**64: el producto no desborda el uint64 antes del módulo
+_PRIME = (1 << 61) - 1
+_HASH_MASK = (1 << 32) - 1
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, 1 << 31, NUM_HASHES, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 31, NUM_HASHES, dtype=np.uint64)
+
+
+def minhash(text):
+    """Firma MinHash de los shingles de SHINGLE_WORDS palabras de text"""
+    words = WORD_RE.findall(text.lower())
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1))}
+    hashes = np.fromiter((zlib.crc32(s.encode()) & _HASH_MASK for s in shingles), dtype=np.uint64, count=len(shingles))
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def similarity(a, b):
+    """Jaccard estimado entre dos firmas MinHash"""
+    return float(np.mean(np.asarray(a) == np.asarray(b)))
+
+
+def split_sections(text):
+    """[(título, texto)] de un documento Markdown, ignorando '#' dentro de bloques de código"""
+    sections, heading, lines, fenced = [], "", [], False
+    for line in text.splitlines():
+        if FENCE_RE.match(line):
+            fenced = not fenced
+        match = None if fenced else HEADING_RE.match(line)
+        if match:
+            if heading or "".join(lines).strip():
+                sections.append((heading, "\n".join(lines)))
+            heading, lines = match.group(2), []
+        else:
+            lines.append(line)
+    sections.append((heading, "\n".join(lines)))
+    return sections
+
+
+def _summary(sections):
+    for _, body in sections:
+        fenced = False
+        paragraph = []
+        for line in body.splitlines():
+            if FENCE_RE.match(line):
+                fenced = not fenced
+                continue
+            if fenced or not line.strip():
+                if paragraph:
+                    break
+                continue
+            paragraph.append(line.strip())
+        if paragraph:
+            words = " ".join(paragraph).split()
+            return " ".join(words[:SUMMARY_WORDS]) + (" ..." if len(words) > SUMMARY_WORDS else "")
+    return ""
+
+
+def _glossary(text):
+    terms = {match.rstrip("()") for match in INLINE_CODE_RE.findall(text) if IDENTIFIER_RE.match(match)}
+    return sorted(terms | set(CAMEL_RE.findall(text)))
+
+
+class DocsIndex:
+    def __init__(self, docs_dir):
+        self.docs_dir = Path(docs_dir)
+        self.path = self.docs_dir / DOC_INDEX_NAME
+        self.docs = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Carga el índice guardado y reindexa los documentos nuevos o modificados"""
+        if self.path.exists():
+            with open(self.path) as f:
+                self.docs = json.load(f)
+        present = {p.name: p for p in sorted(self.docs_dir.glob("*")) if p.suffix in DOC_SUFFIXES}
+        for name in list(self.docs):
+            if name not in present:
+                del self.docs[name]
+        changed = False
+        for name, path in present.items():
+            text = path.read_text(errors="replace")
+            known = self.docs.get(name, {})
+            if known.get("version") != INDEX_VERSION or known.get("sha256") != hashlib.sha256(text.encode()).hexdigest():
+                self._add(path, text)
+                changed = True
+        if changed:
+            self.save()
+        return self
+
+    def _add(self, path, text, title=None):
+        sections = split_sections(text)
+        headings = [heading for heading, _ in sections if heading]
+        entry = {
+            "version": INDEX_VERSION,
+            "title": title or (headings[0] if headings else Path(path).stem),
+            "sha256": hashlib.sha256(text.encode()).hexdigest(),
+            "summary": _summary(sections),
+            "headings": headings,
+            "glossary": _glossary(text),
+            "sections": [
+                {"heading": heading, "minhash": minhash(f"{heading}\n{body}").tolist()}
+                for heading, body in sections if body.strip()
+            ],
+        }
+        with self._lock:
+            self.docs[Path(path).name] = entry
+
+    def update(self, path, text, title=None):
+        """Indexa (o reindexa) un documento recién escrito y guarda el índice"""
+        self._add(path, text, title)
+        self.save()
+
+    def save(self):
+        # Bajo el lock: write_doc usa siempre el mismo archivo temporal
+        with self._lock:
+            write_doc(self.path, json.dumps(self.docs))
+
+    # --- consultas del revisor ---
+
+    def overview(self, budget=OVERVIEW_TOKENS):
+        """Títulos, resúmenes y secciones de los documentos, dentro de budget tokens"""
+        with self._lock:
+            docs = list(self.docs.items())
+        if not docs:
+            return "No documents have been written yet."
+        for detail in ("headings", "summary", "title"):
+            lines = []
+            for name, doc in docs:
+                lines.append(f"- {doc['title']} ({name})" + (f": {doc['summary']}" if detail != "title" else ""))
+                if detail == "headings" and doc["headings"]:
+                    lines.append(f"  Sections: {'; '.join(doc['headings'])}")
+            text = "\n".join(lines)
+            if count_tokens(text) <= budget:
+                return text
+        # Ni siquiera caben los títulos: los primeros que quepan
+        lines, used = [], 0
+        for n, (name, doc) in enumerate(docs):
+            line = f"- {doc['title']} ({name})"
+            used += count_tokens(line)
+            if used > budget:
+                lines.append(f"... and {len(docs) - n} more documents; use action='search' to find them.")
+                break
+            lines.append(line)
+        return "\n".join(lines)
+
+    def search(self, query):
+        """Documentos cuyo glosario, título o secciones mencionan query"""
+        query = query.strip().lower()
+        with self._lock:
+            docs = list(self.docs.items())
+        results = []
+        for name, doc in docs:
+            terms = [t for t in doc["glossary"] if query in t.lower()]
+            headings = [h for h in doc["headings"] if query in h.lower()]
+            if terms or headings or query in doc["title"].lower():
+                results.append(
+                    f"- {doc['title']} ({name})"
+                    + (f"\n  Terms: {', '.join(terms[:MAX_RESULTS])}" if terms else "")
+                    + (f"\n  Sections: {'; '.join(headings[:MAX_RESULTS])}" if headings else "")
+                )
+        return "\n".join(results[:MAX_RESULTS]) or f"No existing document mentions '{query}'."
+
+    def duplicates(self, text, exclude=None, threshold=DUPLICATE_THRESHOLD):
+        """Secciones de otros documentos casi iguales a text, de mayor a menor similitud"""
+        signature = minhash(text)
+        with self._lock:
+            docs = list(self.docs.items())
+        matches = []
+        for name, doc in docs:
+            if name == exclude:
+                continue
+            for section in doc["sections"]:
+                score = similarity(signature, section["minhash"])
+                if score >= threshold:
+                    matches.append((score, doc["title"], name, section["heading"]))
+        matches.sort(reverse=True)
+        return [
+            f"- {score:.0%} similar to '{heading or '(introduction)'}' in {title} ({name})"
+            for score, title, name, heading in matches[:MAX_RESULTS]
+        ]
+
+    def read_section(self, name, heading):
+        path = self.docs_dir / Path(name).name
+        if not path.exists():
+            return f"Document '{name}' does not exist."
+        sections = split_sections(path.read_text(errors="replace"))
+        for section_heading, body in sections:
+            if section_heading.lower() == heading.strip().lower():
+                return f"## {section_heading}\n{body.strip()}"
+        return f"Section '{heading}' not found in {name}. Sections: {'; '.join(h for h, _ in sections if h)}"
+
+    def summary(self):
+        terms = {term for doc in self.docs.values() for term in doc["glossary"]}
+        return f"{len(self.docs)} documentos, {len(terms)} términos en el glosario"
+
+
+class DocsIndexToolInput(BaseModel):
+    """Input schema for DocsIndexTool."""
+    action: str = Field(..., description="One of 'overview', 'search', 'duplicates' or 'read'.")
+    query: str = Field("", description="Component name or topic (for 'search'), or a passage of the draft (for 'duplicates').")
+    document: str = Field("", description="Document file name, e.g. 'getting_started.mdx' (for 'read').")
+    section: str = Field("", description="Section heading to read (for 'read').")
+
+
+class DocsIndexTool(BaseTool):
+    name: str = "Documentation index"
+    description: str = (
+        "Query an index of the documentation already written for this repository, instead of reading every file. "
+        "action='overview' lists each document with its summary and section headings; "
+        "action='search' finds the documents and sections that mention a component or topic; "
+        "action='duplicates' takes a passage of the draft and reports near-duplicate sections in other documents; "
+        "action='read' returns one section of a document. "
+        "Use it to keep terminology consistent and to avoid documenting the same thing twice."
+    )
+    args_schema: Type[BaseModel] = DocsIndexToolInput
+    index: Optional[DocsIndex] = Field(None, exclude=True)
+    current: str = Field("", exclude=True)  # Documento en revisión: no cuenta como duplicado de sí mismo
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _run(self, action: str, query: str = "", document: str = "", section: str = "") -> str:
+        if self.index is None:
+            return "The documentation index is not available."
+        if action == "overview":
+            return self.index.overview()
+        if action == "search":
+            return self.index.search(query) if query.strip() else "Pass the component or topic in 'query'."
+        if action == "duplicates":
+            if len(WORD_RE.findall(query)) < SHINGLE_WORDS:
+                return "Pass a passage of at least a few sentences in 'query'."
+            return "\n".join(self.index.duplicates(query, exclude=self.current)) or "No near-duplicate sections found."
+        if action == "read":
+            return self.index.read_section(document, section)
+        return f"Unknown action '{action}'. Use 'overview', 'search', 'duplicates' or 'read'."
@@ -0,0 +1,91 @@
+"""Manifiesto de hashes del repositorio para la re-documentación incremental.
+
+El manifiesto se guarda junto a docs/plan.json y registra el hash de cada
+archivo del repositorio y qué archivos consumió cada documento generado.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+MANIFEST_NAME = "manifest.json"  # Dentro del directorio de documentación del repo
+IGNORED_DIRS = {".git"}
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """Calcula el sha256 de un archivo leyéndolo por bloques"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_repo(repo_path):
+    """Devuelve {ruta relativa: sha256} para todos los archivos del repositorio"""
+    repo_path = Path(repo_path)
+    files = {}
+    for path in sorted(repo_path.rglob("*")):
+        rel = path.relative_to(repo_path)
+        if rel.parts[0] in IGNORED_DIRS or not path.is_file():
+            continue
+        files[rel.as_posix()] = hash_file(path)
+    return files
+
+
+def load_manifest(path):
+    """Carga el manifiesto; devuelve uno vacío si no existe"""
+    path = Path(path)
+    if not path.exists():
+        return {"files": {}, "docs": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(files, docs, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"files": files, "docs": docs}, f, indent=2, sort_keys=True)
+
+
+def changed_files(old_files, new_files):
+    """Archivos añadidos, modificados o eliminados entre dos snapshots"""
+    changed = {f for f, h in new_files.items() if old_files.get(f) != h}
+    changed.update(f for f in old_files if f not in new_files)
+    return changed
+
+
+def _normalize_source(source, repo_path):
+    # El planificador puede devolver rutas absolutas o prefijadas con repo_path
+    source = str(source).strip()
+    while source.startswith("./"):
+        source = source[2:]
+    prefix = Path(repo_path).as_posix().strip("/") + "/"
+    idx = source.find(prefix)
+    if idx == 0 or (idx > 0 and source[idx - 1] == "/"):
+        source = source[idx + len(prefix):]
+    return source.rstrip("/")
+
+
+def _matches(changed_file, sources):
+    return any(changed_file == s or changed_file.startswith(s + "/") for s in sources)
+
+
+def doc_sources(doc, repo_path):
+    """Rutas (archivos o directorios) del repositorio que consume un documento"""
+    return sorted({_normalize_source(s, repo_path) for s in doc.source_files if s.strip()})
+
+
+def is_stale(doc_path, sources, manifest, changed):
+    """Indica si un documento debe regenerarse.
+
+    Un documento sin fuentes conocidas depende de todo el repositorio.
+    """
+    if str(doc_path) not in manifest["docs"] or not Path(doc_path).exists():
+        return True
+    if not changed:
+        return False
+    if not sources:
+        return True
+    return any(_matches(f, sources) for f in changed)
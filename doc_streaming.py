@@ -0,0 +1,161 @@
+"""Escritura en streaming de los documentos generados por documentation_crew.
+
+Con el LLM en modo stream, crewAI emite un LLMStreamChunkEvent por cada
+fragmento de texto. DocStreamRouter los dirige, según la tarea que los
+originó, al archivo <doc>.mdx.partial del documento correspondiente; cada
+llamada al LLM (iteraciones del agente, reintentos del guardrail, revisión)
+reescribe el parcial desde el principio. Al terminar, write_doc guarda el
+resultado final y renombra el parcial de forma atómica, así nunca queda un
+.mdx a medio escribir; si el documento falla, el parcial se borra.
+"""
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+
+def partial_path(path):
+    path = Path(path)
+    return path.with_name(path.name + ".partial")
+
+
+def write_doc(path, content):
+    """Escribe content en path de forma atómica (vía el archivo .partial)"""
+    tmp = partial_path(path)
+    with open(tmp, "w") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+class TokenRateDisplay:
+    """Indicador en vivo de tokens generados y tokens/s (reemplaza al spinner).
+
+    Cada fragmento de streaming cuenta como un token, que es lo que envían
+    los endpoints compatibles con OpenAI. En modo batch todos los flujos
+    comparten el indicador: start y stop llevan la cuenta de usuarios, la
+    línea muestra el total y solo el último stop la cierra.
+    """
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.tokens = 0
+        self.stop_event = threading.Event()
+        self.display_thread = None
+        self._lock = threading.Lock()
+        self._started = 0.0
+        self._users = 0
+
+    def add(self, tokens=1):
+        with self._lock:
+            self.tokens += tokens
+
+    def _line(self, message):
+        elapsed = max(time.monotonic() - self._started, 1e-6)
+        return f"\r{message}: {self.tokens} tokens, {self.tokens / elapsed:.1f} tok/s"
+
+    def _display(self, message):
+        while not self.stop_event.wait(self.interval):
+            sys.stdout.write(self._line(message))
+            sys.stdout.flush()
+
+    def start(self, message="Generando"):
+        with self._lock:
+            self._users += 1
+            if self._users > 1:
+                return
+            self.tokens = 0
+            self._started = time.monotonic()
+            self.stop_event.clear()
+            self.display_thread = threading.Thread(target=self._display, args=(message,), daemon=True)
+            self.display_thread.start()
+
+    def stop(self, completion_message="Completado"):
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            if self._users:
+                return
+            self.stop_event.set()
+        if self.display_thread:
+            self.display_thread.join()
+        print(self._line(completion_message) + " ✓")
+
+
+class _DocSink:
+    def __init__(self, path):
+        self.path = partial_path(path)
+        self.file = open(self.path, "w")
+        self.call_id = None
+        self._lock = threading.Lock()
+
+    def start_call(self, call_id):
+        """Cada llamada al LLM (iteración ReAct o reintento del guardrail) reemplaza el texto de la anterior"""
+        with self._lock:
+            if call_id == self.call_id or self.file.closed:
+                return
+            self.file.seek(0)
+            self.file.truncate()
+            self.call_id = call_id
+
+    def write(self, call_id, chunk):
+        # Los eventos se despachan en varios hilos: el fragmento puede llegar antes que el inicio de su llamada
+        self.start_call(call_id)
+        with self._lock:
+            if not self.file.closed:
+                self.file.write(chunk)
+                self.file.flush()
+
+    def close(self, discard=False):
+        with self._lock:
+            self.file.close()
+        if discard:
+            self.path.unlink(missing_ok=True)
+
+
+class DocStreamRouter:
+    def __init__(self, display=None):
+        self.display = display
+        self._sinks = {}
+        self._lock = threading.Lock()
+
+    def register(self):
+        """Suscribe el router al bus de eventos de crewAI"""
+        from crewai.events import LLMCallStartedEvent, LLMStreamChunkEvent, crewai_event_bus
+
+        crewai_event_bus.on(LLMCallStartedEvent)(self._on_call_started)
+        crewai_event_bus.on(LLMStreamChunkEvent)(self._on_chunk)
+        return self
+
+    def open(self, path, tasks):
+        """Empieza a volcar en <path>.partial la salida de las tareas dadas"""
+        sink = _DocSink(path)
+        with self._lock:
+            for task in tasks:
+                self._sinks[str(task.id)] = sink
+        return sink
+
+    def close(self, tasks, discard=False):
+        """Deja de volcar la salida de las tareas; con discard borra el .partial (el documento falló)"""
+        with self._lock:
+            sinks = {self._sinks.pop(str(task.id), None) for task in tasks}
+        for sink in sinks - {None}:
+            sink.close(discard)
+
+    def _on_call_started(self, source, event):
+        with self._lock:
+            sink = self._sinks.get(event.task_id)
+        if sink is not None:
+            sink.start_call(event.call_id)
+
+    def _on_chunk(self, source, event):
+        # Los fragmentos de llamadas a herramientas no forman parte del documento
+        if event.tool_call is not None:
+            return
+        with self._lock:
+            sink = self._sinks.get(event.task_id)
+        if sink is None:
+            return
+        sink.write(event.call_id, event.chunk)
+        if self.display:
+            self.display.add()
@@ -0,0 +1,140 @@
+"""Índice invertido de los documentos generados para buscar desde review_docs.py.
+
+El índice (término -> {documento: frecuencia}) se guarda en
+<docs>/search_index.json junto con el mtime y el tamaño de cada documento.
+Al abrirlo solo se reindexan los archivos nuevos o modificados y se quitan
+los borrados, así que abrir un directorio con cientos de documentos no
+obliga a leerlos todos. La búsqueda ordena por BM25 (con más peso para los
+términos del título) y devuelve un fragmento de cada documento con los
+términos buscados.
+"""
+
+import json
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+
+SEARCH_INDEX_NAME = "search_index.json"
+DOC_GLOB = "*.mdx"
+TITLE_WEIGHT = 3  # Cada término del título cuenta como varias apariciones
+BM25_K1 = 1.2
+BM25_B = 0.75
+SNIPPET_CHARS = 160
+
+TERM_RE = re.compile(r"\w{2,}")
+STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "are", "from", "you", "your", "can", "not", "use",
+    "los", "las", "del", "con", "por", "para", "una", "que", "como", "its", "into", "all",
+}
+
+
+def terms(text):
+    return [t for t in TERM_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def doc_title(text, path):
+    for line in text.splitlines():
+        if line.startswith("#"):
+            return line.lstrip("#").strip()
+    return Path(path).stem.replace("_", " ")
+
+
+class DocsSearchIndex:
+    def __init__(self, docs_dir):
+        self.docs_dir = Path(docs_dir)
+        self.path = self.docs_dir / SEARCH_INDEX_NAME
+        self.files = {}  # nombre -> {mtime_ns, size, title, length, terms}
+        self.postings = {}  # término -> {nombre: frecuencia}
+
+    def load(self):
+        """Carga el índice del disco y lo pone al día según los mtime de los documentos"""
+        if self.path.exists():
+            try:
+                with open(self.path) as f:
+                    data = json.load(f)
+                self.files, self.postings = data["files"], data["postings"]
+            except (ValueError, KeyError):
+                self.files, self.postings = {}, {}
+        present = {entry.name: entry.stat() for entry in os.scandir(self.docs_dir)
+                   if entry.is_file() and Path(entry.name).match(DOC_GLOB)}
+        changed = False
+        for name in list(self.files):
+            if name not in present:
+                self._remove(name)
+                changed = True
+        for name, stat in present.items():
+            known = self.files.get(name)
+            if known and known["mtime_ns"] == stat.st_mtime_ns and known["size"] == stat.st_size:
+                continue
+            self._remove(name)
+            self._add(name, stat)
+            changed = True
+        if changed:
+            self.save()
+        return self
+
+    def _remove(self, name):
+        entry = self.files.pop(name, None)
+        for term in (entry or {}).get("terms", []):
+            docs = self.postings.get(term, {})
+            docs.pop(name, None)
+            if not docs:
+                self.postings.pop(term, None)
+
+    def _add(self, name, stat):
+        text = (self.docs_dir / name).read_text(errors="replace")
+        title = doc_title(text, name)
+        counts = Counter(terms(text))
+        for term in terms(title):
+            counts[term] += TITLE_WEIGHT
+        for term, count in counts.items():
+            self.postings.setdefault(term, {})[name] = count
+        self.files[name] = {
+            "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "title": title,
+            "length": sum(counts.values()), "terms": sorted(counts),
+        }
+
+    def save(self):
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"files": self.files, "postings": self.postings}, f)
+        os.replace(tmp, self.path)
+
+    def documents(self):
+        """[(nombre, título)] ordenados por nombre"""
+        return [(name, self.files[name]["title"]) for name in sorted(self.files)]
+
+    def search(self, query, limit=20):
+        """[(puntuación, nombre)] de los documentos que contienen algún término de query (BM25)"""
+        query_terms = set(terms(query))
+        if not query_terms or not self.files:
+            return []
+        average = sum(f["length"] for f in self.files.values()) / len(self.files)
+        scores = Counter()
+        for term in query_terms:
+            docs = self.postings.get(term, {})
+            if not docs:
+                continue
+            idf = math.log(1 + (len(self.files) - len(docs) + 0.5) / (len(docs) + 0.5))
+            for name, tf in docs.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.files[name]["length"] / average)
+                scores[name] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return [(round(score, 3), name) for name, score in scores.most_common(limit)]
+
+    def snippet(self, name, query):
+        """Fragmento de la línea con más términos de query, recortado alrededor de la primera coincidencia"""
+        query_terms = set(terms(query))
+        best, best_hits = "", 0
+        for line in (self.docs_dir / name).read_text(errors="replace").splitlines():
+            hits = len(query_terms.intersection(terms(line)))
+            if hits > best_hits:
+                best, best_hits = line.strip(), hits
+        if not best:
+            return ""
+        lowered = best.lower()
+        first = min((lowered.find(t) for t in query_terms if t in lowered), default=0)
+        start = max(0, first - SNIPPET_CHARS // 3)
+        text = best[start:start + SNIPPET_CHARS]
+        return ("..." if start else "") + text + ("..." if start + SNIPPET_CHARS < len(best) else "")
@@ -0,0 +1,323 @@
+"""Flujo de documentación de un repositorio (CreateDocumentationFlow).
+
+Separado de code_documentation_generator.py para que la CLI arranque sin
+importar crewAI: este módulo se importa en main() una vez resueltos los
+argumentos. Los crews y el embedder los construye build_crews() y los
+comparte entre todos los flujos del proceso mediante las variables de este
+módulo.
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Dict, List
+
+from crewai.flow.flow import Flow, listen, start
+from pydantic import BaseModel, Field, PrivateAttr
+
+import doc_manifest
+import repo_clone
+from code_search import CodeSearchIndex, CodeSearchTool
+from doc_index import DocsIndex, DocsIndexTool
+from doc_streaming import write_doc
+from flow_checkpoint import CHECKPOINT_NAME, FlowCheckpoint
+from prefetch import prefetch_context
+from repo_index import RepoIndex, RepositoryIndexTool
+from repo_summary import RepoSummarizer
+
+# Variables globales compartidas por todos los flujos del proceso (las asigna build_crews())
+planning_crew = None
+documentation_crew = None
+embedder = None  # Embedder de los índices de búsqueda de código
+stream_router = None  # Solo en modo --stream: vuelca los tokens a docs/*.mdx.partial
+summary_planning_crew = None  # Modo repositorio grande: planifica a partir del mapa resumido
+summary_llm = None  # LLM de los resúmenes por directorio
+
+# Modelos de datos
+class DocItem(BaseModel):
+    title: str
+    description: str
+    prerequisites: str
+    examples: list[str]
+    goal: str
+    source_files: list[str] = []  # Archivos o directorios del repo que cubre el documento
+    symbols: list[str] = []  # Clases y funciones que el redactor necesita leer
+
+class DocPlan(BaseModel):
+    overview: str
+    docs: list[DocItem]
+
+class DocumentationState(BaseModel):
+    project_url: str = "https://github.com/crewAIInc/nvidia-demo"  # Valor por defecto
+    repo_path: Path = Path("workdir/")
+    docs_dir: Path = Path("docs")  # En modo batch, docs/<repo>
+    docs: List[str] = []
+    max_concurrency: int = 4  # Documentos generados en paralelo como máximo
+    incremental: bool = False  # Regenerar solo los documentos cuyas fuentes cambiaron
+    shallow_clone: bool = True  # Clon de profundidad 1 y parcial (--filter=blob:none)
+    sparse_paths: List[str] = []  # Limitar el checkout a estas rutas (vacío = todo el repo)
+    resume: bool = False  # Continuar desde docs/checkpoint.json sin repetir el trabajo hecho
+    large_repo: str = "auto"  # Planificación map-reduce: auto, on u off
+    large_repo_files: int = 300  # En modo auto, a partir de cuántos archivos indexados
+    summary_concurrency: int = 8  # Resúmenes de directorios en paralelo como máximo
+    # sha256 de cada archivo del checkout: se calcula una vez en clone_repo y lo usan
+    # el índice de búsqueda, los resúmenes y el manifiesto (no se guarda en el checkpoint)
+    file_hashes: Dict[str, str] = Field(default_factory=dict, exclude=True)
+
+# Nombre del archivo .mdx para un documento del plan
+def doc_filename(doc):
+    return doc.title.lower().replace(" ", "_") + ".mdx"
+
+# Copia de un crew con las herramientas apuntando a los índices de un repositorio
+def bind_crew(crew, repo_index, code_index, docs_index=None, current_doc=""):
+    def bind(tool):
+        if isinstance(tool, RepositoryIndexTool):
+            return tool.model_copy(update={"index": repo_index})
+        if isinstance(tool, CodeSearchTool):
+            return tool.model_copy(update={"index": code_index})
+        if isinstance(tool, DocsIndexTool):
+            return tool.model_copy(update={"index": docs_index, "current": current_doc})
+        return tool
+
+    crew = crew.copy()
+    for item in crew.agents + crew.tasks:
+        item.tools = [bind(tool) for tool in item.tools or []]
+    return crew
+
+# Clase principal del flujo de documentación
+class CreateDocumentationFlow(Flow[DocumentationState]):
+    # Índices del repositorio de este flujo; los crews compartidos se enlazan a ellos
+    _repo_index: RepoIndex = PrivateAttr(default_factory=RepoIndex)
+    _code_index: CodeSearchIndex = PrivateAttr(default=None)
+    # Contexto precargado por título de documento
+    _contexts: dict = PrivateAttr(default_factory=dict)
+    _checkpoint: FlowCheckpoint = PrivateAttr(default=None)
+    _docs_index: DocsIndex = PrivateAttr(default=None)
+
+    def _bind(self, crew, current_doc=""):
+        return bind_crew(crew, self._repo_index, self._code_index, self._docs_index, current_doc)
+
+    def _prepare_repo(self):
+        # Clonado e indexado: bloqueante, se ejecuta fuera del event loop
+        self._checkpoint = FlowCheckpoint(self.state.docs_dir / CHECKPOINT_NAME)
+        resumed = self.state.resume and self._checkpoint.load(self.state.project_url)
+        saved_path = Path(self._checkpoint.data["state"].get("repo_path", ""))
+        if resumed and self._checkpoint.done("clone_repo") and saved_path.is_dir():
+            # Reanudar sobre el mismo checkout: sin fetch, el plan sigue siendo válido
+            print(f"# Reanudando: se reutiliza el checkout en {saved_path}\n")
+            self.state.repo_path = saved_path
+        else:
+            print(f"# Clonando repositorio: {self.state.project_url}\n")
+            repo_name = repo_clone.repo_name(self.state.project_url)
+            self.state.repo_path = Path(f"{self.state.repo_path}/{repo_name}")
+            repo_clone.clone_or_update(
+                self.state.project_url,
+                self.state.repo_path,
+                shallow=self.state.shallow_clone,
+                # --sparse-path se respeta también con --full-clone
+                sparse=self.state.shallow_clone or bool(self.state.sparse_paths),
+                sparse_paths=self.state.sparse_paths
+            )
+        self.state.file_hashes = doc_manifest.hash_repo(self.state.repo_path)
+        self._repo_index.build(self.state.repo_path)
+        print(f"# Índice del repositorio: {self._repo_index.summary()}\n")
+        self._code_index = CodeSearchIndex(embedder).build(self.state.repo_path, self._repo_index, self.state.file_hashes)
+        print(f"# Índice de búsqueda de código: {self._code_index.summary()}\n")
+        self._checkpoint.save(self.state, step="clone_repo")
+
+    @start()
+    async def clone_repo(self):
+        await asyncio.to_thread(self._prepare_repo)
+        return self.state
+
+    @listen(clone_repo)
+    async def plan_docs(self):
+        plan_path = self.state.docs_dir / "plan.json"
+        manifest_path = self.state.docs_dir / doc_manifest.MANIFEST_NAME
+        if self.state.incremental and plan_path.exists() and manifest_path.exists():
+            print(f"# Modo incremental: reutilizando el plan existente en {plan_path}")
+            plan = DocPlan.model_validate_json(await asyncio.to_thread(plan_path.read_text))
+        elif self.state.resume and self._checkpoint.done("save_plan") and plan_path.exists():
+            print(f"# Reanudando: se carga el plan de {plan_path}")
+            plan = DocPlan.model_validate_json(await asyncio.to_thread(plan_path.read_text))
+        else:
+            print(f"# Planificando documentación para: {self.state.repo_path}\n")
+            crew = planning_crew
+            inputs = {
+                'repo_path': str(self.state.repo_path),
+                'repo_summary': "Not built for this repository; rely on the codebase analysis."
+            }
+            if self._large_repo():
+                # Map-reduce: resúmenes por directorio en lugar de la exploración de code_explorer
+                summarizer = RepoSummarizer(summary_llm, concurrency=self.state.summary_concurrency)
+                inputs['repo_summary'] = await summarizer.summarize(self._repo_index, self.state.file_hashes)
+                print(f"# Mapa del repositorio: {summarizer.report()}")
+                crew = summary_planning_crew
+            result = await self._bind(crew).akickoff(inputs=inputs)
+            plan = result.pydantic
+        print(f"# Documentación planificada para {self.state.repo_path}:")
+        for doc in plan.docs:
+            print(f"    - {doc.title}")
+        return plan
+
+    def _large_repo(self):
+        if self.state.large_repo == "auto":
+            return len(self._repo_index.files) >= self.state.large_repo_files
+        return self.state.large_repo == "on"
+
+    @listen(plan_docs)
+    async def save_plan(self, plan):
+        # Se ejecuta a la vez que prefetch_docs_context y create_docs
+        self.state.docs_dir.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(write_doc, self.state.docs_dir / "plan.json", plan.model_dump_json(indent=2))
+        await asyncio.to_thread(self._checkpoint.save, self.state, step="save_plan")
+
+    async def _create_doc(self, doc, overview, path):
+        # Cada documento usa su propia copia del crew: Crew guarda estado de ejecución
+        crew = self._bind(documentation_crew, current_doc=path.name)
+        if stream_router:
+            stream_router.open(path, crew.tasks)
+        try:
+            return await crew.akickoff(inputs={
+                'repo_path': str(self.state.repo_path),
+                'title': doc.title,
+                'overview': overview,
+                'description': doc.description,
+                'prerequisites': doc.prerequisites,
+                'examples': '\n'.join(doc.examples),
+                'goal': doc.goal,
+                'source_context': self._contexts.get(doc.title, "")
+            })
+        except BaseException:
+            # Un borrador a medias no debe quedar en la carpeta de documentación
+            if stream_router:
+                stream_router.close(crew.tasks, discard=True)
+            raise
+        finally:
+            if stream_router:
+                stream_router.close(crew.tasks)
+
+    def _prefetch(self, plan):
+        for doc in plan.docs:
+            self._contexts[doc.title] = prefetch_context(doc, self._repo_index, self.state.repo_path)
+
+    @listen(plan_docs)
+    async def prefetch_docs_context(self, plan):
+        # Lectura local en bloque: evita las rondas de herramientas de overview_writer
+        await asyncio.to_thread(self._prefetch, plan)
+        print(f"# Contexto precargado para {len(plan.docs)} documentos")
+        return plan
+
+    @listen(prefetch_docs_context)
+    async def create_docs(self, plan):
+        docs_dir = self.state.docs_dir
+        docs_dir.mkdir(parents=True, exist_ok=True)
+        # Índice de los documentos existentes que consulta documentation_reviewer
+        self._docs_index = await asyncio.to_thread(DocsIndex(docs_dir).load)
+        manifest_path = docs_dir / doc_manifest.MANIFEST_NAME
+        docs = plan.docs
+        paths = [docs_dir / doc_filename(doc) for doc in docs]
+        sources = [doc_manifest.doc_sources(doc, self.state.repo_path) for doc in docs]
+
+        # Snapshot de hashes del repositorio (de clone_repo) para el modo incremental
+        files = self.state.file_hashes
+        pending = list(range(len(docs)))
+        if self.state.incremental:
+            manifest = doc_manifest.load_manifest(manifest_path)
+            changed = doc_manifest.changed_files(manifest["files"], files)
+            print(f"# Modo incremental: {len(changed)} archivos cambiaron desde la última ejecución")
+            pending = [i for i in pending if doc_manifest.is_stale(paths[i], sources[i], manifest, changed)]
+            for i in range(len(docs)):
+                if i not in pending:
+                    print(f"# Sin cambios, se conserva: {paths[i]}")
+        if self.state.resume:
+            done = [i for i in pending if self._checkpoint.doc_done(paths[i])]
+            for i in done:
+                print(f"# Reanudando: ya estaba creado: {paths[i]}")
+            pending = [i for i in pending if i not in done]
+
+        max_workers = max(1, min(self.state.max_concurrency, len(pending)))
+        print(f"\n# Creando {len(pending)} documentos (máximo {max_workers} en paralelo)")
+        display = stream_router.display if stream_router else None
+        if display:
+            display.start("# Generando")
+        slots = asyncio.Semaphore(max_workers)
+
+        async def create(i):
+            async with slots:
+                print(f"# Creando documentación para: {docs[i].title}")
+                try:
+                    return i, await self._create_doc(docs[i], plan.overview, paths[i]), None
+                except Exception as e:
+                    return i, None, e
+
+        # Escribir cada documento en cuanto termina; un fallo no descarta los demás
+        failed = []
+        try:
+            for finished in asyncio.as_completed([create(i) for i in pending]):
+                i, result, error = await finished
+                if error:
+                    failed.append(error)
+                    print(f"\n# Error creando {paths[i]}: {error}")
+                    continue
+                await asyncio.to_thread(write_doc, paths[i], result.raw)
+                await asyncio.to_thread(self._docs_index.update, paths[i], result.raw, docs[i].title)
+                await asyncio.to_thread(self._checkpoint.save, self.state, doc=(paths[i], docs[i].title))
+                print(f"\n# Documento escrito: {paths[i]}")
+        finally:
+            # En batch el indicador es compartido: solo se cierra cuando termina el último flujo
+            if display:
+                display.stop("# Tokens generados")
+        if failed:
+            raise RuntimeError(
+                f"{len(failed)} documentos no se pudieron crear; reinténtalos con --resume"
+            ) from failed[0]
+
+        # Mantener el orden del plan, independientemente del orden de finalización
+        self.state.docs = [str(path) for path in paths]
+        await asyncio.to_thread(doc_manifest.save_manifest, files, {
+            str(path): {"title": doc.title, "sources": doc_sources}
+            for path, doc, doc_sources in zip(paths, docs, sources)
+        }, manifest_path)
+        await asyncio.to_thread(self._checkpoint.save, self.state, step="create_docs")
+        print(f"\n# Documentación creada para: {self.state.repo_path}")
+
+def make_flow(project_url, args, docs_dir=Path("docs")):
+    flow = CreateDocumentationFlow()
+    if project_url and project_url != flow.state.project_url:
+        flow.state.project_url = project_url
+    flow.state.docs_dir = docs_dir
+    flow.state.max_concurrency = args.max_concurrency
+    flow.state.incremental = args.incremental
+    flow.state.shallow_clone = not args.full_clone
+    flow.state.sparse_paths = args.sparse_paths
+    flow.state.resume = args.resume
+    flow.state.large_repo = args.large_repo
+    flow.state.large_repo_files = args.large_repo_files
+    flow.state.summary_concurrency = args.summary_concurrency
+    return flow
+
+async def run_batch(urls, args):
+    """Documenta varios repositorios en un solo proceso, compartiendo crews, LLM y embedder"""
+    names = [repo_clone.repo_name(url) for url in urls]
+    repeated = sorted({name for name in names if names.count(name) > 1})
+    if repeated:
+        # Compartirían checkout y carpeta de documentación
+        raise ValueError(f"Repositorios repetidos en el batch: {', '.join(repeated)}")
+    print(f"# Modo batch: {len(urls)} repositorios, {args.batch_concurrency} en paralelo\n")
+    slots = asyncio.Semaphore(max(1, args.batch_concurrency))
+    failed = []
+
+    async def document(url):
+        async with slots:
+            try:
+                await make_flow(url, args, Path("docs") / repo_clone.repo_name(url)).kickoff_async()
+                print(f"# Repositorio documentado: {url}")
+            except Exception as e:
+                # Un repositorio con errores no detiene el resto del batch
+                failed.append(url)
+                print(f"# Error documentando {url}: {e}")
+
+    await asyncio.gather(*(document(url) for url in urls))
+    print(f"\n# Batch completado: {len(urls) - len(failed)} correctos, {len(failed)} con errores")
+    for url in failed:
+        print(f"    - {url}")
@@ -0,0 +1,56 @@
+"""Checkpoints de CreateDocumentationFlow para reanudar ejecuciones interrumpidas.
+
+Después de cada paso del flujo y de cada documento terminado se guarda en
+<docs>/checkpoint.json el estado del flujo (DocumentationState), los pasos
+completados y los documentos ya escritos. Con --resume el flujo reutiliza el
+checkout sin volver a clonar, carga el plan de <docs>/plan.json en lugar de
+llamar a planning_crew y solo genera los documentos que faltan.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+
+from doc_streaming import write_doc
+
+CHECKPOINT_NAME = "checkpoint.json"
+
+
+class FlowCheckpoint:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.data = {"state": {}, "steps": [], "docs": {}}
+        self._lock = threading.Lock()
+
+    def load(self, project_url):
+        """Carga el checkpoint si existe y corresponde al mismo repositorio"""
+        if not self.path.exists():
+            return False
+        with open(self.path) as f:
+            data = json.load(f)
+        if data.get("state", {}).get("project_url") != project_url:
+            print(f"# El checkpoint {self.path} es de otro repositorio; se empieza de cero")
+            return False
+        self.data = data
+        return True
+
+    def done(self, step):
+        return step in self.data["steps"]
+
+    def doc_done(self, path):
+        # write_doc escribe de forma atómica: si el archivo existe, está completo
+        return str(path) in self.data["docs"] and Path(path).exists()
+
+    def save(self, state, step=None, doc=None):
+        """Persiste el estado; step marca un paso completado y doc un documento (ruta, título)"""
+        with self._lock:
+            self.data["state"] = state.model_dump(mode="json")
+            if step and step not in self.data["steps"]:
+                self.data["steps"].append(step)
+            if doc:
+                path, title = doc
+                self.data["docs"][str(path)] = {"title": title, "completed": time.time()}
+            self.data["updated"] = time.time()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_doc(self.path, json.dumps(self.data, indent=2))
@@ -0,0 +1,171 @@
+"""Caché persistente de respuestas del LLM, direccionada por contenido.
+
+Las respuestas se guardan en SQLite con una clave derivada del modelo, los
+parámetros de muestreo y la lista completa de mensajes (que incluye las
+salidas de las herramientas). La caché aplica un TTL y expulsa las entradas
+menos usadas recientemente cuando supera el tamaño máximo.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = Path(".cache/llm_responses.sqlite")
+
+
+class LLMResponseCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=256 * 1024 * 1024, ttl_seconds=7 * 24 * 3600):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # La conexión se comparte entre los hilos de create_docs, protegida por el lock
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses (accessed)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_created ON responses (created)")
+        self._conn.commit()
+        # Tamaño total mantenido en memoria: la expulsión no vuelve a sumar toda la tabla
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(model, temperature, messages, **params):
+        """Clave sha256 a partir de todo lo que determina la respuesta"""
+        payload = {"model": model, "temperature": temperature, "messages": messages, **params}
+        encoded = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._delete([(key,)])
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key, response):
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._delete([(key,)])  # Si se reemplaza una entrada, su tamaño deja de contar
+            self._conn.execute(
+                "INSERT INTO responses (key, response, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self._total += size
+            self._evict(now)
+            self._conn.commit()
+
+    def _delete(self, keys):
+        for (key,) in keys:
+            row = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if row:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total -= row[0]
+
+    def _evict(self, now):
+        # Primero las entradas caducadas (por el índice de created), después LRU hasta quedar bajo el límite
+        cutoff = now - self.ttl_seconds
+        expired = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses WHERE created < ?", (cutoff,)).fetchone()[0]
+        if expired:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (cutoff,))
+            self._total -= expired
+        if self._total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed ASC"):
+            if self._total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            self._total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def wrap(self, llm):
+        """Envuelve llm.call y llm.acall para servir respuestas desde la caché.
+
+        Solo se guardan respuestas de texto; los resultados de llamadas a
+        funciones se devuelven sin cachear.
+        """
+        call, acall = llm.call, llm.acall
+
+        def key_for(messages, tools, kwargs):
+            response_model = kwargs.get("response_model")
+            return self.make_key(
+                llm.model,
+                llm.temperature,
+                messages,
+                max_tokens=llm.max_tokens,
+                tools=tools,
+                response_model=getattr(response_model, "__name__", None),
+            )
+
+        def cached_call(messages, tools=None, *args, **kwargs):
+            key = key_for(messages, tools, kwargs)
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+            response = call(messages, tools, *args, **kwargs)
+            if isinstance(response, str):
+                self.set(key, response)
+            return response
+
+        async def cached_acall(messages, tools=None, *args, **kwargs):
+            # SQLite (lectura, actualización de accessed y commit) fuera del bucle de eventos
+            key = key_for(messages, tools, kwargs)
+            cached = await asyncio.to_thread(self.get, key)
+            if cached is not None:
+                return cached
+            response = await acall(messages, tools, *args, **kwargs)
+            if isinstance(response, str):
+                await asyncio.to_thread(self.set, key, response)
+            return response
+
+        llm.call = cached_call
+        llm.acall = cached_acall
+        return llm
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+            "size_bytes": size,
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(
+            f"# Caché LLM: {stats['hits']} aciertos, {stats['misses']} fallos "
+            f"({stats['hit_rate']:.0%}), {stats['entries']} entradas, "
+            f"{stats['size_bytes'] / 1024:.1f} KiB en {self.path}"
+        )
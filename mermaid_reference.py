@@ -0,0 +1,154 @@
+"""Índice persistente de la referencia de mermaid para overview_writer.
+
+Sustituye a WebsiteSearchTool, que volvía a descargar y embeber la web de
+mermaid en cada arranque. La fase de ingesta se hace una vez: el texto fuente
+(la web de mermaid o el snapshot incluido en config/) se divide en secciones,
+se embebe y se guarda en .cache/mermaid_index/<hash de la fuente>/. En los
+arranques siguientes se carga la versión registrada en current-*.json sin
+acceder a la red.
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Type
+
+import numpy as np
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from code_search import embed_to_memmap, nearest, normalize
+
+DEFAULT_INDEX_DIR = Path(".cache/mermaid_index")
+SNAPSHOT_PATH = Path(__file__).parent / "config" / "mermaid_examples.md"
+MERMAID_PAGES = [
+    "https://mermaid.js.org/intro/",
+    "https://mermaid.js.org/syntax/flowchart.html",
+    "https://mermaid.js.org/syntax/sequenceDiagram.html",
+    "https://mermaid.js.org/syntax/classDiagram.html",
+    "https://mermaid.js.org/syntax/stateDiagram.html",
+    "https://mermaid.js.org/syntax/entityRelationshipDiagram.html",
+]
+MAX_SECTION_CHARS = 1500
+
+
+def fetch_web_source(pages=MERMAID_PAGES):
+    """Descarga las páginas de mermaid y las convierte a texto plano"""
+    import requests
+    from bs4 import BeautifulSoup
+
+    texts = []
+    for url in pages:
+        response = requests.get(url, timeout=30)
+        response.raise_for_status()
+        soup = BeautifulSoup(response.text, "html.parser")
+        main = soup.find("main") or soup.body or soup
+        for tag in main.find_all(["h1", "h2", "h3"]):
+            tag.insert_before("\n## ")
+        texts.append(f"## Source: {url}\n" + main.get_text("\n"))
+    return "\n".join(texts)
+
+
+def split_sections(text):
+    """Divide el texto por encabezados y trocea las secciones demasiado largas"""
+    sections = []
+    for section in re.split(r"\n(?=#{1,3} )", text):
+        section = re.sub(r"\n{3,}", "\n\n", section).strip()
+        while section:
+            if len(section) <= MAX_SECTION_CHARS:
+                sections.append(section)
+                break
+            cut = section.rfind("\n\n", 0, MAX_SECTION_CHARS)
+            cut = cut if cut > 0 else MAX_SECTION_CHARS
+            sections.append(section[:cut].strip())
+            section = section[cut:].strip()
+    return [s for s in sections if s]
+
+
+class MermaidReferenceIndex:
+    def __init__(self, embedder, index_dir=DEFAULT_INDEX_DIR):
+        self.embedder = embedder
+        self.index_dir = Path(index_dir)
+        self.sections = []
+        self.vectors = None
+        self.version = None
+
+    def _current_path(self, source):
+        return self.index_dir / f"current-{source}-{self.embedder.name}.json"
+
+    def load(self, source="web", refresh=False):
+        """Carga el índice registrado o lo (re)construye.
+
+        Args:
+            source: 'web' (mermaid.js.org) o 'snapshot' (config/mermaid_examples.md).
+            refresh: Volver a leer la fuente; solo se re-embebe si su hash cambió.
+        """
+        current = self._current_path(source)
+        if current.exists() and not refresh:
+            version = json.loads(current.read_text())["version"]
+            if (self.index_dir / version / "vectors.npy").exists():
+                return self._load_version(version)
+
+        fallback = False
+        if source == "web":
+            try:
+                text = fetch_web_source()
+            except OSError as e:  # requests.RequestException hereda de OSError
+                print(f"# No se pudo descargar la referencia de mermaid ({e}); se usa el snapshot incluido")
+                text, fallback = SNAPSHOT_PATH.read_text(), True
+        else:
+            text = SNAPSHOT_PATH.read_text()
+        version = hashlib.sha256(f"{self.embedder.name}\n{text}".encode()).hexdigest()[:16]
+        target = self.index_dir / version
+        if not (target / "vectors.npy").exists():
+            sections = split_sections(text)
+            target.mkdir(parents=True, exist_ok=True)
+            embed_to_memmap(sections, self.embedder, target / "vectors.npy")
+            with open(target / "sections.json", "w") as f:
+                json.dump(sections, f)
+        # Si se usó el snapshot por falta de red, el próximo arranque vuelve a intentar la web
+        if not fallback:
+            current.write_text(json.dumps({"version": version, "source": source}))
+        return self._load_version(version)
+
+    def _load_version(self, version):
+        target = self.index_dir / version
+        with open(target / "sections.json") as f:
+            self.sections = json.load(f)
+        self.vectors = np.load(target / "vectors.npy", mmap_mode="r")
+        self.version = version
+        return self
+
+    def search(self, query, top_k=3):
+        if self.vectors is None or not self.sections:
+            return []
+        query_vector = normalize(self.embedder.embed([query]))[0]
+        best, scores = nearest(self.vectors, query_vector, top_k)
+        return [(float(score), self.sections[i]) for i, score in zip(best, scores)]
+
+    def summary(self):
+        return f"{len(self.sections)} secciones, versión {self.version}"
+
+
+class MermaidReferenceToolInput(BaseModel):
+    """Input schema for MermaidReferenceTool."""
+    query: str = Field(..., description="What mermaid syntax you need, e.g. 'sequence diagram activation'.")
+
+
+class MermaidReferenceTool(BaseTool):
+    name: str = "Search mermaid reference"
+    description: str = (
+        "Search the mermaid.js documentation for diagram syntax and examples "
+        "(flowcharts, sequence, class, state and ER diagrams)."
+    )
+    args_schema: Type[BaseModel] = MermaidReferenceToolInput
+    index: MermaidReferenceIndex = Field(exclude=True)
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _run(self, query: str) -> str:
+        results = self.index.search(query)
+        if not results:
+            return "The mermaid reference index is empty."
+        return "\n\n---\n\n".join(section for _, section in results)
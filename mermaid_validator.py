@@ -0,0 +1,413 @@
+"""Validación y reparación de los diagramas mermaid de los documentos generados.
+
+Sustituye a la expresión regular de check_mermaid_syntax, que solo corregía
+las etiquetas ``|...|>`` y reconstruía el texto con un replace por bloque.
+Aquí el documento se recorre una sola vez con patrones precompilados: cada
+bloque ```mermaid se analiza línea a línea según su tipo de diagrama
+(flowchart/graph, sequenceDiagram, classDiagram, stateDiagram, erDiagram),
+se reparan de forma determinista los errores habituales de los LLM y se
+emite el texto corregido en la misma pasada. Los problemas se devuelven como
+MermaidIssue; solo los que no se pueden reparar hacen fallar el guardrail.
+"""
+
+import re
+from dataclasses import dataclass
+
+FENCE_RE = re.compile(r"```[ \t]*mermaid[ \t]*\n(?P<body>.*?)(?P<close>\n[ \t]*```|\Z)", re.S)
+HEADER_RE = re.compile(r"^\s*(?P<type>[A-Za-z][\w-]*)(?P<rest>.*)$")
+COMMENT_RE = re.compile(r"^\s*(%%.*)?$")
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+FLOWCHART_DIRECTIONS = {"TB", "TD", "BT", "RL", "LR"}
+FLOWCHART_STATEMENTS = re.compile(r"^\s*(classDef|class|style|linkStyle|click|direction|accTitle|accDescr)\b")
+FLOW_ARROW_RE = re.compile(r"--|==|-\.|~~~")
+SINGLE_ARROW_RE = re.compile(r"(?<![-=.<>])->(?![>-])")
+# Cabecera sin flechas ni formas: "tipo", "tipo LR" o "tipo;" (puede ser un tipo que no conocemos)
+HEADER_LIKE_RE = re.compile(r"^\s*[A-Za-z][\w-]*(\s+[A-Za-z]{2})?\s*;?\s*$")
+FRONT_MATTER_RE = re.compile(r"^\s*---\s*$")
+# "end" usado como id de nodo al principio de un enlace o justo después de una flecha
+FLOW_END_ID_RE = re.compile(r"(^\s*|(?:-->|==>|-\.->|---|\|)\s*)end(?=\s*(?:$|[\[({&;]|--|==|-\.))")
+NODE_ID_CHAR = re.compile(r"\w")
+# Formas de nodo de flowchart, de la más larga a la más corta
+SHAPES = [
+    ("(((", ")))"), ("((", "))"), ("([", "])"), ("[[", "]]"), ("[(", ")]"), ("{{", "}}"),
+    ("[/", "/]"), ("[\\", "\\]"), ("[", "]"), ("(", ")"), ("{", "}"), (">", "]"),
+]
+LABEL_SPECIAL = set("()[]{}<>|;")
+BRACKETS = {"(": ")", "[": "]", "{": "}"}
+
+SEQUENCE_BLOCKS = re.compile(r"^\s*(loop|alt|opt|par|critical|break|rect|box)\b")
+SEQUENCE_BRANCH = re.compile(r"^\s*(else|and|option)\b")
+SEQUENCE_MESSAGE_RE = re.compile(
+    r"^(?P<src>\s*[^\s:>-][^:]*?)\s*(?P<arrow><<-{1,2}>>|-{1,2}>>|-{1,2}>|-{1,2}[x)])\s*(?P<dst>[+-]?[^:]+?)\s*(?P<text>:.*)?$"
+)
+END_RE = re.compile(r"^\s*end\s*$")
+
+# Relación de classDiagram: A <|-- B, A "1" --> "*" B, A ..|> B, A -- B : etiqueta
+CLASS_RELATION_RE = re.compile(
+    r'^\s*[\w.~`]+\s*(?:"[^"]*"\s*)?(?:<\||\*|o|<)?(?:--|\.\.)(?:\|>|\*|o|>)?\s*(?:"[^"]*"\s*)?[\w.~`]+\s*(?::.*)?$'
+)
+
+ER_CARDINALITY = r"(?:\|\||\|o|o\||\}o|o\{|\}\||\|\{)"
+ER_RELATION_RE = re.compile(
+    rf"^\s*(?P<left>[\w-]+|\"[^\"]+\")\s*{ER_CARDINALITY}(?:--|\.\.){ER_CARDINALITY}\s*(?P<right>[\w-]+|\"[^\"]+\")\s*(?P<label>:.*)?$"
+)
+
+DIAGRAM_TYPES = {
+    "flowchart", "graph", "flowchart-elk", "sequenceDiagram", "classDiagram", "classDiagram-v2",
+    "stateDiagram", "stateDiagram-v2", "erDiagram", "gantt", "pie", "journey", "gitGraph", "mindmap",
+    "timeline", "quadrantChart", "requirementDiagram", "C4Context", "C4Container", "C4Component",
+    "C4Dynamic", "C4Deployment", "sankey-beta", "xychart-beta", "block-beta", "packet-beta",
+    "kanban", "architecture-beta", "radar-beta", "treemap-beta", "zenuml", "info",
+}
+FLOWCHART_TYPES = {"flowchart", "graph", "flowchart-elk"}
+
+
+@dataclass
+class MermaidIssue:
+    block: int  # Número del diagrama en el documento (desde 1)
+    line: int  # Línea dentro del diagrama (desde 1; 0 = el diagrama completo)
+    code: str
+    message: str
+    repaired: bool
+
+    def __str__(self):
+        where = f"diagram {self.block}" + (f", line {self.line}" if self.line else "")
+        return f"{where}: {self.message}" + (" (repaired)" if self.repaired else "")
+
+
+class _Diagram:
+    """Estado de la reparación de un bloque"""
+
+    def __init__(self, block, lines):
+        self.block = block
+        self.lines = lines
+        self.issues = []
+
+    def issue(self, line, code, message, repaired):
+        self.issues.append(MermaidIssue(self.block, line, code, message, repaired))
+
+
+def _infer_type(lines):
+    text = "\n".join(lines)
+    if "participant " in text or re.search(r"-{1,2}>>", text):
+        return "sequenceDiagram"
+    if re.search(ER_CARDINALITY + r"(--|\.\.)", text):
+        return "erDiagram"
+    if "<|--" in text or re.search(r"^\s*class \w+\s*\{", text, re.M):
+        return "classDiagram"
+    if "[*]" in text:
+        return "stateDiagram-v2"
+    if FLOW_ARROW_RE.search(text):
+        return "flowchart TD"
+    return None
+
+
+def _close_blocks(diagram, out, stack, indent="    "):
+    """Cierra los bloques que quedaron abiertos al final del diagrama"""
+    for lineno, keyword in reversed(stack):
+        out.append(indent + ("}" if keyword == "{" else "end"))
+        closer = "}" if keyword == "{" else "end"
+        diagram.issue(lineno, "unclosed_block", f"'{keyword}' block was not closed; added '{closer}'", True)
+
+
+def _find_close(line, start, opener, closer):
+    """Posición del cierre de una forma de nodo, respetando comillas y anidamiento"""
+    depth, i, quoted = 0, start, False
+    while i < len(line):
+        ch = line[i]
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted:
+            if line.startswith(closer, i) and depth == 0:
+                return i
+            if ch == opener[0] and opener[0] in BRACKETS:
+                depth += 1
+            elif ch == BRACKETS.get(opener[0]) and depth:
+                depth -= 1
+        i += 1
+    return -1
+
+
+def _scan_flow_line(line):
+    """Tokeniza una línea de flowchart en una pasada.
+
+    Entrecomilla las etiquetas de nodo con caracteres especiales, cambia las
+    flechas '->' por '-->' y quita el '>' de '|etiqueta|>', siempre fuera de
+    textos entrecomillados, etiquetas de arista y etiquetas de nodo, y comprueba
+    que no queden corchetes, paréntesis, llaves o comillas sin cerrar.
+    Devuelve (línea, {código de reparación}, está equilibrada).
+    """
+    out, i, fixes, balanced = [], 0, set(), True
+    last = ""  # Último carácter no blanco ya emitido
+    while i < len(line):
+        ch = line[i]
+        if ch in '"|':
+            # Texto entrecomillado o etiqueta de arista: se copia tal cual
+            end = line.find(ch, i + 1)
+            if end == -1:
+                balanced = False
+                out.append(line[i:])
+                break
+            out.append(line[i:end + 1])
+            i, last = end + 1, ch
+            if ch == "|" and line.startswith(">", i):
+                fixes.add("edge_label_arrow")
+                i += 1
+            continue
+        if ch == "-" and SINGLE_ARROW_RE.match(line, i) and (i == 0 or line[i - 1] not in "-=.<>"):
+            fixes.add("single_dash_arrow")
+            out.append("-->")
+            i, last = i + 2, ">"
+            continue
+        if ch == "@" and line.startswith("@{", i) and NODE_ID_CHAR.match(last):
+            # Sintaxis de mermaid v11: A@{ shape: rect, label: "..." } (también ids de arista)
+            end = _find_close(line, i + 2, "{", "}")
+            if end == -1:
+                balanced = False
+                out.append(line[i:])
+                break
+            out.append(line[i:end + 1])
+            i, last = end + 1, "}"
+            continue
+        shape = None
+        if ch in "([{>" and NODE_ID_CHAR.match(last):
+            shape = next((s for s in SHAPES if line.startswith(s[0], i)), None)
+        if shape is None:
+            if ch in "([{)]}":
+                balanced = False
+            out.append(ch)
+            i += 1
+            last = last if ch.isspace() else ch
+            continue
+        opener, closer = shape
+        start = i + len(opener)
+        end = _find_close(line, start, opener, closer)
+        if end == -1:
+            balanced = False
+            out.append(line[i:])
+            break
+        label = line[start:end]
+        if label and not label.startswith('"') and LABEL_SPECIAL.intersection(label):
+            label = '"' + label.replace('"', "#quot;") + '"'
+            fixes.add("unquoted_label")
+        out.append(opener + label + closer)
+        i, last = end + len(closer), closer[-1]
+    return "".join(out), fixes, balanced
+
+
+def _fix_state_arrows(line):
+    """Cambia '->' por '-->' en una transición, sin tocar textos entrecomillados ni la descripción tras ':'"""
+    out, i = [], 0
+    while i < len(line):
+        ch = line[i]
+        if ch == ":":
+            out.append(line[i:])
+            break
+        if ch == '"':
+            end = line.find('"', i + 1)
+            end = len(line) - 1 if end == -1 else end
+            out.append(line[i:end + 1])
+            i = end + 1
+            continue
+        if ch == "-" and SINGLE_ARROW_RE.match(line, i) and (i == 0 or line[i - 1] not in "-=.<>"):
+            out.append("-->")
+            i += 2
+            continue
+        out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+FLOW_FIXES = {
+    "edge_label_arrow": "'|label|>' is not valid; use '|label|'",
+    "single_dash_arrow": "'->' is not a flowchart link; use '-->'",
+    "unquoted_label": "labels with brackets or pipes must be quoted",
+}
+
+
+def _repair_flowchart(diagram, header):
+    parts = header.rstrip("; \t").split()
+    if len(parts) > 1 and parts[1] not in FLOWCHART_DIRECTIONS:
+        diagram.issue(1, "invalid_direction", f"unknown direction '{parts[1]}'; using TD", True)
+        header = f"{parts[0]} TD"
+    out, stack = [header], []
+    for lineno, line in enumerate(diagram.lines[1:], start=2):
+        stripped = line.strip()
+        if COMMENT_RE.match(line) or FLOWCHART_STATEMENTS.match(line):
+            out.append(line)
+            continue
+        if stripped.startswith("subgraph"):
+            stack.append((lineno, "subgraph"))
+        elif END_RE.match(line):
+            if not stack:
+                diagram.issue(lineno, "unmatched_end", "'end' without an open subgraph; removed", True)
+                continue
+            stack.pop()
+            out.append(line)
+            continue
+        if FLOW_ARROW_RE.search(line) and FLOW_END_ID_RE.search(line):
+            line = FLOW_END_ID_RE.sub(r"\1End", line)
+            diagram.issue(lineno, "reserved_end", "'end' cannot be a node id; renamed to 'End'", True)
+        line, fixes, balanced = _scan_flow_line(line)
+        for code in sorted(fixes):
+            diagram.issue(lineno, code, FLOW_FIXES[code], True)
+        if not balanced:
+            diagram.issue(lineno, "unbalanced_brackets", f"unbalanced brackets or quotes: {stripped}", False)
+        out.append(line)
+    _close_blocks(diagram, out, stack)
+    return out
+
+
+def _repair_sequence(diagram, header):
+    out, stack = [header], []
+    for lineno, line in enumerate(diagram.lines[1:], start=2):
+        if COMMENT_RE.match(line):
+            out.append(line)
+            continue
+        if SEQUENCE_BLOCKS.match(line):
+            stack.append((lineno, SEQUENCE_BLOCKS.match(line).group(1)))
+        elif SEQUENCE_BRANCH.match(line) and not stack:
+            diagram.issue(lineno, "orphan_branch", f"'{line.strip()}' outside of an alt/par/critical block", False)
+        elif END_RE.match(line):
+            if not stack:
+                diagram.issue(lineno, "unmatched_end", "'end' without an open block; removed", True)
+                continue
+            stack.pop()
+        else:
+            message = SEQUENCE_MESSAGE_RE.match(line)
+            if message and not message.group("text"):
+                line = line.rstrip() + ": "
+                diagram.issue(lineno, "missing_message", "messages need ': text' after the participant", True)
+        out.append(line)
+    _close_blocks(diagram, out, stack)
+    return out
+
+
+def _repair_braces(diagram, header, relation_re=None, block_relation_re=None):
+    """classDiagram, stateDiagram y erDiagram: bloques con llaves y relaciones.
+
+    block_relation_re reconoce una relación dentro de un bloque abierto, lo que
+    indica que faltó cerrar la llave (un miembro como 'x--' no lo es).
+    """
+    out, stack = [header], []
+    for lineno, line in enumerate(diagram.lines[1:], start=2):
+        stripped = line.strip()
+        if COMMENT_RE.match(line):
+            out.append(line)
+            continue
+        is_state = header.startswith("stateDiagram")
+        if stripped == "}":
+            if not stack:
+                diagram.issue(lineno, "unmatched_brace", "'}' without an open block; removed", True)
+                continue
+            stack.pop()
+            out.append(line)
+            continue
+        if stripped.endswith("{"):
+            stack.append((lineno, "{"))
+            out.append(line)
+            continue
+        if stack and block_relation_re is not None and block_relation_re.match(line):
+            # Clases y entidades no contienen relaciones: faltó cerrar la llave antes
+            opened, _ = stack.pop()
+            out.append("    }")
+            diagram.issue(opened, "unclosed_block", "'{' block was not closed before a relationship; added '}'", True)
+        if is_state and _fix_state_arrows(line) != line:
+            line = _fix_state_arrows(line)
+            diagram.issue(lineno, "single_dash_arrow", "'->' is not a state transition; use '-->'", True)
+        elif relation_re is not None and not stack and ("--" in line or ".." in line):
+            relation = relation_re.match(line)
+            if relation is None:
+                diagram.issue(lineno, "invalid_relationship", f"invalid relationship: {stripped}", False)
+            elif not relation.group("label"):
+                line = line.rstrip() + " : relates to"
+                diagram.issue(lineno, "missing_label", "relationships need a ': label'", True)
+        out.append(line)
+    _close_blocks(diagram, out, stack)
+    return out
+
+
+def repair_diagram(source, block=1):
+    """Valida y repara un diagrama; devuelve (texto, issues)"""
+    lines = source.translate(SMART_QUOTES).split("\n")
+    while lines and not lines[-1].strip():
+        lines.pop()
+    diagram = _Diagram(block, lines)
+    # Las líneas de comentario y el front matter ('---' ... '---') preceden a la cabecera
+    first, in_front_matter = None, False
+    for i, line in enumerate(lines):
+        if FRONT_MATTER_RE.match(line) and (in_front_matter or first is None and not "".join(lines[:i]).strip()):
+            in_front_matter = not in_front_matter
+        elif not in_front_matter and not COMMENT_RE.match(line):
+            first = i
+            break
+    if first is None:
+        diagram.issue(0, "empty_diagram", "the mermaid block is empty", False)
+        return source, diagram.issues
+    if source != source.translate(SMART_QUOTES):
+        diagram.issue(0, "smart_quotes", "typographic quotes replaced with plain quotes", True)
+
+    header = lines[first].strip()
+    match = HEADER_RE.match(header)
+    kind = match.group("type") if match else ""
+    if kind not in DIAGRAM_TYPES and HEADER_LIKE_RE.match(header) and not FLOW_ARROW_RE.search(header):
+        # Parece una cabecera de un tipo que no validamos: se deja tal cual
+        return "\n".join(lines), diagram.issues
+    if kind not in DIAGRAM_TYPES:
+        inferred = _infer_type(lines[first:])
+        if inferred is None:
+            diagram.issue(first + 1, "unknown_type", f"unknown diagram type '{header}'", False)
+            return "\n".join(lines), diagram.issues
+        diagram.issue(first + 1, "missing_header", f"missing diagram type; added '{inferred}'", True)
+        header, kind = inferred, inferred.split()[0]
+        lines.insert(first, header)
+    # Las líneas previas a la cabecera son comentarios y se conservan
+    diagram.lines = lines[first:]
+    prefix = lines[:first]
+
+    if kind in FLOWCHART_TYPES:
+        out = _repair_flowchart(diagram, header)
+    elif kind == "sequenceDiagram":
+        out = _repair_sequence(diagram, header)
+    elif kind == "erDiagram":
+        out = _repair_braces(diagram, header, ER_RELATION_RE, ER_RELATION_RE)
+    elif kind.startswith("classDiagram"):
+        out = _repair_braces(diagram, header, block_relation_re=CLASS_RELATION_RE)
+    elif kind.startswith("stateDiagram"):
+        out = _repair_braces(diagram, header)
+    else:
+        # Otros tipos de diagrama no se validan
+        out = diagram.lines
+    return "\n".join(prefix + out), diagram.issues
+
+
+def repair_mermaid(text):
+    """Valida y repara todos los bloques mermaid de un documento en una sola pasada"""
+    issues = []
+    count = 0
+
+    def repair_block(match):
+        nonlocal count
+        count += 1
+        body, block_issues = repair_diagram(match.group("body"), count)
+        if not match.group("close"):
+            block_issues.append(MermaidIssue(count, 0, "unclosed_fence", "mermaid fence was not closed; added '```'", True))
+        issues.extend(block_issues)
+        return f"```mermaid\n{body}\n```"
+
+    return FENCE_RE.sub(repair_block, text), issues
+
+
+def mermaid_guardrail(task_output):
+    """Guardrail de crewAI: repara los diagramas y solo rechaza si alguno no tiene arreglo"""
+    text, issues = repair_mermaid(task_output.raw)
+    errors = [issue for issue in issues if not issue.repaired]
+    if errors:
+        return (False, "Fix these mermaid diagram errors and return the whole document again:\n"
+                + "\n".join(f"- {issue}" for issue in errors))
+    repaired = len(issues)
+    if repaired:
+        print(f"# Mermaid: {repaired} correcciones automáticas")
+    task_output.raw = text
+    return (True, task_output)
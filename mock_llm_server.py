@@ -0,0 +1,227 @@
+"""Servidor local compatible con OpenAI para probar el limitador sin gastar cuota.
+
+Responde a POST /v1/chat/completions con un texto fijo o con la respuesta de
+un guion (reply puede ser una función que recibe la petición y devuelve el
+texto o las llamadas a herramientas) y a POST /v1/embeddings con vectores
+deterministas. Puede simular un endpoint saturado: limita las peticiones por
+minuto devolviendo 429 con Retry-After y puede fallar con 503 cada N
+peticiones. La latencia y los tokens por segundo simulan el tiempo de
+generación; benchmark.py lo usa para ejecutar el flujo completo.
+
+    python mock_llm_server.py --port 8001 --rpm 20 --fail-every 7
+
+y después, por ejemplo:
+
+    LLM(model="gpt-4o-mini", base_url="http://127.0.0.1:8001/v1", api_key="mock")
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "MockLLM/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        mock = self.server.mock
+        if self.path.rstrip("/").endswith("/embeddings"):
+            self._send_json(200, mock.embeddings(request))
+            return
+        status, retry_after = mock.admit()
+        if status != 200:
+            headers = {"Retry-After": f"{retry_after:.2f}"} if retry_after is not None else {}
+            error = {"message": "Rate limit exceeded" if status == 429 else "Service unavailable",
+                     "type": "rate_limit_error" if status == 429 else "server_error"}
+            self._send_json(status, {"error": error}, headers)
+            return
+        if mock.latency:
+            time.sleep(mock.latency)
+        content, tool_calls = mock.respond(request)
+        usage = mock.usage(request, content, tool_calls)
+        if request.get("stream"):
+            self._stream(request, content, tool_calls, usage)
+            return
+        if mock.tokens_per_second:
+            time.sleep(usage["completion_tokens"] / mock.tokens_per_second)
+        message = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        self._send_json(200, {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "finish_reason": "tool_calls" if tool_calls else "stop", "message": message}],
+            "usage": usage,
+        })
+
+    def _stream(self, request, content, tool_calls, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        mock = self.server.mock
+
+        def send(delta, finish_reason=None, **extra):
+            chunk = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": request.get("model", "mock"),
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}], **extra}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        if tool_calls:
+            send({"role": "assistant", "tool_calls": [dict(call, index=i) for i, call in enumerate(tool_calls)]})
+        else:
+            words = (content or "").split(" ")
+            for word in words:
+                if mock.tokens_per_second:
+                    time.sleep(usage["completion_tokens"] / len(words) / mock.tokens_per_second)
+                send({"content": word + " "})
+        send({}, "tool_calls" if tool_calls else "stop", usage=usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+def _tokens(text):
+    return max(1, len(text) // 4) if text else 0
+
+
+class MockLLMServer:
+    def __init__(self, host="127.0.0.1", port=0, rpm=0, fail_every=0, latency=0.0, reply="Mock response.",
+                 tokens_per_second=0.0, embedding_dim=64):
+        """
+        Args:
+            reply: Texto fijo o función reply(request) que devuelve el texto de la
+                respuesta o una lista de llamadas a herramientas [(nombre, argumentos)].
+            latency: Segundos de espera antes de cada respuesta.
+            tokens_per_second: Velocidad de generación simulada (0 = sin espera).
+        """
+        self.rpm = rpm
+        self.fail_every = fail_every
+        self.latency = latency
+        self.reply = reply
+        self.tokens_per_second = tokens_per_second
+        self.embedding_dim = embedding_dim
+        self.requests = 0
+        self.throttled = 0
+        self.failed = 0
+        self.completion_tokens = 0
+        self.tool_calls = 0
+        self._window = deque()
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def admit(self):
+        """(estado HTTP, Retry-After) para la siguiente petición"""
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            while self._window and now - self._window[0] >= 60:
+                self._window.popleft()
+            if self.rpm and len(self._window) >= self.rpm:
+                self.throttled += 1
+                return 429, 60 - (now - self._window[0])
+            if self.fail_every and self.requests % self.fail_every == 0:
+                self.failed += 1
+                return 503, None
+            self._window.append(now)
+            return 200, None
+
+    def respond(self, request):
+        """(texto, llamadas a herramientas en formato OpenAI) para una petición admitida"""
+        reply = self.reply(request) if callable(self.reply) else self.reply
+        if isinstance(reply, str):
+            return reply, None
+        with self._lock:
+            first = self.tool_calls
+            self.tool_calls += len(reply)
+        return None, [
+            {"id": f"call_{first + i}", "type": "function",
+             "function": {"name": name, "arguments": json.dumps(arguments)}}
+            for i, (name, arguments) in enumerate(reply)
+        ]
+
+    def usage(self, request, content, tool_calls):
+        prompt = sum(_tokens(json.dumps(m.get("content") or "")) for m in request.get("messages", []))
+        completion = _tokens(content) if content else _tokens(json.dumps(tool_calls))
+        with self._lock:
+            self.completion_tokens += completion
+        return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+    def embeddings(self, request):
+        # Vectores deterministas a partir del hash del texto: sin red ni modelo
+        texts = request.get("input", [])
+        texts = [texts] if isinstance(texts, str) else texts
+        data = []
+        for i, text in enumerate(texts):
+            digest = hashlib.sha256(str(text).encode()).digest()
+            vector = [(digest[j % len(digest)] - 128) / 128 for j in range(self.embedding_dim)]
+            data.append({"object": "embedding", "index": i, "embedding": vector})
+        tokens = sum(_tokens(str(text)) for text in texts)
+        return {"object": "list", "data": data, "model": request.get("model", "mock"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+
+    def stats(self):
+        return {"requests": self.requests, "throttled": self.throttled, "failed": self.failed,
+                "completion_tokens": self.completion_tokens, "tool_calls": self.tool_calls}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor LLM simulado compatible con OpenAI")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--rpm", type=int, default=0, help="Peticiones por minuto antes de responder 429")
+    parser.add_argument("--fail-every", type=int, default=0, help="Responder 503 cada N peticiones")
+    parser.add_argument("--latency", type=float, default=0.0, help="Segundos de espera por respuesta")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Velocidad de generación simulada")
+    args = parser.parse_args()
+    server = MockLLMServer(port=args.port, rpm=args.rpm, fail_every=args.fail_every, latency=args.latency,
+                           tokens_per_second=args.tokens_per_second)
+    print(f"# Servidor LLM simulado en {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
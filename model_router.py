@@ -0,0 +1,159 @@
+"""Enrutado de agentes a niveles de modelo, con fallback y coste por nivel.
+
+Los niveles (fast, strong, default...) se definen en config/llm_tiers.yaml y
+cada agente elige el suyo con la clave `llm:` de su YAML. Opcionalmente,
+`llm_steps:` envía un tipo de paso a otro nivel; hoy se distingue
+`structured`, la conversión de la respuesta a un modelo pydantic (p. ej. el
+DocPlan), que un modelo pequeño resuelve igual de bien.
+
+Cada nivel tiene una única instancia de LLM, creada bajo demanda y envuelta
+por el limitador y la caché. Si una llamada falla, se reintenta en el nivel
+de `fallback`. Al final se informa de llamadas, latencia, tokens y coste de
+cada nivel.
+"""
+
+import threading
+import time
+
+import yaml
+
+
+def load_tiers(path):
+    with open(path) as f:
+        config = yaml.safe_load(f)
+    if not config.get("tiers"):
+        raise ValueError(f"{path} no define ningún nivel en 'tiers'")
+    config.setdefault("default", next(iter(config["tiers"])))
+    return config
+
+
+def pop_routing(agent_config):
+    """Separa de la configuración del agente las claves de enrutado.
+
+    Devuelve (configuración sin ellas, nivel, niveles por tipo de paso).
+    """
+    config = dict(agent_config)
+    return config, config.pop("llm", None), config.pop("llm_steps", None) or {}
+
+
+class ModelRouter:
+    def __init__(self, config, build_llm, single_tier=None):
+        """
+        Args:
+            config: Contenido de llm_tiers.yaml (ver load_tiers).
+            build_llm: Función que recibe la configuración de un nivel y devuelve
+                el LLM ya envuelto (limitador, caché).
+            single_tier: Si se indica, todos los agentes y pasos usan este nivel.
+        """
+        self.tiers = config["tiers"]
+        self.default = single_tier or config["default"]
+        self.single_tier = single_tier
+        self.build_llm = build_llm
+        self._llms = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def llm(self, tier):
+        if tier not in self.tiers:
+            raise ValueError(f"Nivel de modelo desconocido: {tier}")
+        with self._lock:
+            if tier not in self._llms:
+                self._llms[tier] = self.build_llm(self.tiers[tier])
+                self._stats[tier] = {"calls": 0, "failures": 0, "fallbacks": 0, "seconds": 0.0}
+            return self._llms[tier]
+
+    def _chain(self, tier):
+        chain = []
+        while tier and tier not in chain:
+            chain.append(tier)
+            tier = self.tiers[tier].get("fallback")
+        return chain
+
+    def _failed(self, chain, position, llm, error):
+        """Anota el fallo del nivel chain[position]; devuelve False si no queda fallback"""
+        name = chain[position]
+        with self._lock:
+            self._stats[name]["failures"] += 1
+        if position == len(chain) - 1:
+            return False
+        fallback = chain[position + 1]
+        self.llm(fallback)
+        with self._lock:
+            self._stats[fallback]["fallbacks"] += 1
+        print(f"# El modelo {llm.model} ({name}) falló: {error}; se usa el nivel {fallback}")
+        return True
+
+    def _succeeded(self, name, started):
+        with self._lock:
+            self._stats[name]["calls"] += 1
+            self._stats[name]["seconds"] += time.perf_counter() - started
+
+    def call(self, tier, messages, *args, **kwargs):
+        """Llama al nivel indicado y, si falla, a sus niveles de fallback"""
+        chain = self._chain(tier)
+        for position, name in enumerate(chain):
+            llm = self.llm(name)
+            started = time.perf_counter()
+            try:
+                result = llm.call(messages, *args, **kwargs)
+            except Exception as e:
+                if not self._failed(chain, position, llm, e):
+                    raise
+                continue
+            self._succeeded(name, started)
+            return result
+
+    async def acall(self, tier, messages, *args, **kwargs):
+        """Versión asíncrona de call, sobre llm.acall"""
+        chain = self._chain(tier)
+        for position, name in enumerate(chain):
+            llm = self.llm(name)
+            started = time.perf_counter()
+            try:
+                result = await llm.acall(messages, *args, **kwargs)
+            except Exception as e:
+                if not self._failed(chain, position, llm, e):
+                    raise
+                continue
+            self._succeeded(name, started)
+            return result
+
+    def for_agent(self, tier=None, steps=None):
+        """LLM para un agente: se comporta como el de su nivel y enruta cada llamada"""
+        tier = self.single_tier or tier or self.default
+        steps = {} if self.single_tier else steps or {}
+        agent_llm = self.llm(tier).model_copy()
+
+        def route(kwargs):
+            step = "structured" if kwargs.get("response_model") else None
+            return steps.get(step, tier)
+
+        def routed_call(messages, *args, **kwargs):
+            return self.call(route(kwargs), messages, *args, **kwargs)
+
+        async def routed_acall(messages, *args, **kwargs):
+            return await self.acall(route(kwargs), messages, *args, **kwargs)
+
+        agent_llm.call = routed_call
+        agent_llm.acall = routed_acall
+        return agent_llm
+
+    def report(self):
+        print("\n# Modelos por nivel")
+        total_cost = 0.0
+        for tier, llm in list(self._llms.items()):
+            stats = self._stats[tier]
+            usage = llm.get_token_usage_summary()
+            prices = self.tiers[tier].get("cost_per_million") or {}
+            cost = None
+            if prices.get("input") is not None and prices.get("output") is not None:
+                cost = (usage.prompt_tokens * prices["input"] + usage.completion_tokens * prices["output"]) / 1e6
+                total_cost += cost
+            latency = stats["seconds"] / stats["calls"] if stats["calls"] else 0.0
+            print(
+                f"    - {tier} ({llm.model}): {stats['calls']} llamadas, {latency:.2f} s de media, "
+                f"{usage.prompt_tokens} tokens de entrada, {usage.completion_tokens} de salida, "
+                f"{stats['failures']} fallos, {stats['fallbacks']} llamadas recibidas por fallback, "
+                f"coste {'n/d' if cost is None else f'${cost:.4f}'}"
+            )
+        print(f"    Coste total conocido: ${total_cost:.4f}")
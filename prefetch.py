@@ -0,0 +1,100 @@
+"""Contexto del repositorio precargado para cada documento del plan.
+
+El plan indica, por documento, los archivos o directorios (source_files) y
+los símbolos (symbols) que necesita. Antes de lanzar documentation_crew se
+leen de una vez desde el RepoIndex y se comprimen dentro de un presupuesto de
+tokens: los símbolos pedidos se incluyen completos, los archivos pequeños
+también y de los grandes solo se da el esquema (firmas de clases y funciones
+y las primeras líneas). El resultado se pasa a draft_documentation como
+{source_context}, de modo que overview_writer no tiene que redescubrir el
+repositorio con una llamada a herramienta por archivo.
+"""
+
+from context_budget import count_tokens
+from doc_manifest import doc_sources
+from repo_index import MAX_READ_LINES
+
+PREFETCH_TOKENS = 6000  # Presupuesto total del contexto precargado por documento
+FILE_TOKENS = 1500  # Por encima, de un archivo solo se incluye su esquema
+OUTLINE_HEAD_LINES = 20
+MAX_SYMBOL_MATCHES = 3
+
+
+def _expand(repo_index, sources):
+    """Archivos de texto indexados bajo las rutas dadas, sin duplicados"""
+    paths = []
+    for source in sources:
+        rel = repo_index.relative(source)
+        if rel in repo_index.files:
+            paths.append(rel)
+        elif rel:
+            paths += [entry.path for entry in repo_index.list_dir(rel, recursive=True)[1]]
+    seen = set()
+    return [
+        p for p in paths
+        if not (p in seen or seen.add(p))
+        and repo_index.files[p].language not in ("binary", "other") and repo_index.files[p].lines
+    ]
+
+
+def _find_symbols(repo_index, name):
+    # Primero coincidencias exactas (o Clase.metodo), después por subcadena
+    name = name.strip().split("(")[0]
+    if not name:
+        return []
+    exact = [s for s in repo_index.symbols if s.name == name or s.name.endswith("." + name)]
+    return (exact or repo_index.find_symbols(name))[:MAX_SYMBOL_MATCHES]
+
+
+def _symbol_section(repo_index, symbol):
+    body = repo_index.read_range(symbol.path, symbol.lineno, symbol.end_lineno)
+    return f"### {symbol.path}: {symbol.kind} {symbol.name}\n```\n{body}\n```"
+
+
+def _file_section(repo_index, path):
+    entry = repo_index.files[path]
+    if entry.lines <= MAX_READ_LINES:
+        content = repo_index.read_range(path, 1, entry.lines)
+        if count_tokens(content) <= FILE_TOKENS:
+            return f"### {path}\n```\n{content}\n```"
+    # Archivo grande: esquema con las firmas y el comienzo del archivo
+    outline = [
+        f"{s.lineno:>5} | {s.signature}" + (f"  # {s.doc}" if s.doc else "")
+        for s in repo_index.symbols if s.path == path
+    ]
+    head = repo_index.read_range(path, 1, OUTLINE_HEAD_LINES)
+    parts = [f"### {path} ({entry.lines} lines, outline only)", f"```\n{head}\n```"]
+    if outline:
+        parts.append("Definitions:\n```\n" + "\n".join(outline) + "\n```")
+    return "\n".join(parts)
+
+
+def prefetch_context(doc, repo_index, repo_path, budget=PREFETCH_TOKENS):
+    """Contexto comprimido (Markdown) con los símbolos y archivos que usa doc"""
+    sections, seen, skipped = [], set(), []
+    used = 0
+
+    def add(key, build):
+        nonlocal used
+        if key in seen:
+            return
+        seen.add(key)
+        section = build()
+        tokens = count_tokens(section)
+        if used + tokens > budget:
+            skipped.append(key)
+            return
+        sections.append(section)
+        used += tokens
+
+    for name in doc.symbols:
+        for symbol in _find_symbols(repo_index, name):
+            add(f"{symbol.path}:{symbol.name}", lambda s=symbol: _symbol_section(repo_index, s))
+    for path in _expand(repo_index, doc_sources(doc, repo_path)):
+        add(path, lambda p=path: _file_section(repo_index, p))
+
+    if not sections:
+        return "No context was prefetched for this document; explore the repository with your tools."
+    if skipped:
+        sections.append("Also relevant (not included, read them with your tools if needed): " + ", ".join(skipped))
+    return "\n\n".join(sections)
@@ -0,0 +1,270 @@
+"""Limitador de peticiones y concurrencia adaptativa para las llamadas al LLM.
+
+RateLimiter combina tres controles, compartidos por todos los hilos que usan
+el mismo limitador:
+
+- Un token bucket de peticiones por minuto y otro de tokens por minuto (la
+  estimación del prompt más max_tokens, que es lo que cuentan los endpoints
+  compatibles con OpenAI).
+- Concurrencia adaptativa AIMD: el número de llamadas simultáneas crece en
+  1/límite con cada respuesta correcta y se reduce a la mitad ante un 429 o
+  un error 5xx.
+- Reintentos con backoff exponencial que respetan la cabecera Retry-After;
+  mientras dura la espera ninguna otra llamada del limitador sale al endpoint.
+
+Las corrutinas (llm.acall) pasan por los mismos controles con acall y
+acquire_async, que esperan en el bucle de eventos en lugar de en un hilo.
+
+limited(llm) envuelve un LLM con el limitador compartido de su proveedor
+(nvidia_nim, cerebras, groq, openai...), configurable con las variables de
+entorno <PROVEEDOR>_RPM, <PROVEEDOR>_TPM y <PROVEEDOR>_MAX_CONCURRENCY o sus
+equivalentes globales LLM_RPM, LLM_TPM y LLM_MAX_CONCURRENCY. Al envolverlo
+se desactivan los reintentos del cliente del proveedor: si no, el SDK
+reintentaría los 429 por su cuenta y el limitador nunca los vería.
+"""
+
+import asyncio
+import email.utils
+import json
+import os
+import random
+import threading
+import time
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+ASYNC_POLL = 0.05  # Segundos entre comprobaciones de cupo en acquire_async
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0  # Tokens repuestos por segundo
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self, amount, now):
+        """Consume amount si hay saldo; si no, devuelve los segundos que faltan"""
+        # Una petición mayor que la capacidad esperaría para siempre
+        amount = min(amount, self.capacity)
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+
+def _status_code(error):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def retry_after(error):
+    """Segundos indicados por Retry-After (o retry-after-ms) en la respuesta del error"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            # Formato fecha HTTP
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def disable_client_retries(llm):
+    """Quita los reintentos propios del cliente del LLM para que los 429/5xx lleguen al limitador"""
+    if "max_retries" in getattr(type(llm), "model_fields", {}):
+        # Proveedores nativos (OpenAI, Cerebras...): el cliente se creó con max_retries
+        # y se vuelve a crear, con la nueva configuración, en la siguiente llamada
+        llm.max_retries = 0
+        if hasattr(llm, "_build_sync_client"):
+            llm._client = None
+            llm._async_client = None
+    elif isinstance(getattr(llm, "additional_params", None), dict):
+        llm.additional_params["max_retries"] = 0  # LLM sobre litellm (groq, nvidia_nim...)
+
+
+def estimate_tokens(messages, max_tokens=0):
+    """Estimación barata de tokens: ~4 caracteres por token más la respuesta máxima"""
+    text = messages if isinstance(messages, str) else json.dumps(messages, default=str)
+    return len(text) // 4 + (max_tokens or 0)
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, max_concurrency=8,
+                 min_concurrency=1, max_retries=5, base_backoff=1.0, max_backoff=60.0):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = float(max_concurrency)
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.in_flight = 0
+        self.throttled = 0
+        self.retries = 0
+        self._blocked_until = 0.0
+        self._cond = threading.Condition()
+
+    def _reserve(self, tokens):
+        """Toma cupo si lo hay (0.0); si no, segundos a esperar (None = hasta que termine otra llamada)"""
+        now = time.monotonic()
+        wait = self._blocked_until - now
+        if wait <= 0 and self.in_flight >= int(self.concurrency):
+            return None
+        if wait <= 0 and self.requests:
+            wait = self.requests.take(1, now)
+        if wait <= 0 and self.tokens and tokens:
+            wait = self.tokens.take(tokens, now)
+            if wait > 0 and self.requests:
+                self.requests.tokens += 1  # Devolver la petición ya descontada
+        if wait <= 0:
+            self.in_flight += 1
+            return 0.0
+        return wait
+
+    def acquire(self, tokens=0):
+        """Bloquea hasta que haya cupo de concurrencia, peticiones y tokens"""
+        with self._cond:
+            while True:
+                wait = self._reserve(tokens)
+                if wait == 0.0:
+                    return
+                self._cond.wait(wait)
+
+    async def acquire_async(self, tokens=0):
+        """Como acquire, pero espera con asyncio.sleep sin ocupar un hilo"""
+        while True:
+            with self._cond:
+                wait = self._reserve(tokens)
+            if wait == 0.0:
+                return
+            await asyncio.sleep(ASYNC_POLL if wait is None else min(wait, 1.0))
+
+    def release(self, throttled=False):
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+            else:
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+            self._cond.notify_all()
+
+    def _backoff(self, error, attempt):
+        delay = retry_after(error)
+        if delay is None:
+            delay = min(self.max_backoff, self.base_backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+        with self._cond:
+            self.throttled += 1
+            # Pausa común: el resto de llamadas tampoco debe salir antes de Retry-After
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            self._cond.notify_all()
+        return delay
+
+    def call(self, fn, *args, tokens=0, **kwargs):
+        """Ejecuta fn bajo el limitador, reintentando los 429 y 5xx"""
+        attempt = 0
+        while True:
+            self.acquire(tokens)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                status = _status_code(e)
+                retryable = status in RETRYABLE_STATUS
+                self.release(throttled=retryable)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(e, attempt)
+                print(f"# LLM respondió {status}; reintento {attempt + 1}/{self.max_retries} en {delay:.1f}s")
+                self.retries += 1
+                attempt += 1
+                continue
+            self.release()
+            return result
+
+    async def acall(self, fn, *args, tokens=0, **kwargs):
+        """Versión asíncrona de call para corrutinas como llm.acall"""
+        attempt = 0
+        while True:
+            await self.acquire_async(tokens)
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                status = _status_code(e)
+                retryable = status in RETRYABLE_STATUS
+                self.release(throttled=retryable)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(e, attempt)
+                print(f"# LLM respondió {status}; reintento {attempt + 1}/{self.max_retries} en {delay:.1f}s")
+                self.retries += 1
+                attempt += 1
+                continue
+            except BaseException:
+                self.release()  # Tarea cancelada: liberar el cupo
+                raise
+            self.release()
+            return result
+
+    def wrap(self, llm):
+        """Envuelve llm.call y llm.acall para que cada petición pase por el limitador"""
+        disable_client_retries(llm)
+        call, acall = llm.call, llm.acall
+
+        def limited_call(messages, *args, **kwargs):
+            tokens = estimate_tokens(messages, getattr(llm, "max_tokens", 0))
+            return self.call(call, messages, *args, tokens=tokens, **kwargs)
+
+        async def limited_acall(messages, *args, **kwargs):
+            tokens = estimate_tokens(messages, getattr(llm, "max_tokens", 0))
+            return await self.acall(acall, messages, *args, tokens=tokens, **kwargs)
+
+        llm.call = limited_call
+        llm.acall = limited_acall
+        return llm
+
+    def stats(self):
+        with self._cond:
+            return {
+                "concurrency": round(self.concurrency, 2),
+                "throttled": self.throttled,
+                "retries": self.retries,
+            }
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def _env_int(provider, name):
+    value = os.environ.get(f"{provider.upper()}_{name}") or os.environ.get(f"LLM_{name}")
+    return int(value) if value else None
+
+
+def shared_limiter(provider, **kwargs):
+    """Limitador único por proveedor; kwargs solo se usan al crearlo"""
+    with _shared_lock:
+        if provider not in _shared:
+            settings = {
+                "requests_per_minute": _env_int(provider, "RPM"),
+                "tokens_per_minute": _env_int(provider, "TPM"),
+                "max_concurrency": _env_int(provider, "MAX_CONCURRENCY"),
+            }
+            settings.update({k: v for k, v in kwargs.items() if v is not None})
+            _shared[provider] = RateLimiter(**{k: v for k, v in settings.items() if v is not None})
+        return _shared[provider]
+
+
+def limited(llm, **kwargs):
+    """Envuelve llm con el limitador compartido de su proveedor"""
+    provider = getattr(llm, "provider", None) or "openai"
+    return shared_limiter(provider, **kwargs).wrap(llm)
@@ -0,0 +1,85 @@
+"""Clonado superficial, parcial y reutilizable de los repositorios a documentar.
+
+Por defecto se hace un clon de profundidad 1 sin blobs (--filter=blob:none) y
+con sparse-checkout, de modo que las imágenes y otros archivos multimedia, que
+los agentes ignoran, nunca se descargan. Si el checkout ya existe y apunta a
+la misma URL se actualiza con fetch + reset en lugar de volver a clonar.
+"""
+
+import shutil
+import subprocess
+from pathlib import Path
+
+# Archivos que las tareas piden ignorar: no se descargan con sparse-checkout
+MEDIA_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.bmp", "*.ico", "*.svg", "*.webp",
+    "*.mp4", "*.mov", "*.avi", "*.webm", "*.mp3", "*.wav", "*.pdf",
+]
+
+
+def _git(*args, cwd=None):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def repo_name(url):
+    """Directorio de checkout (propietario/nombre) para una URL o ruta de repositorio.
+
+    Incluye el propietario para que org-a/api y org-b/api no compartan checkout
+    ni carpeta de documentación.
+    """
+    parts = url.rstrip("/").replace(":", "/").split("/")
+    name = parts[-1][:-4] if parts[-1].endswith(".git") else parts[-1]
+    owner = parts[-2] if len(parts) > 1 else ""
+    return name if owner in ("", ".", "..") else f"{owner}/{name}"
+
+
+def sparse_patterns(paths=None):
+    """Patrones sparse-checkout (modo no-cone) para las rutas pedidas, sin multimedia"""
+    include = [f"/{p.strip('/')}" for p in paths] if paths else ["/*"]
+    return include + [f"!{pattern}" for pattern in MEDIA_PATTERNS]
+
+
+def _origin_url(dest):
+    try:
+        return _git("config", "--get", "remote.origin.url", cwd=dest)
+    except subprocess.CalledProcessError:
+        return None
+
+
+def _fetch_args(shallow):
+    return ["--depth", "1", "--filter=blob:none"] if shallow else []
+
+
+def clone_or_update(url, dest, shallow=True, sparse=True, sparse_paths=None):
+    """Deja en dest un checkout actualizado de url y devuelve su ruta.
+
+    Args:
+        url: URL o ruta local del repositorio (sirve un repositorio bare local).
+        dest: Directorio del checkout.
+        shallow: Clon de profundidad 1 y parcial (sin blobs hasta el checkout).
+        sparse: Activar sparse-checkout excluyendo archivos multimedia.
+        sparse_paths: Limitar el checkout a estas rutas del repositorio.
+    """
+    dest = Path(dest)
+
+    if (dest / ".git").exists() and _origin_url(dest) == url:
+        print(f"# Reutilizando el checkout existente en {dest}\n")
+        _git("fetch", *_fetch_args(shallow), "origin", "HEAD", cwd=dest)
+        if sparse:
+            _git("sparse-checkout", "set", "--no-cone", *sparse_patterns(sparse_paths), cwd=dest)
+        else:
+            _git("sparse-checkout", "disable", cwd=dest)
+        _git("reset", "--hard", "FETCH_HEAD", cwd=dest)
+        _git("clean", "-fdx", cwd=dest)
+        return dest
+
+    if dest.exists():
+        print(f"# El directorio {dest} no es un checkout de {url}, se elimina\n")
+        shutil.rmtree(dest)
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    _git("clone", *_fetch_args(shallow), "--no-checkout", url, str(dest))
+    if sparse:
+        _git("sparse-checkout", "set", "--no-cone", *sparse_patterns(sparse_paths), cwd=dest)
+    _git("checkout", cwd=dest)
+    return dest
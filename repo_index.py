@@ -0,0 +1,247 @@
+"""Índice en memoria del repositorio clonado y herramienta para consultarlo.
+
+El índice se construye una sola vez después de clone_repo: árbol de archivos,
+tamaños, lenguaje, tabla de símbolos (clases y funciones de Python vía ast) y
+offsets de bloques de líneas. Los agentes lo consultan con
+RepositoryIndexTool en lugar de recorrer el disco y volcar archivos completos.
+"""
+
+import ast
+import mmap
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from repo_clone import MEDIA_PATTERNS
+
+CHUNK_LINES = 50  # Líneas por bloque indexado
+MAX_READ_LINES = 200  # Límite de líneas por lectura para acotar el prompt
+MAX_LIST_ENTRIES = 300
+IGNORED_DIRS = {".git", "__pycache__"}
+MEDIA_SUFFIXES = {pattern[1:] for pattern in MEDIA_PATTERNS}
+
+LANGUAGES = {
+    ".py": "python", ".ipynb": "jupyter", ".js": "javascript", ".jsx": "javascript",
+    ".ts": "typescript", ".tsx": "typescript", ".go": "go", ".rs": "rust",
+    ".java": "java", ".kt": "kotlin", ".c": "c", ".h": "c", ".cpp": "cpp",
+    ".hpp": "cpp", ".cs": "csharp", ".rb": "ruby", ".php": "php", ".sh": "shell",
+    ".md": "markdown", ".mdx": "markdown", ".rst": "rst", ".txt": "text",
+    ".yaml": "yaml", ".yml": "yaml", ".json": "json", ".toml": "toml",
+    ".csv": "csv", ".cfg": "ini", ".ini": "ini", ".html": "html", ".css": "css", ".sql": "sql",
+}
+
+
+@dataclass
+class Symbol:
+    name: str  # Nombre calificado, p. ej. Clase.metodo
+    kind: str  # class, function o method
+    path: str
+    lineno: int
+    end_lineno: int
+    signature: str = ""
+    doc: str = ""
+
+
+@dataclass
+class FileEntry:
+    path: str
+    size: int
+    language: str
+    lines: int = 0
+    # Offset en bytes del inicio de cada bloque de CHUNK_LINES líneas
+    chunk_offsets: List[int] = field(default_factory=list)
+
+
+def _language(path):
+    if path.name.lower() == "dockerfile":
+        return "dockerfile"
+    return LANGUAGES.get(path.suffix.lower(), "other")
+
+
+def _signature(node):
+    args = [a.arg for a in node.args.posonlyargs + node.args.args]
+    if node.args.vararg:
+        args.append("*" + node.args.vararg.arg)
+    args += [a.arg for a in node.args.kwonlyargs]
+    if node.args.kwarg:
+        args.append("**" + node.args.kwarg.arg)
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    return f"{prefix} {node.name}({', '.join(args)})"
+
+
+def python_symbols(source, path):
+    """Clases y funciones definidas en un archivo Python"""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+
+    symbols = []
+
+    def visit(node, parent=None):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                name = f"{parent}.{child.name}" if parent else child.name
+                if isinstance(child, ast.ClassDef):
+                    kind = "class"
+                    signature = f"class {child.name}"
+                else:
+                    kind = "method" if parent else "function"
+                    signature = _signature(child)
+                doc = (ast.get_docstring(child) or "").strip().split("\n")[0]
+                symbols.append(Symbol(name, kind, path, child.lineno, child.end_lineno or child.lineno, signature, doc))
+                visit(child, name)
+
+    visit(tree)
+    return symbols
+
+
+class RepoIndex:
+    def __init__(self):
+        self.root: Optional[Path] = None
+        self.files: dict[str, FileEntry] = {}
+        self.symbols: List[Symbol] = []
+        self._lock = threading.Lock()
+
+    def build(self, repo_path):
+        """(Re)construye el índice recorriendo el repositorio una sola vez"""
+        root = Path(repo_path)
+        files, symbols = {}, []
+        for path in sorted(root.rglob("*")):
+            rel = path.relative_to(root)
+            if IGNORED_DIRS.intersection(rel.parts) or not path.is_file() or path.suffix.lower() in MEDIA_SUFFIXES:
+                continue
+            data = path.read_bytes()
+            entry = FileEntry(rel.as_posix(), len(data), _language(path))
+            if b"\0" not in data[:8192]:
+                # Mismo criterio de fin de línea que mmap.readline en read_range
+                entry.chunk_offsets = [0]
+                pos = lineno = 0
+                while (newline := data.find(b"\n", pos)) != -1:
+                    lineno += 1
+                    pos = newline + 1
+                    if lineno % CHUNK_LINES == 0:
+                        entry.chunk_offsets.append(pos)
+                entry.lines = lineno + (1 if pos < len(data) else 0)
+                if entry.language == "python":
+                    symbols += python_symbols(data, entry.path)
+            else:
+                entry.language = "binary"
+            files[entry.path] = entry
+
+        with self._lock:
+            self.root, self.files, self.symbols = root, files, symbols
+        return self
+
+    def relative(self, path):
+        """Normaliza rutas absolutas o prefijadas con la raíz del repositorio"""
+        path = str(path).strip()
+        if Path(path).is_absolute():
+            try:
+                rel = Path(path).relative_to(self.root.resolve()).as_posix()
+                return "" if rel == "." else rel
+            except ValueError:
+                pass
+        while path.startswith("./"):
+            path = path[2:]
+        root = self.root.as_posix().strip("/") + "/"
+        idx = path.find(root)
+        if idx == 0 or (idx > 0 and path[idx - 1] == "/"):
+            path = path[idx + len(root):]
+        elif path.strip("/") == root.strip("/"):
+            path = ""
+        return path.strip("/")
+
+    def list_dir(self, path="", recursive=False):
+        """Entradas del índice bajo path (un nivel, o todo el subárbol)"""
+        prefix = self.relative(path)
+        prefix = f"{prefix}/" if prefix else ""
+        entries, dirs = [], set()
+        for rel, entry in self.files.items():
+            if not rel.startswith(prefix):
+                continue
+            rest = rel[len(prefix):]
+            if not recursive and "/" in rest:
+                dirs.add(rest.split("/")[0] + "/")
+            else:
+                entries.append(entry)
+        return sorted(dirs), entries
+
+    def find_symbols(self, query):
+        query = query.lower()
+        return [s for s in self.symbols if query in s.name.lower()]
+
+    def read_range(self, path, start_line=1, end_line=None):
+        """Lee las líneas [start_line, end_line] usando los offsets de bloque"""
+        entry = self.files[self.relative(path)]
+        start_line = max(1, start_line)
+        if entry.language == "binary" or start_line > entry.lines:
+            return ""
+        end_line = min(entry.lines, end_line or entry.lines, start_line + MAX_READ_LINES - 1)
+        chunk = (start_line - 1) // CHUNK_LINES
+        with open(self.root / entry.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            mm.seek(entry.chunk_offsets[chunk])
+            lineno = chunk * CHUNK_LINES
+            lines = []
+            while lineno < end_line:
+                line = mm.readline()
+                if not line:
+                    break
+                lineno += 1
+                if lineno >= start_line:
+                    lines.append(f"{lineno:>5} | {line.decode('utf-8', 'replace').rstrip()}")
+        return "\n".join(lines)
+
+    def summary(self):
+        return f"{len(self.files)} archivos, {len(self.symbols)} símbolos"
+
+
+class RepositoryIndexToolInput(BaseModel):
+    """Input schema for RepositoryIndexTool."""
+    action: str = Field(..., description="One of 'list', 'symbols' or 'read'.")
+    path: str = Field("", description="Repository-relative file or directory path (for 'list' and 'read').")
+    query: str = Field("", description="Symbol name or part of it (for 'symbols').")
+    start_line: int = Field(1, description="First line to read (for 'read').")
+    end_line: int = Field(0, description=f"Last line to read, 0 = up to {MAX_READ_LINES} lines (for 'read').")
+    recursive: bool = Field(False, description="List the whole subtree instead of one level (for 'list').")
+
+
+class RepositoryIndexTool(BaseTool):
+    name: str = "Repository index"
+    description: str = (
+        "Query a pre-built index of the repository being documented. "
+        "action='list' lists files (size, language, lines) under a directory; "
+        "action='symbols' finds Python classes and functions by name with their location and signature; "
+        "action='read' returns a numbered line range of a file. "
+        "Prefer symbol lookups and small line ranges over reading whole files."
+    )
+    args_schema: Type[BaseModel] = RepositoryIndexToolInput
+    index: RepoIndex = Field(default_factory=RepoIndex, exclude=True)
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _run(self, action: str, path: str = "", query: str = "", start_line: int = 1,
+             end_line: int = 0, recursive: bool = False) -> str:
+        if self.index.root is None:
+            return "The repository index has not been built yet."
+        if action == "list":
+            dirs, entries = self.index.list_dir(path, recursive)
+            lines = dirs + [f"{e.path} ({e.size} bytes, {e.language}, {e.lines} lines)" for e in entries]
+            if len(lines) > MAX_LIST_ENTRIES:
+                lines = lines[:MAX_LIST_ENTRIES] + [f"... {len(lines) - MAX_LIST_ENTRIES} more entries"]
+            return "\n".join(lines) or f"No files under '{path}'."
+        if action == "symbols":
+            symbols = self.index.find_symbols(query)[:MAX_LIST_ENTRIES]
+            return "\n".join(
+                f"{s.kind} {s.name} {s.path}:{s.lineno}-{s.end_lineno} {s.signature}" + (f" - {s.doc}" if s.doc else "")
+                for s in symbols
+            ) or f"No symbols matching '{query}'."
+        if action == "read":
+            if self.index.relative(path) not in self.index.files:
+                return f"File '{path}' is not in the repository index."
+            return self.index.read_range(path, start_line, end_line or None)
+        return f"Unknown action '{action}'. Use 'list', 'symbols' or 'read'."
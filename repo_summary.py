@@ -0,0 +1,238 @@
+"""Mapa resumido del repositorio para planificar repositorios grandes (map-reduce).
+
+En repositorios con miles de archivos code_explorer solo llega a ver una parte
+antes de agotar sus iteraciones. En su lugar:
+
+1. map: cada directorio con código se resume a partir de su esquema (archivos,
+   firmas y docstrings del RepoIndex). Los directorios pequeños se agrupan en
+   una misma llamada hasta MAP_TOKENS y las llamadas se hacen en paralelo con
+   concurrencia acotada.
+2. reduce: si el árbol de resúmenes no cabe en TREE_TOKENS, los subárboles más
+   profundos se condensan en un único resumen, nivel a nivel, hasta que cabe.
+
+Cada resumen se guarda en .cache/repo_summaries con una clave derivada del
+contenido (sha256 de los archivos del directorio o de los resúmenes de sus
+hijos), así que en una nueva ejecución solo se vuelven a resumir los
+directorios que cambiaron. El árbol resultante se pasa a documentation_planner
+como {repo_summary}.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+from collections import defaultdict
+from pathlib import Path
+
+from context_budget import count_tokens
+
+DEFAULT_CACHE_DIR = Path(".cache/repo_summaries")
+PROMPT_VERSION = 1  # Cambiarlo invalida los resúmenes guardados
+MAP_TOKENS = 3000  # Entrada máxima de una llamada de resumen
+TREE_TOKENS = 6000  # Tamaño máximo del mapa que recibe documentation_planner
+FILE_SYMBOLS = 12  # Firmas por archivo en el esquema de un directorio
+SUMMARY_WORDS = 60
+
+MAP_PROMPT = """You are summarising part of a large code repository so that a documentation planner can understand it without reading the code.
+For each directory below, write exactly one line formatted as
+<directory>: <summary>
+The summary (at most {words} words) must say what the directory is responsible for, name its main classes or functions and how it relates to the rest of the project.
+
+{outlines}"""
+
+REDUCE_PROMPT = """Below are summaries of `{path}` and its sub-directories in a code repository.
+Write a single summary of `{path}` (at most {words} words) covering its purpose, its main components and how they interact. Reply with the summary only.
+
+{children}"""
+
+LINE_RE = re.compile(r"^[\s\-*`]*(?P<path>[^:`]+?)/?`?\s*:\s*(?P<summary>.+)$")
+
+
+def _parent(path):
+    return path.rsplit("/", 1)[0] if "/" in path else ""
+
+
+def _depth(path):
+    return path.count("/") + 1 if path else 0
+
+
+def _label(path):
+    return f"{path}/" if path else "./"
+
+
+def _unlabel(label):
+    label = label.strip().strip("`").rstrip("/")
+    if label.startswith("./"):
+        label = label[2:]
+    return "" if label == "." else label
+
+
+def _hidden(path, collapsed):
+    # Los descendientes de un directorio condensado no se muestran
+    return any(path != c and (c == "" or path.startswith(f"{c}/")) for c in collapsed)
+
+
+def _key(*parts):
+    return hashlib.sha256(json.dumps([PROMPT_VERSION, *parts]).encode()).hexdigest()
+
+
+class RepoSummarizer:
+    def __init__(self, llm, cache_dir=DEFAULT_CACHE_DIR, concurrency=8, tree_tokens=TREE_TOKENS):
+        self.llm = llm
+        self.cache_dir = Path(cache_dir)
+        self.tree_tokens = tree_tokens
+        self.concurrency = concurrency
+        self.calls = 0
+        self.cached = 0
+
+    # --- caché por contenido ---
+
+    def _load(self, key):
+        path = self.cache_dir / f"{key}.json"
+        if not path.exists():
+            return None
+        self.cached += 1
+        return json.loads(path.read_text())["summary"]
+
+    def _store(self, key, directory, summary):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        (self.cache_dir / f"{key}.json").write_text(json.dumps({"path": directory, "summary": summary}))
+
+    async def _call(self, slots, prompt):
+        async with slots:
+            self.calls += 1
+            response = await self.llm.acall([{"role": "user", "content": prompt}])
+        return str(response).strip()
+
+    # --- map: esquema y resumen de cada directorio ---
+
+    def _outline(self, repo_index, directory, paths, symbols):
+        lines, used = [f"## {_label(directory)}"], 0
+        for n, path in enumerate(paths):
+            entry = repo_index.files[path]
+            block = [f"- {path} ({entry.language}, {entry.lines} lines)"]
+            block += [
+                f"    {s.signature}" + (f"  # {s.doc}" if s.doc else "")
+                for s in symbols.get(path, [])[:FILE_SYMBOLS]
+            ]
+            if path not in symbols:
+                block += [f"    {line}" for line in repo_index.read_range(path, 1, 3).splitlines()]
+            tokens = count_tokens("\n".join(block))
+            if used + tokens > MAP_TOKENS and n:
+                lines.append(f"- ... and {len(paths) - n} more files")
+                break
+            lines += block
+            used += tokens
+        return "\n".join(lines)
+
+    def _fallback(self, paths):
+        names = ", ".join(Path(p).name for p in paths[:8])
+        return f"{len(paths)} files: {names}" + (", ..." if len(paths) > 8 else "")
+
+    async def _map(self, slots, batch):
+        """Resume un lote de directorios [(directorio, clave, archivos, esquema)]"""
+        outlines = "\n\n".join(outline for _, _, _, outline in batch)
+        text = await self._call(slots, MAP_PROMPT.format(words=SUMMARY_WORDS, outlines=outlines))
+        found = {}
+        for line in text.splitlines():
+            match = LINE_RE.match(line)
+            if match:
+                found[_unlabel(match["path"])] = match["summary"].strip()
+        summaries = {}
+        for directory, key, paths, _ in batch:
+            summary = found.get(directory) or (text if len(batch) == 1 else self._fallback(paths))
+            await asyncio.to_thread(self._store, key, directory, summary)
+            summaries[directory] = summary
+        return summaries
+
+    # --- reduce y árbol final ---
+
+    def _tree(self, nodes, counts, summaries, collapsed):
+        lines = []
+        for path in sorted(nodes):
+            if _hidden(path, collapsed):
+                continue
+            summary = summaries.get(path, "")
+            lines.append(f"{'  ' * _depth(path)}{_label(path)} ({counts[path]} files)" + (f": {summary}" if summary else ""))
+        return "\n".join(lines)
+
+    async def _reduce(self, slots, path, nodes, counts, summaries, collapsed):
+        subtree = [n for n in nodes if n == path or n.startswith(f"{path}/") or path == ""]
+        children = self._tree(subtree, counts, summaries, collapsed)
+        key = _key(str(getattr(self.llm, "model", "")), "reduce", path, children)
+        summary = await asyncio.to_thread(self._load, key)
+        if summary is None:
+            prompt = REDUCE_PROMPT.format(path=_label(path), words=SUMMARY_WORDS * 2, children=children)
+            summary = await self._call(slots, prompt)
+            await asyncio.to_thread(self._store, key, path, summary)
+        summaries[path] = summary
+        collapsed.add(path)
+
+    def _prepare(self, repo_index, file_hashes):
+        """Resúmenes ya en caché, lotes de directorios por resumir y directorios con código"""
+        model = str(getattr(self.llm, "model", ""))
+        symbols = defaultdict(list)
+        for symbol in repo_index.symbols:
+            if symbol.kind != "method":
+                symbols[symbol.path].append(symbol)
+        by_dir = defaultdict(list)
+        for path, entry in repo_index.files.items():
+            if entry.language not in ("binary", "other") and entry.lines:
+                by_dir[_parent(path)].append(path)
+
+        # Directorios con resumen en caché y lotes para los que faltan
+        summaries, batches, batch, used = {}, [], [], 0
+        for directory in sorted(by_dir):
+            paths = by_dir[directory]
+            key = _key(model, "map", directory, [(p, file_hashes.get(p)) for p in paths])
+            summary = self._load(key)
+            if summary is not None:
+                summaries[directory] = summary
+                continue
+            outline = self._outline(repo_index, directory, paths, symbols)
+            tokens = count_tokens(outline)
+            if batch and used + tokens > MAP_TOKENS:
+                batches.append(batch)
+                batch, used = [], 0
+            batch.append((directory, key, paths, outline))
+            used += tokens
+        if batch:
+            batches.append(batch)
+        return summaries, batches, by_dir
+
+    async def summarize(self, repo_index, file_hashes):
+        """Árbol de resúmenes por directorio que cabe en tree_tokens"""
+        # Esquemas y lecturas de la caché fuera del event loop
+        summaries, batches, by_dir = await asyncio.to_thread(self._prepare, repo_index, file_hashes)
+        slots = asyncio.Semaphore(max(1, self.concurrency))
+        for result in await asyncio.gather(*(self._map(slots, b) for b in batches)):
+            summaries.update(result)
+
+        # Todos los directorios con código y sus antecesores, con archivos por subárbol
+        nodes, counts = set(), defaultdict(int)
+        for directory, paths in by_dir.items():
+            path = directory
+            while True:
+                nodes.add(path)
+                counts[path] += len(paths)
+                if not path:
+                    break
+                path = _parent(path)
+
+        # Condensar los subárboles más profundos hasta que el mapa quepa
+        collapsed = set()
+        tree = self._tree(nodes, counts, summaries, collapsed)
+        while count_tokens(tree) > self.tree_tokens:
+            parents = {_parent(n) for n in nodes if n and n not in collapsed and not _hidden(n, collapsed)}
+            if not parents:
+                break
+            depth = max(_depth(p) for p in parents)
+            await asyncio.gather(*(
+                self._reduce(slots, p, nodes, counts, summaries, collapsed)
+                for p in parents if _depth(p) == depth
+            ))
+            tree = self._tree(nodes, counts, summaries, collapsed)
+        return tree
+
+    def report(self):
+        return f"{self.calls} llamadas al LLM, {self.cached} resúmenes de la caché"
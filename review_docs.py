@@ -1,40 +1,156 @@
 from pathlib import Path
+import hashlib
+import json
+import re
 import sys
 from rich.console import Console
 from rich.markdown import Markdown
+from rich.text import Text
+
+from docs_search import DocsSearchIndex, terms
 
 console = Console()
 
+RENDER_CACHE_DIR = Path(".cache/review_docs")
+CHUNK_LINES = 200  # Tamaño máximo de un fragmento que se renderiza de una vez
+HEADING_RE = re.compile(r"^#{1,6}\s")
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+
+def split_chunks(content):
+    """Divide el Markdown en fragmentos por título (o cada CHUNK_LINES líneas) sin cortar bloques de código"""
+    chunks, lines, fenced = [], [], False
+    for line in content.splitlines():
+        if FENCE_RE.match(line):
+            fenced = not fenced
+        boundary = not fenced and (HEADING_RE.match(line) or (len(lines) >= CHUNK_LINES and not line.strip()))
+        if boundary and "".join(lines).strip():
+            chunks.append("\n".join(lines))
+            lines = []
+        lines.append(line)
+    if "".join(lines).strip():
+        chunks.append("\n".join(lines))
+    return chunks
+
+class RenderedDoc:
+    """Documento renderizado bajo demanda, fragmento a fragmento, con caché en disco por mtime"""
+
+    def __init__(self, doc_path):
+        self.doc_path = doc_path
+        stat = doc_path.stat()
+        self.key = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "width": console.width}
+        name = hashlib.sha256(str(doc_path.resolve()).encode()).hexdigest()[:32]
+        self.cache_path = RENDER_CACHE_DIR / f"{name}.json"
+        self.chunks = self._load_cache()
+        self.sources = None
+        self.lines = []
+        self.next_chunk = 0
+        self.dirty = False
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return data["chunks"] if data.get("key") == self.key else None
+
+    def save(self):
+        if self.dirty:
+            RENDER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_path, "w") as f:
+                json.dump({"key": self.key, "chunks": self.chunks}, f)
+            self.dirty = False
+
+    @property
+    def complete(self):
+        return self.chunks is not None and self.next_chunk >= len(self.chunks)
+
+    def render_until(self, count):
+        """Renderiza fragmentos hasta tener al menos count líneas o llegar al final"""
+        if self.chunks is None:
+            self.sources = split_chunks(self.doc_path.read_text())
+            self.chunks = [None] * len(self.sources)
+        while len(self.lines) < count and not self.complete:
+            i = self.next_chunk
+            if self.chunks[i] is None:
+                if self.sources is None:
+                    self.sources = split_chunks(self.doc_path.read_text())
+                with console.capture() as capture:
+                    console.print(Markdown(self.sources[i]))
+                self.chunks[i] = capture.get()
+                self.dirty = True
+            self.lines.extend(self.chunks[i].splitlines())
+            self.next_chunk += 1
+        return self.lines[:count]
+
 def display_doc(doc_path):
-    """Muestra el contenido de un documento MDX como markdown formateado"""
+    """Muestra el contenido de un documento MDX como markdown formateado, página a página"""
     print(f"\n{'='*80}\n{doc_path.name}\n{'='*80}")
-    
-    # Leer el contenido y convertirlo a markdown
-    content = doc_path.read_text()
-    md = Markdown(content)
-    
-    # Mostrar con formato
-    console.print(md)
-
-def list_docs():
-    """Lista todos los documentos MDX en la carpeta docs"""
-    docs_dir = Path("docs")
-    if not docs_dir.exists():
-        print("Error: La carpeta 'docs' no existe")
-        return []
-    
-    docs = list(docs_dir.glob("*.mdx"))
+    doc = RenderedDoc(doc_path)
+    page_size = max(5, console.height - 4)
+    page = 0
+    try:
+        while True:
+            lines = doc.render_until((page + 1) * page_size + 1)
+            for line in lines[page * page_size:(page + 1) * page_size]:
+                sys.stdout.write(line + "\n")
+            last = len(lines) <= (page + 1) * page_size
+            if last and page == 0:
+                return
+            prompt = "[Enter] siguiente, [p] anterior, [q] salir" if not last else "[p] anterior, [Enter/q] salir"
+            answer = input(f"\n-- página {page + 1} -- {prompt}: ").strip().lower()
+            if answer == "q" or (last and answer != "p"):
+                return
+            page = max(0, page - 1) if answer == "p" else page + 1
+    finally:
+        doc.save()
+
+def list_docs(index):
+    """Lista todos los documentos MDX de la carpeta de documentación"""
+    docs = index.documents()
     if not docs:
-        print("No se encontraron archivos MDX en la carpeta docs")
+        print(f"No se encontraron archivos MDX en la carpeta {index.docs_dir}")
         return []
-    
+
     print("\nDocumentos encontrados:")
-    for i, doc in enumerate(docs, 1):
-        print(f"{i}. docs/{doc.name}")
-    return docs
+    for i, (name, title) in enumerate(docs, 1):
+        print(f"{i}. {index.docs_dir}/{name} - {title}")
+    return [index.docs_dir / name for name, _ in docs]
+
+def search_docs(index, query):
+    """Muestra los documentos que mejor coinciden con la búsqueda y devuelve sus rutas"""
+    results = index.search(query)
+    if not results:
+        print("No se encontraron documentos para esa búsqueda")
+        return []
+    words = terms(query)
+    for i, (score, name) in enumerate(results, 1):
+        console.print(Text(f"{i}. {name} - {index.files[name]['title']} ({score})", style="bold"))
+        snippet = Text(index.snippet(name, query))
+        snippet.highlight_words(words, style="bold yellow", case_sensitive=False)
+        console.print(Text("   ") + snippet)
+    return [index.docs_dir / name for _, name in results]
+
+def choose_doc(docs):
+    num = input(f"Ingrese el número del documento (1-{len(docs)}): ")
+    if not num.strip():
+        return
+    try:
+        index = int(num) - 1
+        if 0 <= index < len(docs):
+            display_doc(docs[index])
+        else:
+            print("Número inválido")
+    except ValueError:
+        print("Por favor ingrese un número válido")
 
 def main():
-    docs = list_docs()
+    docs_dir = Path(sys.argv[1] if len(sys.argv) > 1 else "docs")
+    if not docs_dir.exists():
+        print(f"Error: La carpeta '{docs_dir}' no existe")
+        return
+    index = DocsSearchIndex(docs_dir).load()
+    docs = list_docs(index)
     if not docs:
         return
 
@@ -42,31 +158,30 @@ def main():
         print("\nOpciones:")
         print("1. Ver un documento específico")
         print("2. Ver todos los documentos")
-        print("3. Salir")
-        
-        choice = input("\nElija una opción (1-3): ")
-        
+        print("3. Buscar en los documentos")
+        print("4. Salir")
+
+        choice = input("\nElija una opción (1-4): ")
+
         if choice == "1":
-            num = input(f"Ingrese el número del documento (1-{len(docs)}): ")
-            try:
-                index = int(num) - 1
-                if 0 <= index < len(docs):
-                    display_doc(docs[index])
-                else:
-                    print("Número inválido")
-            except ValueError:
-                print("Por favor ingrese un número válido")
-        
+            choose_doc(docs)
+
         elif choice == "2":
             for doc in docs:
                 display_doc(doc)
-                input("\nPresione Enter para continuar...")
-        
+                if input("\nPresione Enter para continuar (q para volver al menú)... ").strip().lower() == "q":
+                    break
+
         elif choice == "3":
+            results = search_docs(index.load(), input("Buscar: "))
+            if results:
+                choose_doc(results)
+
+        elif choice == "4":
             break
-        
+
         else:
             print("Opción inválida")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
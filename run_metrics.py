@@ -0,0 +1,176 @@
+"""Métricas locales de una ejecución: tiempos, tokens, reintentos y aciertos de caché.
+
+RunMetrics se suscribe al bus de eventos de crewAI y empareja cada evento de
+inicio con su evento de fin (started_event_id) para obtener el tiempo de cada
+paso del flujo, crew, tarea, ejecución de agente, llamada a herramienta,
+llamada al LLM y guardrail. Cada registro se añade a un archivo JSONL y al
+final de la ejecución se imprime una tabla resumen.
+"""
+
+import json
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+DEFAULT_TRACE_PATH = Path("docs/trace.jsonl")
+
+# (tipo de registro, evento de inicio, eventos de fin)
+SPANS = [
+    ("flow_step", "MethodExecutionStartedEvent", ["MethodExecutionFinishedEvent", "MethodExecutionFailedEvent"]),
+    ("crew", "CrewKickoffStartedEvent", ["CrewKickoffCompletedEvent", "CrewKickoffFailedEvent"]),
+    ("task", "TaskStartedEvent", ["TaskCompletedEvent", "TaskFailedEvent"]),
+    ("agent", "AgentExecutionStartedEvent", ["AgentExecutionCompletedEvent", "AgentExecutionErrorEvent"]),
+    ("tool", "ToolUsageStartedEvent", ["ToolUsageFinishedEvent", "ToolUsageErrorEvent"]),
+    ("llm", "LLMCallStartedEvent", ["LLMCallCompletedEvent", "LLMCallFailedEvent"]),
+    ("guardrail", "LLMGuardrailStartedEvent", ["LLMGuardrailCompletedEvent"]),
+]
+
+
+def _short(text, limit=60):
+    text = " ".join(str(text or "").split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def _span_name(kind, event):
+    if kind == "flow_step":
+        return event.method_name
+    if kind == "crew":
+        return event.crew_name or "crew"
+    if kind == "task":
+        return _short(event.task_name)
+    if kind == "agent":
+        return _short(event.agent_role or getattr(event.agent, "role", ""))
+    if kind == "tool":
+        return event.tool_name
+    if kind == "llm":
+        return event.model or "llm"
+    return _short(event.guardrail_name or event.task_name)
+
+
+def _usage_tokens(usage):
+    usage = usage or {}
+    prompt = usage.get("prompt_tokens", usage.get("input_tokens", 0)) or 0
+    completion = usage.get("completion_tokens", usage.get("output_tokens", 0)) or 0
+    return prompt, completion
+
+
+class RunMetrics:
+    def __init__(self, trace_path=DEFAULT_TRACE_PATH):
+        self.trace_path = Path(trace_path)
+        self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+        self.records = []
+        self._trace = open(self.trace_path, "w")
+        self._lock = threading.Lock()
+        # Los manejadores se ejecutan en un pool: el fin puede llegar antes que el inicio
+        self._starts = {}
+        self._ends = {}
+        self._end_kinds = {end: kind for kind, _, ends in SPANS for end in ends}
+
+    def register(self):
+        """Suscribe los manejadores de inicio y fin al bus de eventos de crewAI"""
+        import crewai.events as events
+        from crewai.events import crewai_event_bus
+
+        for _, start, ends in SPANS:
+            crewai_event_bus.on(getattr(events, start))(self._on_start)
+            for end in ends:
+                crewai_event_bus.on(getattr(events, end))(self._on_end)
+        return self
+
+    def watch_cache(self, cache):
+        """Registra cada consulta a una LLMResponseCache como acierto o fallo"""
+        get = cache.get
+
+        def watched_get(key):
+            started = time.perf_counter()
+            response = get(key)
+            self.record("llm_cache", "hit" if response is not None else "miss",
+                        time.perf_counter() - started, cache_hit=response is not None)
+            return response
+
+        cache.get = watched_get
+        return cache
+
+    def record(self, kind, name, duration, **fields):
+        record = {"kind": kind, "name": name, "duration_s": round(duration, 4), "ts": time.time(), **fields}
+        with self._lock:
+            self.records.append(record)
+            self._trace.write(json.dumps(record, default=str) + "\n")
+            self._trace.flush()
+
+    def _on_start(self, source, event):
+        with self._lock:
+            end = self._ends.pop(event.event_id, None)
+            if end is None:
+                self._starts[event.event_id] = event
+        if end is not None:
+            self._record_span(end[0], event, end[1])
+
+    def _on_end(self, source, event):
+        kind = self._end_kinds[type(event).__name__]
+        with self._lock:
+            start = self._starts.pop(event.started_event_id, None)
+            if start is None:
+                self._ends[event.started_event_id] = (kind, event)
+        if start is not None:
+            self._record_span(kind, start, event)
+
+    def _record_span(self, kind, start, end):
+        fields = {
+            "ok": not end.type.endswith(("failed", "error")),
+            "task": _short(end.task_name or start.task_name),
+            "agent": end.agent_role or start.agent_role,
+        }
+        if kind == "llm":
+            fields["prompt_tokens"], fields["completion_tokens"] = _usage_tokens(getattr(end, "usage", None))
+        elif kind == "crew":
+            fields["total_tokens"] = getattr(end, "total_tokens", 0)
+        elif kind == "tool":
+            fields["from_cache"] = getattr(end, "from_cache", False)
+            fields["run_attempts"] = start.run_attempts
+        elif kind == "guardrail":
+            fields["retry_count"] = start.retry_count
+            fields["ok"] = getattr(end, "success", fields["ok"])
+        duration = (end.timestamp - start.timestamp).total_seconds()
+        self.record(kind, _span_name(kind, start), duration, **fields)
+
+    def summary(self):
+        """Agrega los registros por (tipo, nombre)"""
+        rows = defaultdict(lambda: {
+            "count": 0, "total_s": 0.0, "prompt_tokens": 0, "completion_tokens": 0,
+            "failures": 0, "retries": 0, "cache_hits": 0,
+        })
+        with self._lock:
+            records = list(self.records)
+        for record in records:
+            row = rows[(record["kind"], record["name"])]
+            row["count"] += 1
+            row["total_s"] += record["duration_s"]
+            row["prompt_tokens"] += record.get("prompt_tokens", 0)
+            row["completion_tokens"] += record.get("completion_tokens", 0)
+            row["failures"] += 0 if record.get("ok", True) else 1
+            # Cada ejecución de guardrail con retry_count > 0 es un reintento de la tarea
+            row["retries"] += 1 if record.get("retry_count") else max(record.get("run_attempts", 1) - 1, 0)
+            row["cache_hits"] += 1 if record.get("cache_hit") or record.get("from_cache") else 0
+        return dict(rows)
+
+    def report(self):
+        from crewai.events import crewai_event_bus
+
+        # Esperar a que terminen los manejadores pendientes antes de resumir
+        crewai_event_bus.flush()
+        header = f"{'tipo':<10} {'nombre':<40} {'n':>5} {'total s':>9} {'media s':>8} {'tok in':>9} {'tok out':>8} {'fallos':>6} {'reint.':>6} {'caché':>6}"
+        print(f"\n# Métricas de la ejecución (detalle en {self.trace_path})")
+        print(header)
+        print("-" * len(header))
+        for (kind, name), row in sorted(self.summary().items(), key=lambda item: (item[0][0], -item[1]["total_s"])):
+            print(
+                f"{kind:<10} {_short(name, 40):<40} {row['count']:>5} {row['total_s']:>9.2f} "
+                f"{row['total_s'] / row['count']:>8.2f} {row['prompt_tokens']:>9} {row['completion_tokens']:>8} "
+                f"{row['failures']:>6} {row['retries']:>6} {row['cache_hits']:>6}"
+            )
+
+    def close(self):
+        with self._lock:
+            self._trace.close()
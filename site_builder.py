@@ -0,0 +1,261 @@
+"""Sitio HTML estático a partir de los documentos generados (docs/).
+
+    python site_builder.py docs --out site --jobs 8
+
+La construcción es incremental: site/build_manifest.json guarda el sha256 de
+cada .mdx (y su mtime, para no releer los que no cambiaron) y solo se vuelven
+a generar las páginas cuyo contenido cambió; las de documentos borrados se
+eliminan. Las páginas se generan en paralelo en un ProcessPoolExecutor.
+
+Cada bloque ```mermaid se repara con mermaid_validator y, si mermaid-cli
+(mmdc) está instalado, se pre-renderiza a SVG; si no, se deja como
+<pre class="mermaid"> para mermaid.js en el navegador. El fragmento HTML
+resultante se guarda en .cache/site_mermaid/<sha256 del diagrama>.html, así
+que un diagrama que ya se procesó (en esta página, en otra o en una
+construcción anterior) no se vuelve a procesar.
+
+Las páginas no llevan navegación entre ellas (solo enlazan a index.html):
+añadir o quitar un documento solo regenera el índice.
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import quote
+
+from markdown_it import MarkdownIt
+
+from doc_manifest import hash_file
+from doc_streaming import write_doc
+from mermaid_validator import repair_diagram
+
+BUILD_VERSION = 2  # Cambiarlo (o cambiar PAGE_TEMPLATE) regenera todas las páginas
+MERMAID_VERSION = 2  # Cambiarlo (o cambiar mermaid_validator) invalida la caché de diagramas
+BUILD_MANIFEST_NAME = "build_manifest.json"
+DEFAULT_MERMAID_CACHE = Path(".cache/site_mermaid")
+MERMAID_JS = "https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.min.js"
+MMDC_TIMEOUT = 60
+
+FRONT_MATTER_RE = re.compile(r"\A---\n.*?\n---\n", re.S)
+MERMAID_FENCE_RE = re.compile(r"^```[ \t]*mermaid[ \t]*\n(?P<body>.*?)\n[ \t]*```[ \t]*$", re.S | re.M)
+PLACEHOLDER = "MERMAIDBLOCK{}X"
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ max-width: 960px; margin: 2rem auto; padding: 0 1rem; font-family: system-ui, sans-serif; line-height: 1.5; }}
+pre {{ background: #f5f5f5; padding: 0.75rem; overflow-x: auto; }}
+table {{ border-collapse: collapse; }} th, td {{ border: 1px solid #ccc; padding: 0.25rem 0.5rem; }}
+.mermaid-diagram {{ text-align: center; margin: 1rem 0; }}
+</style>
+</head>
+<body>
+<nav><a href="{index_href}">&larr; Index</a></nav>
+<main>
+{body}
+</main>
+{scripts}</body>
+</html>
+"""
+
+MERMAID_SCRIPT = f'<script src="{MERMAID_JS}"></script>\n<script>mermaid.initialize({{startOnLoad: true}});</script>\n'
+
+
+def page_title(text, path):
+    for line in text.splitlines():
+        if line.startswith("# "):
+            return line[2:].strip()
+    return Path(path).stem.replace("_", " ")
+
+
+def _href(rel):
+    """Enlace relativo a rel: codificado y con './' para que 'nombre:' no se lea como un esquema de URL"""
+    url = quote(rel)
+    return html.escape(url if url.startswith("../") else f"./{url}")
+
+
+def _atomic_write(path, content):
+    # Varios procesos pueden escribir el mismo diagrama: archivo temporal único por escritor
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    with os.fdopen(fd, "w") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def render_mermaid(source, mmdc=None):
+    """Fragmento HTML de un diagrama: SVG pre-renderizado con mmdc o <pre class="mermaid">"""
+    source, issues = repair_diagram(source)
+    if mmdc and not any(not issue.repaired for issue in issues):
+        with tempfile.TemporaryDirectory() as tmp:
+            src, out = Path(tmp) / "diagram.mmd", Path(tmp) / "diagram.svg"
+            src.write_text(source)
+            try:
+                result = subprocess.run([mmdc, "-i", str(src), "-o", str(out), "--quiet"],
+                                        capture_output=True, timeout=MMDC_TIMEOUT)
+            except (subprocess.TimeoutExpired, OSError):
+                # Un diagrama lento o un mmdc roto no debe abortar la construcción: lo dibuja mermaid.js
+                result = None
+            if result and result.returncode == 0 and out.exists():
+                return f'<div class="mermaid-diagram">{out.read_text()}</div>', False
+    return f'<pre class="mermaid">{html.escape(source)}</pre>', True
+
+
+def mermaid_fragment(source, cache_dir, mmdc=None):
+    """(html, necesita mermaid.js, venía de la caché) de un diagrama, direccionado por su contenido"""
+    key = hashlib.sha256(f"{MERMAID_VERSION}\n{bool(mmdc)}\n{source.strip()}".encode()).hexdigest()
+    path = Path(cache_dir) / f"{key}.html"
+    if path.exists():
+        fragment = path.read_text()
+        return fragment, fragment.startswith("<pre"), True
+    fragment, client_side = render_mermaid(source, mmdc)
+    _atomic_write(path, fragment)
+    return fragment, client_side, False
+
+
+def render_page(job):
+    """Genera una página; se ejecuta en los procesos del pool"""
+    source, target, root, cache_dir, mmdc = job
+    text = FRONT_MATTER_RE.sub("", Path(source).read_text(errors="replace"), count=1)
+    fragments, stats = [], {"mermaid_cached": 0, "mermaid_rendered": 0}
+    client_side = False
+
+    def extract(match):
+        nonlocal client_side
+        fragment, needs_js, cached = mermaid_fragment(match.group("body"), cache_dir, mmdc)
+        fragments.append(fragment)
+        client_side = client_side or needs_js
+        stats["mermaid_cached" if cached else "mermaid_rendered"] += 1
+        # Marcador en un párrafo propio que markdown-it deja intacto
+        return f"\n{PLACEHOLDER.format(len(fragments) - 1)}\n"
+
+    text = MERMAID_FENCE_RE.sub(extract, text)
+    body = MarkdownIt("commonmark", {"html": True}).enable("table").render(text)
+    for n, fragment in enumerate(fragments):
+        body = body.replace(f"<p>{PLACEHOLDER.format(n)}</p>", fragment)
+    title = page_title(text, source)
+    page = PAGE_TEMPLATE.format(title=html.escape(title), index_href=_href(f"{root}index.html"), body=body,
+                                scripts=MERMAID_SCRIPT if client_side else "")
+    Path(target).parent.mkdir(parents=True, exist_ok=True)
+    write_doc(Path(target), page)
+    return title, stats
+
+
+def _template_hash():
+    return hashlib.sha256(f"{BUILD_VERSION}\n{PAGE_TEMPLATE}\n{MERMAID_SCRIPT}".encode()).hexdigest()
+
+
+def load_build_manifest(path):
+    path = Path(path)
+    if path.exists():
+        with open(path) as f:
+            manifest = json.load(f)
+        if manifest.get("template") == _template_hash():
+            return manifest
+    return {"template": _template_hash(), "pages": {}}
+
+
+def render_index(pages):
+    items = "\n".join(
+        f'<li><a href="{_href(Path(rel).with_suffix(".html").as_posix())}">{html.escape(page["title"])}</a></li>'
+        for rel, page in sorted(pages.items())
+    )
+    return PAGE_TEMPLATE.format(title="Documentation", index_href=_href("index.html"), scripts="",
+                                body=f"<h1>Documentation</h1>\n<ul>\n{items}\n</ul>")
+
+
+def build_site(docs_dir, out_dir, jobs=None, cache_dir=DEFAULT_MERMAID_CACHE, force=False, mmdc=None):
+    """Construye (o actualiza) el sitio y devuelve estadísticas de la construcción"""
+    docs_dir, out_dir, cache_dir = Path(docs_dir), Path(out_dir), Path(cache_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = out_dir / BUILD_MANIFEST_NAME
+    manifest = load_build_manifest(manifest_path)
+    old_pages = manifest["pages"]
+
+    # Páginas nuevas o cuyo contenido cambió (el mtime evita rehashear las que no se tocaron)
+    pages, jobs_list = {}, []
+    for source in sorted(docs_dir.rglob("*.mdx")):
+        rel = source.relative_to(docs_dir).as_posix()
+        stat = source.stat()
+        target = out_dir / Path(rel).with_suffix(".html")
+        known = None if force else old_pages.get(rel)
+        if known and known["mtime_ns"] == stat.st_mtime_ns and known["size"] == stat.st_size and target.exists():
+            pages[rel] = known
+            continue
+        digest = hash_file(source)
+        pages[rel] = {"sha256": digest, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+                      "title": (known or {}).get("title", "")}
+        if known and known["sha256"] == digest and target.exists():
+            continue
+        root = "../" * (len(Path(rel).parts) - 1)
+        jobs_list.append((rel, (str(source), str(target), root, str(cache_dir), mmdc)))
+
+    stats = {"pages": len(pages), "rendered": len(jobs_list), "removed": 0,
+             "mermaid_cached": 0, "mermaid_rendered": 0}
+    if jobs_list:
+        workers = min(jobs or os.cpu_count() or 1, len(jobs_list))
+        args = [job for _, job in jobs_list]
+        if workers == 1:
+            results = list(map(render_page, args))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(render_page, args, chunksize=max(1, len(args) // (workers * 4))))
+        for (rel, _), (title, page_stats) in zip(jobs_list, results):
+            pages[rel]["title"] = title
+            for key, value in page_stats.items():
+                stats[key] += value
+
+    for rel in set(old_pages) - set(pages):
+        (out_dir / Path(rel).with_suffix(".html")).unlink(missing_ok=True)
+        stats["removed"] += 1
+
+    titles = {rel: page["title"] for rel, page in pages.items()}
+    if stats["rendered"] or stats["removed"] or not (out_dir / "index.html").exists() \
+            or titles != {rel: page.get("title") for rel, page in old_pages.items()}:
+        write_doc(out_dir / "index.html", render_index(pages))
+    manifest["pages"] = pages
+    write_doc(manifest_path, json.dumps(manifest, indent=2))
+    return stats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un sitio HTML estático con la documentación generada")
+    parser.add_argument("docs_dir", nargs="?", type=Path, default=Path("docs"), help="Carpeta con los .mdx (docs por defecto)")
+    parser.add_argument("--out", type=Path, default=Path("site"), help="Carpeta del sitio generado")
+    parser.add_argument("--jobs", type=int, default=None, help="Procesos para generar páginas (por defecto, uno por CPU)")
+    parser.add_argument("--mermaid-cache", type=Path, default=DEFAULT_MERMAID_CACHE,
+                        help="Caché de diagramas mermaid procesados, direccionada por contenido")
+    parser.add_argument("--mmdc", default=shutil.which("mmdc"),
+                        help="Ruta de mermaid-cli para pre-renderizar los diagramas a SVG (por defecto, mmdc del PATH)")
+    parser.add_argument("--force", action="store_true", help="Regenerar todas las páginas")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.docs_dir.exists():
+        print(f"Error: La carpeta '{args.docs_dir}' no existe")
+        return 1
+    start = time.perf_counter()
+    stats = build_site(args.docs_dir, args.out, args.jobs, args.mermaid_cache, args.force, args.mmdc)
+    print(f"# Sitio en {args.out}: {stats['rendered']}/{stats['pages']} páginas generadas, "
+          f"{stats['removed']} eliminadas, diagramas: {stats['mermaid_rendered']} procesados, "
+          f"{stats['mermaid_cached']} de la caché ({time.perf_counter() - start:.1f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""CodeSearchIndex con HashingEmbedder: construcción, búsqueda y recarga desde disco."""
+
+import numpy as np
+import pytest
+
+from code_search import CodeSearchIndex, HashingEmbedder, nearest, normalize
+from repo_index import RepoIndex
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "sample_repo"
+    (root / "pkg").mkdir(parents=True)
+    (root / "pkg" / "auth.py").write_text(
+        "def verify_password(user, password):\n    return check_password_hash(user.password_hash, password)\n"
+    )
+    (root / "pkg" / "billing.py").write_text(
+        "class InvoiceGenerator:\n    def create_invoice(self, customer, amount):\n        return {'customer': customer, 'amount': amount}\n"
+    )
+    (root / "README.md").write_text("# Sample\n\nAuthentication and billing helpers.\n")
+    return root
+
+
+def build(repo, index_dir):
+    return CodeSearchIndex(HashingEmbedder(), index_dir=index_dir).build(repo, RepoIndex().build(repo))
+
+
+def test_hashing_embedder_is_deterministic_and_splits_identifiers():
+    embedder = HashingEmbedder(dim=64)
+    first, second = embedder.embed(["verifyPassword"]), embedder.embed(["verifyPassword"])
+    assert first.shape == (1, 64)
+    assert np.array_equal(first, second)
+    # camelCase y snake_case comparten las partes "verify" y "password"
+    a, b = normalize(embedder.embed(["verifyPassword", "verify_password"]))
+    assert a @ b > 0.5
+
+
+def test_search_finds_the_relevant_chunk(repo, tmp_path):
+    index = build(repo, tmp_path / "index")
+
+    score, chunk = index.search("create invoice for a customer", top_k=1)[0]
+    assert chunk["path"] == "pkg/billing.py"
+    assert 0 < score <= 1
+    assert "create_invoice" in index.snippet(chunk)
+    assert index.search("verify password")[0][1]["path"] == "pkg/auth.py"
+
+
+def test_index_round_trip_from_disk(repo, tmp_path):
+    first = build(repo, tmp_path / "index")
+    vectors_files = list((tmp_path / "index").rglob("vectors.npy"))
+    assert len(vectors_files) == 1
+    mtime = vectors_files[0].stat().st_mtime_ns
+
+    # Mismo contenido: se carga del disco (memmap) sin volver a embeber
+    second = build(repo, tmp_path / "index")
+    assert vectors_files[0].stat().st_mtime_ns == mtime
+    assert isinstance(second.vectors, np.memmap)
+    assert second.chunks == first.chunks
+    assert np.allclose(np.asarray(second.vectors), np.asarray(first.vectors))
+
+    # Un cambio en el repositorio produce un índice nuevo
+    (repo / "pkg" / "auth.py").write_text("def logout(session):\n    session.clear()\n")
+    third = build(repo, tmp_path / "index")
+    assert len(list((tmp_path / "index").rglob("vectors.npy"))) == 1
+    assert third.search("logout session", top_k=1)[0][1]["path"] == "pkg/auth.py"
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.texts = []
+
+    def embed(self, texts):
+        self.texts += texts
+        return super().embed(texts)
+
+
+def test_change_only_reembeds_the_changed_file(repo, tmp_path):
+    embedder = CountingEmbedder()
+    index_dir = tmp_path / "index"
+    first = CodeSearchIndex(embedder, index_dir=index_dir).build(repo, RepoIndex().build(repo))
+    files_dir = next(index_dir.rglob("files"))
+    before = {p.name for p in files_dir.glob("*.npz")}
+    assert len(embedder.texts) == len(first.chunks)
+
+    embedder.texts.clear()
+    (repo / "pkg" / "auth.py").write_text("def logout(session):\n    session.clear()\n")
+    second = CodeSearchIndex(embedder, index_dir=index_dir).build(repo, RepoIndex().build(repo))
+
+    assert embedder.texts == ["def logout(session):\n    session.clear()\n"]
+    after = {p.name for p in files_dir.glob("*.npz")}
+    assert len(after) == len(before) and len(after - before) == 1  # La versión anterior se borró
+    assert [c["path"] for c in second.chunks] == [c["path"] for c in first.chunks]
+    assert second.search("create invoice for a customer", top_k=1)[0][1]["path"] == "pkg/billing.py"
+
+
+def test_repositories_with_the_same_name_do_not_share_an_index(repo, tmp_path):
+    other = tmp_path / "other" / "sample_repo"
+    other.mkdir(parents=True)
+    (other / "notes.py").write_text("def schedule_meeting(day):\n    return day\n")
+
+    build(repo, tmp_path / "index")
+    second = build(other, tmp_path / "index")
+
+    assert len(list((tmp_path / "index").rglob("vectors.npy"))) == 2
+    assert {c["path"] for c in second.chunks} == {"notes.py"}
+
+
+def test_nearest_orders_by_score():
+    vectors = normalize(np.array([[1, 0], [0.6, 0.8], [0, 1]], dtype=np.float32))
+    best, scores = nearest(vectors, np.array([1, 0], dtype=np.float32), 2)
+    assert list(best) == [0, 1]
+    assert scores[0] >= scores[1]
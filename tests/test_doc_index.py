@@ -0,0 +1,95 @@
+"""DocsIndex: MinHash sin desbordamiento, duplicados y carga incremental."""
+
+import json
+import zlib
+
+import pytest
+
+import doc_index
+from doc_index import DocsIndex, minhash, similarity
+
+LOREM = ("The scheduler reads jobs from the queue, assigns each one to a worker and retries failed jobs "
+         "with exponential backoff until the configured limit is reached. ")
+
+
+def test_minhash_matches_exact_integer_arithmetic():
+    text = LOREM * 3 + "Extra words about the storage layer and its write ahead log."
+    words = doc_index.WORD_RE.findall(text.lower())
+    shingles = {" ".join(words[i:i + doc_index.SHINGLE_WORDS]) for i in range(len(words) - doc_index.SHINGLE_WORDS + 1)}
+    hashes = [zlib.crc32(s.encode()) for s in shingles]
+    expected = [min((int(a) * h + int(b)) % doc_index._PRIME for h in hashes)
+                for a, b in zip(doc_index._A, doc_index._B)]
+    assert minhash(text).tolist() == expected
+
+
+def test_similarity_separates_near_duplicates_from_unrelated_text():
+    near = LOREM + "It also logs every retry."
+    other = "Rendering pipeline: shaders compile at startup and textures stream from disk on demand in tiles."
+    assert similarity(minhash(LOREM), minhash(LOREM)) == 1.0
+    assert similarity(minhash(LOREM), minhash(near)) >= doc_index.DUPLICATE_THRESHOLD
+    assert similarity(minhash(LOREM), minhash(other)) < doc_index.DUPLICATE_THRESHOLD
+
+
+def test_duplicates_excludes_the_document_under_review(tmp_path):
+    index = DocsIndex(tmp_path)
+    index.update(tmp_path / "jobs.mdx", f"# Jobs\n\n## Scheduling\n{LOREM}\n")
+    index.update(tmp_path / "draft.mdx", f"# Draft\n\n## Queue\n{LOREM}\n")
+
+    matches = index.duplicates(LOREM, exclude="draft.mdx")
+    assert len(matches) == 1 and "'Scheduling' in Jobs (jobs.mdx)" in matches[0]
+
+
+def test_overview_and_search(tmp_path):
+    index = DocsIndex(tmp_path)
+    index.update(tmp_path / "jobs.mdx", "# Jobs\n\nThe `JobQueue` feeds `Worker.run()`.\n\n## Retries\nBackoff.\n")
+
+    assert "- Jobs (jobs.mdx): The `JobQueue` feeds" in index.overview()
+    assert "Sections: Jobs; Retries" in index.overview()
+    assert "Terms: JobQueue" in index.search("jobqueue")
+    assert index.search("renderer") == "No existing document mentions 'renderer'."
+
+
+@pytest.fixture
+def docs(tmp_path):
+    (tmp_path / "a.mdx").write_text(f"# A\n\n{LOREM}\n")
+    (tmp_path / "b.mdx").write_text("# B\n\nSecond document.\n")
+    (tmp_path / "notes.txt").write_text("not a document")
+    return tmp_path
+
+
+def count_adds(monkeypatch):
+    added = []
+    original = DocsIndex._add
+
+    def add(self, path, text, title=None):
+        added.append(path.name)
+        return original(self, path, text, title)
+
+    monkeypatch.setattr(DocsIndex, "_add", add)
+    return added
+
+
+def test_load_reindexes_only_new_or_changed_documents(docs, monkeypatch):
+    DocsIndex(docs).load()
+    added = count_adds(monkeypatch)
+
+    (docs / "b.mdx").write_text("# B\n\nChanged.\n")
+    (docs / "a.mdx").unlink()
+    (docs / "c.md").write_text("# C\n")
+    index = DocsIndex(docs).load()
+
+    assert sorted(added) == ["b.mdx", "c.md"]
+    assert sorted(index.docs) == ["b.mdx", "c.md"]
+    assert sorted(json.loads((docs / doc_index.DOC_INDEX_NAME).read_text())) == ["b.mdx", "c.md"]
+
+
+def test_load_reindexes_entries_from_an_older_version(docs, monkeypatch):
+    DocsIndex(docs).load()
+    path = docs / doc_index.DOC_INDEX_NAME
+    saved = json.loads(path.read_text())
+    saved["a.mdx"]["version"] = doc_index.INDEX_VERSION - 1
+    path.write_text(json.dumps(saved))
+    added = count_adds(monkeypatch)
+
+    DocsIndex(docs).load()
+    assert added == ["a.mdx"]
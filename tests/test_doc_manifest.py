@@ -0,0 +1,70 @@
+"""doc_manifest: hashes del repositorio, archivos cambiados y documentos obsoletos."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from doc_manifest import changed_files, doc_sources, hash_repo, is_stale, load_manifest, save_manifest
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    (root / "src").mkdir(parents=True)
+    (root / ".git").mkdir()
+    (root / "src" / "app.py").write_text("print(1)\n")
+    (root / "README.md").write_text("# Repo\n")
+    (root / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+    return root
+
+
+def test_hash_repo_skips_git_and_changes_only_with_content(repo):
+    files = hash_repo(repo)
+    assert sorted(files) == ["README.md", "src/app.py"]
+
+    (repo / "README.md").touch()
+    assert hash_repo(repo) == files
+
+    (repo / "src" / "app.py").write_text("print(2)\n")
+    assert changed_files(files, hash_repo(repo)) == {"src/app.py"}
+
+
+def test_changed_files_includes_added_and_removed():
+    old = {"a.py": "1", "b.py": "2", "c.py": "3"}
+    new = {"a.py": "1", "b.py": "9", "d.py": "4"}
+    assert changed_files(old, new) == {"b.py", "c.py", "d.py"}
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = tmp_path / "docs" / "repo" / "manifest.json"
+    assert load_manifest(path) == {"files": {}, "docs": {}}
+
+    save_manifest({"a.py": "1"}, {"docs/repo/a.mdx": ["a.py"]}, path)
+    assert load_manifest(path) == {"files": {"a.py": "1"}, "docs": {"docs/repo/a.mdx": ["a.py"]}}
+
+
+def test_doc_sources_normalizes_planner_paths():
+    doc = SimpleNamespace(source_files=["./src/app.py", "/tmp/workdir/repo/src/lib/", "workdir/repo/README.md", " "])
+    assert doc_sources(doc, "workdir/repo") == ["README.md", "src/app.py", "src/lib"]
+
+
+@pytest.mark.parametrize("sources, changed, stale", [
+    (["src/app.py"], set(), False),
+    (["src/app.py"], {"README.md"}, False),
+    (["src/app.py"], {"src/app.py"}, True),
+    (["src"], {"src/lib/util.py"}, True),
+    (["src"], {"srcs/other.py"}, False),
+    ([], {"README.md"}, True),  # Sin fuentes conocidas depende de todo el repositorio
+])
+def test_is_stale(tmp_path, sources, changed, stale):
+    doc = tmp_path / "app.mdx"
+    doc.write_text("# App\n")
+    manifest = {"files": {}, "docs": {str(doc): sources}}
+    assert is_stale(doc, sources, manifest, changed) is stale
+
+
+def test_missing_or_untracked_docs_are_stale(tmp_path):
+    doc = tmp_path / "app.mdx"
+    assert is_stale(doc, ["src"], {"files": {}, "docs": {str(doc): ["src"]}}, set())
+    doc.write_text("# App\n")
+    assert is_stale(doc, ["src"], {"files": {}, "docs": {}}, set())
@@ -0,0 +1,73 @@
+"""DocsSearchIndex: carga incremental por mtime, ranking BM25 y fragmentos."""
+
+import json
+import os
+
+import pytest
+
+from docs_search import SEARCH_INDEX_NAME, DocsSearchIndex
+
+
+@pytest.fixture
+def docs(tmp_path):
+    (tmp_path / "caching.mdx").write_text("# Caching\n\nThe cache stores responses. Cache entries expire.\n")
+    (tmp_path / "deploy.mdx").write_text("# Deployment\n\nDeploy with docker. The cache is warmed on start.\n")
+    (tmp_path / "intro.mdx").write_text("# Introduction\n\nOverview of the project.\n")
+    (tmp_path / "notes.txt").write_text("cache cache cache")
+    return tmp_path
+
+
+def count_adds(monkeypatch):
+    added = []
+    original = DocsSearchIndex._add
+
+    def add(self, name, stat):
+        added.append(name)
+        return original(self, name, stat)
+
+    monkeypatch.setattr(DocsSearchIndex, "_add", add)
+    return added
+
+
+def test_search_ranks_with_bm25_and_title_weight(docs):
+    index = DocsSearchIndex(docs).load()
+
+    assert index.documents() == [("caching.mdx", "Caching"), ("deploy.mdx", "Deployment"), ("intro.mdx", "Introduction")]
+    assert [name for _, name in index.search("cache")] == ["caching.mdx", "deploy.mdx"]
+    assert [name for _, name in index.search("docker")] == ["deploy.mdx"]
+    assert index.search("the and") == []
+    assert index.search("kubernetes") == []
+
+
+def test_load_reindexes_only_changed_documents_and_drops_deleted(docs, monkeypatch):
+    DocsSearchIndex(docs).load()
+    added = count_adds(monkeypatch)
+    assert DocsSearchIndex(docs).load().documents()[0] == ("caching.mdx", "Caching")
+    assert added == []
+
+    path = docs / "intro.mdx"
+    path.write_text("# Introduction\n\nNow mentions kubernetes.\n")
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000))
+    (docs / "caching.mdx").unlink()
+    index = DocsSearchIndex(docs).load()
+
+    assert added == ["intro.mdx"]
+    assert [name for _, name in index.search("kubernetes")] == ["intro.mdx"]
+    assert [name for _, name in index.search("cache")] == ["deploy.mdx"]
+    saved = json.loads((docs / SEARCH_INDEX_NAME).read_text())
+    assert "caching.mdx" not in saved["files"] and "stores" not in saved["postings"]
+
+
+def test_corrupt_index_is_rebuilt(docs):
+    (docs / SEARCH_INDEX_NAME).write_text("{not json")
+    assert len(DocsSearchIndex(docs).load().documents()) == 3
+
+
+def test_snippet_shows_the_best_line_trimmed_around_the_match(docs):
+    index = DocsSearchIndex(docs).load()
+    assert index.snippet("deploy.mdx", "docker cache") == "Deploy with docker. The cache is warmed on start."
+
+    (docs / "long.mdx").write_text("# Long\n\n" + "filler " * 60 + "needle here " + "tail " * 60 + "\n")
+    snippet = index.snippet("long.mdx", "needle")
+    assert snippet.startswith("...") and snippet.endswith("...") and "needle" in snippet
+    assert index.snippet("intro.mdx", "docker") == ""
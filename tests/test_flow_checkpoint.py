@@ -0,0 +1,50 @@
+"""FlowCheckpoint: guardar y cargar el estado del flujo para --resume."""
+
+import json
+
+from documentation_flow import DocumentationState
+from flow_checkpoint import FlowCheckpoint
+
+URL = "https://github.com/owner/repo"
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = tmp_path / "docs" / "checkpoint.json"
+    doc = tmp_path / "docs" / "overview.mdx"
+    state = DocumentationState(project_url=URL, docs=["overview"], file_hashes={"a.py": "1"})
+
+    checkpoint = FlowCheckpoint(path)
+    checkpoint.save(state, step="clone_repo")
+    checkpoint.save(state, step="clone_repo")
+    doc.write_text("# Overview\n")
+    checkpoint.save(state, step="plan_docs", doc=(doc, "Overview"))
+
+    loaded = FlowCheckpoint(path)
+    assert loaded.load(URL)
+    assert loaded.data["steps"] == ["clone_repo", "plan_docs"]
+    assert loaded.done("plan_docs") and not loaded.done("create_docs")
+    assert loaded.doc_done(doc)
+    assert loaded.data["state"]["docs"] == ["overview"]
+    # Los hashes del checkout se recalculan al reanudar: no van al checkpoint
+    assert "file_hashes" not in json.loads(path.read_text())["state"]
+
+
+def test_checkpoint_of_another_repository_is_ignored(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    FlowCheckpoint(path).save(DocumentationState(project_url=URL), step="clone_repo")
+
+    checkpoint = FlowCheckpoint(path)
+    assert not checkpoint.load("https://github.com/other/repo")
+    assert not checkpoint.done("clone_repo")
+    assert not FlowCheckpoint(tmp_path / "missing.json").load(URL)
+
+
+def test_deleted_document_is_not_done(tmp_path):
+    doc = tmp_path / "overview.mdx"
+    doc.write_text("# Overview\n")
+    checkpoint = FlowCheckpoint(tmp_path / "checkpoint.json")
+    checkpoint.save(DocumentationState(project_url=URL), doc=(doc, "Overview"))
+    assert checkpoint.doc_done(doc)
+
+    doc.unlink()
+    assert not checkpoint.doc_done(doc)
@@ -0,0 +1,88 @@
+"""LLMResponseCache: TTL, expulsión LRU por tamaño y envoltorio de call/acall."""
+
+import asyncio
+
+import pytest
+
+import llm_cache
+from llm_cache import LLMResponseCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    return now
+
+
+def table_size(cache):
+    return cache._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+
+def test_get_returns_stored_response_and_counts_hits(tmp_path):
+    cache = LLMResponseCache(tmp_path / "cache.sqlite")
+    cache.set("k", "respuesta")
+
+    assert cache.get("k") == "respuesta"
+    assert cache.get("otra") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_expired_entries_are_misses_and_are_deleted(tmp_path, clock):
+    cache = LLMResponseCache(tmp_path / "cache.sqlite", ttl_seconds=60)
+    cache.set("k", "vieja")
+    clock[0] += 61
+
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+    assert cache._total == 0
+
+
+def test_evicts_least_recently_used_entries_over_the_limit(tmp_path, clock):
+    cache = LLMResponseCache(tmp_path / "cache.sqlite", max_bytes=25)
+    for key in ("a", "b"):
+        cache.set(key, "x" * 10)
+        clock[0] += 1
+    cache.get("a")  # "b" pasa a ser la menos usada
+    clock[0] += 1
+    cache.set("c", "x" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == cache.get("c") == "x" * 10
+    assert cache._total == table_size(cache) == 20
+
+
+def test_running_total_tracks_replacements_and_reopening(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = LLMResponseCache(path)
+    cache.set("k", "x" * 10)
+    cache.set("k", "x" * 4)
+    cache.set("j", "ñ")  # El tamaño se cuenta en bytes UTF-8
+
+    assert cache._total == table_size(cache) == 6
+    assert LLMResponseCache(path)._total == 6
+
+
+def test_wrap_caches_call_and_acall_text_responses(tmp_path):
+    calls = []
+
+    class FakeLLM:
+        model, temperature, max_tokens = "mock", 0.0, 10
+
+        def call(self, messages, tools=None, **kwargs):
+            calls.append("call")
+            return f"sync {messages}"
+
+        async def acall(self, messages, tools=None, **kwargs):
+            calls.append("acall")
+            return f"async {messages}"
+
+    cache = LLMResponseCache(tmp_path / "cache.sqlite")
+    llm = cache.wrap(FakeLLM())
+
+    assert llm.call("hola") == llm.call("hola") == "sync hola"
+    assert asyncio.run(llm.acall("adiós")) == "async adiós"
+    assert asyncio.run(llm.acall("adiós")) == "async adiós"
+    # call y acall comparten la clave: el mensaje ya cacheado no vuelve al modelo
+    assert asyncio.run(llm.acall("hola")) == "sync hola"
+    assert calls == ["call", "acall"]
@@ -0,0 +1,146 @@
+"""mermaid_validator: los diagramas válidos no cambian y cada regla de reparación."""
+
+import pytest
+
+from mermaid_validator import mermaid_guardrail, repair_diagram, repair_mermaid
+
+VALID = {
+    "flowchart_shapes": """flowchart LR
+    A[Start] --> B(Round) --> C{Decision}
+    C -->|yes| D[("Database (main)")]
+    C -. maybe .-> E((Circle))
+    C == strong ==> F>Flag]
+    D --- G[[Subroutine]]
+    click A "https://example.com" "Open"
+    classDef hot fill:#f96
+    class A hot""",
+    "flowchart_v11_shapes": """flowchart TD
+    A@{ shape: rect, label: "Start (here)" } --> B@{ shape: diamond }
+    B e1@--> C
+    e1@{ animate: true }""",
+    "flowchart_subgraph": """graph TD;
+    subgraph api [API layer]
+        direction LR
+        R[Router] --> H[Handler]
+    end
+    H --> DB[(Postgres)]""",
+    "flowchart_quoted_labels": """flowchart TD
+    A["label with (parens) and | pipe"] -->|"edge -> text"| B["x"]""",
+    "comments_and_front_matter": """---
+title: Pipeline
+---
+%% comentario inicial
+flowchart TD
+    %% otro comentario
+    A --> B""",
+    "sequence": """sequenceDiagram
+    participant U as User
+    participant S as Service
+    U->>S: request
+    alt cached
+        S-->>U: hit
+    else miss
+        S->>S: compute
+        S-->>U: value
+    end
+    loop every minute
+        S-)U: ping
+    end""",
+    "class_members_with_dashes": """classDiagram
+    class Counter {
+        +int value
+        +decrement--()
+        +String separator = "--"
+    }
+    Counter <|-- LimitedCounter
+    Counter "1" --> "*" Event : emits
+    Counter ..|> Resettable""",
+    "state": """stateDiagram-v2
+    [*] --> Idle
+    Idle --> Running : start -> go
+    state Running {
+        [*] --> Working
+        Working --> [*]
+    }
+    Running --> [*]""",
+    "er": """erDiagram
+    CUSTOMER {
+        string name "display -- name"
+        int id PK
+    }
+    CUSTOMER ||--o{ ORDER : places
+    ORDER }|..|{ LINE_ITEM : contains""",
+    "unvalidated_type": """gantt
+    title Plan
+    section Build
+    Task :a1, 2024-01-01, 3d""",
+    "unknown_header_like": """futureChart LR
+    whatever -> goes""",
+}
+
+
+@pytest.mark.parametrize("source", VALID.values(), ids=VALID.keys())
+def test_valid_diagrams_are_left_unchanged(source):
+    assert repair_diagram(source) == (source, [])
+
+
+REPAIRS = [
+    # (id, diagrama, código esperado, reparado, texto que debe aparecer en la salida)
+    ("edge_label_arrow", "flowchart TD\n    A -->|go|> B", "edge_label_arrow", True, "A -->|go| B"),
+    ("single_dash_arrow", "flowchart TD\n    A -> B", "single_dash_arrow", True, "A --> B"),
+    ("unquoted_label", "flowchart TD\n    A[call f(x)] --> B", "unquoted_label", True, 'A["call f(x)"]'),
+    ("invalid_direction", "flowchart XY\n    A --> B", "invalid_direction", True, "flowchart TD"),
+    ("reserved_end", "flowchart TD\n    A --> end", "reserved_end", True, "A --> End"),
+    ("flow_unmatched_end", "flowchart TD\n    A --> B\n    end", "unmatched_end", True, "flowchart TD\n    A --> B"),
+    ("flow_unclosed_subgraph", "flowchart TD\n    subgraph S\n        A --> B", "unclosed_block", True, "A --> B\n    end"),
+    ("unbalanced_brackets", "flowchart TD\n    A[open --> B", "unbalanced_brackets", False, "A[open --> B"),
+    ("missing_message", "sequenceDiagram\n    A->>B", "missing_message", True, "A->>B: "),
+    ("sequence_unclosed_block", "sequenceDiagram\n    loop retry\n        A->>B: ping", "unclosed_block", True, "ping\n    end"),
+    ("sequence_unmatched_end", "sequenceDiagram\n    A->>B: hi\n    end", "unmatched_end", True, "sequenceDiagram\n    A->>B: hi"),
+    ("orphan_branch", "sequenceDiagram\n    A->>B: hi\n    else nope", "orphan_branch", False, "else nope"),
+    ("class_unclosed_before_relation", "classDiagram\n    class A {\n        +int x\n    A <|-- B",
+     "unclosed_block", True, "+int x\n    }\n    A <|-- B"),
+    ("unmatched_brace", "classDiagram\n    class A\n    }", "unmatched_brace", True, "classDiagram\n    class A"),
+    ("state_single_dash_arrow", "stateDiagram-v2\n    [*] -> Idle : begin -> now", "single_dash_arrow", True,
+     "[*] --> Idle : begin -> now"),
+    ("er_missing_label", "erDiagram\n    A ||--o{ B", "missing_label", True, "A ||--o{ B : relates to"),
+    ("er_invalid_relationship", "erDiagram\n    A --> B", "invalid_relationship", False, "A --> B"),
+    ("missing_header", "    A --> B\n    B --> C", "missing_header", True, "flowchart TD\n    A --> B"),
+    ("unknown_type", "    just some words", "unknown_type", False, "just some words"),
+    ("smart_quotes", "flowchart TD\n    A[“quoted”] --> B", "smart_quotes", True, 'A["quoted"]'),
+]
+
+
+@pytest.mark.parametrize("source, code, repaired, expected", [r[1:] for r in REPAIRS], ids=[r[0] for r in REPAIRS])
+def test_repair_rules(source, code, repaired, expected):
+    text, issues = repair_diagram(source)
+    assert [(issue.code, issue.repaired) for issue in issues] == [(code, repaired)]
+    assert expected in text
+
+
+def test_empty_diagram_is_an_error():
+    _, issues = repair_diagram("%% solo un comentario\n")
+    assert [(issue.code, issue.repaired) for issue in issues] == [("empty_diagram", False)]
+
+
+def test_repair_mermaid_closes_the_fence_and_numbers_blocks():
+    text = "# Doc\n\n```mermaid\nflowchart TD\n    A --> B\n```\n\n```mermaid\nflowchart TD\n    A -> B"
+    repaired, issues = repair_mermaid(text)
+    assert repaired.endswith("A --> B\n```")
+    assert {(issue.block, issue.code) for issue in issues} == {(2, "single_dash_arrow"), (2, "unclosed_fence")}
+
+
+class Output:
+    def __init__(self, raw):
+        self.raw = raw
+
+
+def test_guardrail_repairs_or_asks_for_a_retry():
+    ok, output = mermaid_guardrail(Output("```mermaid\nflowchart TD\n    A -> B\n```"))
+    assert ok and "A --> B" in output.raw
+
+    ok, feedback = mermaid_guardrail(Output("```mermaid\nflowchart TD\n    A[open --> B\n```"))
+    assert not ok and "unbalanced brackets" in feedback
+
+    ok, _ = mermaid_guardrail(Output("```mermaid\nflowchart TD\n    A@{ shape: rect } --> B\n```"))
+    assert ok
@@ -0,0 +1,144 @@
+"""RateLimiter contra mock_llm_server: reintentos de 503/429 y Retry-After."""
+
+import asyncio
+import threading
+import time
+
+import openai
+import pytest
+
+from mock_llm_server import MockLLMServer
+from rate_limit import RateLimiter, retry_after
+
+
+@pytest.fixture
+def server():
+    def start(**kwargs):
+        mock = MockLLMServer(**kwargs).start()
+        started.append(mock)
+        return mock
+
+    started = []
+    yield start
+    for mock in started:
+        mock.stop()
+
+
+def chat(mock):
+    # Sin reintentos propios del cliente: los hace el limitador
+    client = openai.OpenAI(base_url=mock.base_url, api_key="mock", max_retries=0)
+
+    def call(content="hi"):
+        response = client.chat.completions.create(model="mock", messages=[{"role": "user", "content": content}])
+        return response.choices[0].message.content
+
+    return call
+
+
+def test_retries_server_errors_until_success(server):
+    mock = server(fail_every=2, reply="ok")
+    limiter = RateLimiter(max_concurrency=4, base_backoff=0.01, max_backoff=0.05)
+    call = chat(mock)
+
+    results = [limiter.call(call) for _ in range(4)]
+
+    assert results == ["ok"] * 4
+    assert mock.stats()["failed"] == limiter.retries > 0
+    assert limiter.stats()["throttled"] == limiter.retries
+    assert limiter.concurrency < 4  # AIMD: cada 503 reduce la concurrencia
+
+
+def test_async_calls_retry_and_share_concurrency(server):
+    mock = server(fail_every=3, reply="ok")
+    limiter = RateLimiter(max_concurrency=2, base_backoff=0.01, max_backoff=0.05)
+    client = openai.AsyncOpenAI(base_url=mock.base_url, api_key="mock", max_retries=0)
+
+    async def acall():
+        response = await client.chat.completions.create(model="mock", messages=[{"role": "user", "content": "hi"}])
+        return response.choices[0].message.content
+
+    async def run():
+        return await asyncio.gather(*(limiter.acall(acall) for _ in range(6)))
+
+    assert asyncio.run(run()) == ["ok"] * 6
+    assert mock.stats()["failed"] == limiter.retries > 0
+    assert limiter.in_flight == 0
+
+
+def test_gives_up_after_max_retries(server):
+    mock = server(fail_every=1)
+    limiter = RateLimiter(max_retries=2, base_backoff=0.01, max_backoff=0.02)
+
+    with pytest.raises(openai.InternalServerError):
+        limiter.call(chat(mock))
+    assert mock.stats()["requests"] == 3
+    assert limiter.retries == 2
+
+
+def test_429_exposes_retry_after(server):
+    mock = server(rpm=1)
+    call = chat(mock)
+    call()
+
+    with pytest.raises(openai.RateLimitError) as error:
+        RateLimiter(max_retries=0).call(call)
+    assert 55 < retry_after(error.value) <= 60
+    assert mock.stats()["throttled"] == 1
+
+
+class _Throttled(Exception):
+    status_code = 429
+
+    def __init__(self, delay):
+        super().__init__("rate limited")
+        self.response = type("Response", (), {"headers": {"retry-after": str(delay)}})()
+
+
+def test_retry_after_pauses_every_caller():
+    limiter = RateLimiter(max_concurrency=4)
+    attempts = []
+
+    def throttled_once():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise _Throttled(0.3)
+        return "done"
+
+    start = time.monotonic()
+    assert limiter.call(throttled_once) == "done"
+    assert attempts[1] - start >= 0.3
+
+    # Otra llamada que llega durante la pausa tampoco sale antes de Retry-After
+    limiter._backoff(_Throttled(0.3), 0)
+    started = []
+    thread = threading.Thread(target=lambda: limiter.call(lambda: started.append(time.monotonic())))
+    begin = time.monotonic()
+    thread.start()
+    thread.join()
+    assert started[0] - begin >= 0.25
+
+
+def test_wrap_limits_llm_call_and_acall():
+    async def acall(self, messages):
+        await asyncio.sleep(0)
+        return f"async {messages}"
+
+    limiter = RateLimiter(requests_per_minute=600)
+    llm = type("FakeLLM", (), {"max_tokens": 10, "call": lambda self, messages: f"echo {messages}", "acall": acall})()
+    limiter.wrap(llm)
+
+    assert llm.call("hello") == "echo hello"
+    assert asyncio.run(llm.acall("hello")) == "async hello"
+    assert limiter.in_flight == 0
+
+
+def test_wrap_disables_client_retries(server):
+    from crewai import LLM
+
+    mock = server(fail_every=1)
+    llm = LLM(model="openai/mock", base_url=mock.base_url, api_key="mock")
+    RateLimiter(max_retries=0).wrap(llm)
+
+    with pytest.raises(Exception):
+        llm.call("hi")
+    assert mock.stats()["requests"] == 1  # El SDK no reintentó el 503 por su cuenta
@@ -0,0 +1,112 @@
+"""clone_or_update contra un repositorio bare local (file://, sin red)."""
+
+import subprocess
+
+import pytest
+
+import repo_clone
+
+
+def git(*args, cwd=None):
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd, check=True, capture_output=True, text=True,
+    ).stdout.strip()
+
+
+@pytest.fixture
+def origin(tmp_path):
+    """URL file:// de un repositorio bare con código, documentación e imágenes en dos commits"""
+    work = tmp_path / "work"
+    (work / "src").mkdir(parents=True)
+    (work / "docs").mkdir()
+    (work / "src" / "app.py").write_text("def main():\n    return 1\n")
+    (work / "docs" / "guide.md").write_text("# Guide\n")
+    (work / "logo.png").write_bytes(b"\x89PNG fake")
+    git("init", "-q", "-b", "main", cwd=work)
+    git("add", ".", cwd=work)
+    git("commit", "-q", "-m", "first", cwd=work)
+    (work / "src" / "app.py").write_text("def main():\n    return 2\n")
+    git("commit", "-q", "-am", "second", cwd=work)
+
+    bare = tmp_path / "origin.git"
+    git("clone", "-q", "--bare", str(work), str(bare))
+    git("config", "uploadpack.allowFilter", "true", cwd=bare)
+    return bare.as_uri(), work, bare
+
+
+def test_shallow_sparse_clone_skips_media(origin, tmp_path):
+    url, _, _ = origin
+    dest = repo_clone.clone_or_update(url, tmp_path / "checkout" / "origin")
+
+    assert (dest / "src" / "app.py").read_text().endswith("return 2\n")
+    assert (dest / "docs" / "guide.md").exists()
+    assert not (dest / "logo.png").exists()
+    assert git("rev-parse", "--is-shallow-repository", cwd=dest) == "true"
+    assert git("rev-list", "--count", "HEAD", cwd=dest) == "1"
+
+
+def test_existing_checkout_is_reused_and_updated(origin, tmp_path):
+    url, work, bare = origin
+    dest = repo_clone.clone_or_update(url, tmp_path / "checkout")
+    marker = dest / ".git" / "reuse-marker"
+    marker.write_text("")
+    (dest / "stray.txt").write_text("left over")
+
+    (work / "src" / "new.py").write_text("VALUE = 3\n")
+    git("add", ".", cwd=work)
+    git("commit", "-q", "-m", "third", cwd=work)
+    git("push", "-q", str(bare), "main", cwd=work)
+
+    assert repo_clone.clone_or_update(url, tmp_path / "checkout") == dest
+    assert marker.exists()  # Mismo .git: no se volvió a clonar
+    assert (dest / "src" / "new.py").exists()
+    assert not (dest / "stray.txt").exists()
+
+
+def test_other_origin_is_replaced(origin, tmp_path):
+    url, _, _ = origin
+    dest = tmp_path / "checkout"
+    dest.mkdir()
+    (dest / "unrelated.txt").write_text("")
+
+    repo_clone.clone_or_update(url, dest)
+    assert not (dest / "unrelated.txt").exists()
+    assert (dest / "src" / "app.py").exists()
+
+
+def test_sparse_paths_limit_checkout(origin, tmp_path):
+    url, _, _ = origin
+    dest = repo_clone.clone_or_update(url, tmp_path / "checkout", sparse_paths=["src"])
+
+    assert (dest / "src" / "app.py").exists()
+    assert not (dest / "docs").exists()
+
+
+def test_full_clone_keeps_history_and_media(origin, tmp_path):
+    url, _, _ = origin
+    dest = repo_clone.clone_or_update(url, tmp_path / "checkout", shallow=False, sparse=False)
+
+    assert (dest / "logo.png").exists()
+    assert git("rev-parse", "--is-shallow-repository", cwd=dest) == "false"
+    assert git("rev-list", "--count", "HEAD", cwd=dest) == "2"
+
+
+def test_full_clone_with_sparse_paths(origin, tmp_path):
+    url, _, _ = origin
+    dest = repo_clone.clone_or_update(url, tmp_path / "checkout", shallow=False, sparse=True, sparse_paths=["docs"])
+
+    assert git("rev-list", "--count", "HEAD", cwd=dest) == "2"
+    assert (dest / "docs" / "guide.md").exists()
+    assert not (dest / "src").exists()
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://github.com/org-a/api", "org-a/api"),
+    ("https://github.com/org-b/api.git/", "org-b/api"),
+    ("git@github.com:org/api.git", "org/api"),
+    ("file:///srv/git/api.git", "git/api"),
+    ("../api", "api"),
+])
+def test_repo_name_includes_the_owner(url, expected):
+    assert repo_clone.repo_name(url) == expected
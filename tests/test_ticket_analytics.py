@@ -0,0 +1,93 @@
+"""ticket_analytics (LAB4): métricas exactas de los tickets y TicketAnalyticsTool."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+LAB4 = Path(__file__).resolve().parent.parent / "LAB4"
+# Los módulos de LAB4 se importan entre sí con su nombre, sin paquete
+sys.path.insert(0, str(LAB4))
+
+import ticket_analytics
+from ticket_analytics import TicketAnalyticsTool, compute_analytics, load_tickets
+
+CSV = """ticket_id,customer_id,issue_type,issue_description,priority,date_submitted,response_time_minutes,resolution_time_minutes,satisfaction_rating,customer_comments,agent_id,resolved
+T1,C1,API Issue,Broken,High,2023-01-05,10,100,4,Fine,A1,True
+T2,C2,Login Issue,Locked,Low,2023-01-20,20,,2,Slow,A2,False
+T3,C3,API Issue,Timeout,Critical,2023-02-02,30,300,,Slow,A1,
+T4,C4,Billing,Charge,Medium,2023-02-15,,400,5,Great,A3,True
+T5,C5,Payment,Failed,High,2023-03-01,50,500,1,Slow,A2,False
+"""
+
+
+@pytest.fixture
+def tickets(tmp_path, monkeypatch):
+    # La caché Parquet (.cache/tickets) queda dentro del directorio temporal
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "tickets.csv").write_text(CSV)
+    return load_tickets("tickets.csv")
+
+
+def test_loads_only_the_columns_it_needs(tickets):
+    assert list(tickets.columns) == ticket_analytics.ANALYTICS_COLUMNS
+
+
+def test_summary_and_distributions(tickets):
+    analytics = compute_analytics(tickets)
+
+    assert analytics["summary"] == {
+        "tickets": 5, "resolved_pct": 40.0, "avg_response_min": 27.5, "avg_resolution_min": 325.0,
+        "avg_satisfaction": 3.0, "period": "2023-01-05 to 2023-03-01", "issue_types": 4, "agents": 3,
+    }
+    assert analytics["issue_distribution"]["API Issue"] == {"tickets": 2, "share_pct": 40.0}
+    assert list(analytics["priority_levels"]["totals"].items()) == [("Critical", 1), ("High", 2), ("Medium", 1), ("Low", 1)]
+    assert analytics["priority_levels"]["by_issue_type"]["API Issue"] == {"Critical": 1, "High": 1, "Medium": 0, "Low": 0}
+
+
+def test_agent_performance_ignores_nulls(tickets):
+    agents = compute_analytics(tickets)["agent_performance"]
+
+    assert list(agents) == ["A1", "A2", "A3"]
+    assert agents["A1"] == {"tickets": 2, "avg_response_min": 20.0, "avg_resolution_min": 200.0,
+                            "median_resolution_min": 200.0, "avg_satisfaction": 4.0, "resolved_pct": 50.0}
+    assert agents["A2"]["avg_resolution_min"] == 500.0
+    assert agents["A3"]["avg_response_min"] is None
+
+
+def test_agents_beyond_the_limit_are_summarised(tickets, monkeypatch):
+    monkeypatch.setattr(ticket_analytics, "MAX_AGENTS", 2)
+    agents = compute_analytics(tickets)["agent_performance"]
+
+    assert list(agents) == ["A1", "A2", "others"]
+    assert agents["others"] == {"agents": 1, "tickets": 1, "avg_satisfaction": 5.0}
+
+
+def test_monthly_trend_and_feedback(tickets):
+    analytics = compute_analytics(tickets)
+
+    assert analytics["monthly_trend"]["2023-01"] == {"tickets": 2, "avg_satisfaction": 3.0, "avg_resolution_min": 100.0}
+    assert analytics["monthly_trend"]["2023-02"]["avg_resolution_min"] == 350.0
+    assert analytics["customer_feedback"]["Login Issue"] == {
+        "low_satisfaction_pct": 100.0, "top_comments": [{"comment": "Slow", "tickets": 1}]}
+    assert analytics["customer_feedback"]["Billing"]["low_satisfaction_pct"] == 0.0
+
+
+def test_tool_returns_sections_as_json(tickets):
+    tool = TicketAnalyticsTool(analytics=compute_analytics(tickets))
+
+    assert json.loads(tool._run("'summary'"))["summary"]["tickets"] == 5
+    assert set(json.loads(tool._run(""))) == set(ticket_analytics.SECTIONS)
+    assert tool._run("costs").startswith("Unknown section 'costs'")
+
+
+def test_bundled_dataset(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    analytics = TicketAnalyticsTool.from_csv(LAB4 / "support_tickets_data.csv").analytics
+
+    assert analytics["summary"]["tickets"] == 50
+    assert sum(issue["tickets"] for issue in analytics["issue_distribution"].values()) == 50
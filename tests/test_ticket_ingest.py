@@ -0,0 +1,73 @@
+"""ticket_ingest (LAB4): ingesta por bloques a Parquet y reutilización de la caché."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pandas")
+pq = pytest.importorskip("pyarrow.parquet")
+
+# Los módulos de LAB4 se importan entre sí con su nombre, sin paquete
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "LAB4"))
+
+import ticket_ingest
+
+HEADER = ("ticket_id,customer_id,issue_type,issue_description,priority,date_submitted,response_time_minutes,"
+          "resolution_time_minutes,satisfaction_rating,customer_comments,agent_id,resolved\n")
+ROWS = [
+    "T1,C1,API Issue,Broken,High,2023-01-05,10,100,4,Fine,A1,True",
+    "T2,C2,Login Issue,Locked,Low,2023-01-20,20,,2,Slow,A2,False",
+    "T3,C3,API Issue,Timeout,Critical,2023-02-02,30,300,,Slow,A1,",
+    "T4,C4,Billing,Charge,Medium,2023-02-15,,400,5,Great,A3,True",
+    "T5,C5,Payment,Failed,High,2023-03-01,50,500,1,Slow,A2,False",
+]
+
+
+@pytest.fixture
+def csv(tmp_path):
+    path = tmp_path / "tickets.csv"
+    path.write_text(HEADER + "\n".join(ROWS) + "\n")
+    return path
+
+
+def test_ingest_writes_one_row_group_per_chunk(csv, tmp_path):
+    parquet = ticket_ingest.ingest(csv, tmp_path / "cache", chunk_rows=2)
+
+    metadata = pq.ParquetFile(parquet).metadata
+    assert (metadata.num_rows, metadata.num_row_groups) == (5, 3)
+    assert pq.read_schema(parquet).remove_metadata() == ticket_ingest.SCHEMA
+    assert parquet.name.endswith(f"-v{ticket_ingest.CACHE_VERSION}.parquet")
+
+
+def test_load_tickets_keeps_types_nulls_and_column_selection(csv, tmp_path):
+    tickets = ticket_ingest.load_tickets(csv, cache_dir=tmp_path / "cache")
+
+    assert list(tickets.columns) == ticket_ingest.SCHEMA.names
+    # Las categorías de bloques distintos se unen en una sola columna categórica
+    assert tickets["issue_type"].dtype == "category"
+    assert sorted(tickets["issue_type"].cat.categories) == ["API Issue", "Billing", "Login Issue", "Payment"]
+    assert tickets["date_submitted"].iloc[2].strftime("%Y-%m-%d") == "2023-02-02"
+    assert tickets["resolution_time_minutes"].isna().tolist() == [False, True, False, False, False]
+    assert tickets["resolved"].isna().sum() == 1
+
+    subset = ticket_ingest.load_tickets(csv, columns=["priority", "resolved"], cache_dir=tmp_path / "cache")
+    assert list(subset.columns) == ["priority", "resolved"]
+
+
+def test_cache_is_reused_until_the_csv_changes(csv, tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    first = ticket_ingest.ingest(csv, cache, chunk_rows=2)
+    mtime = first.stat().st_mtime_ns
+
+    # Sin cambios ni siquiera se vuelve a leer el CSV para calcular su hash
+    monkeypatch.setattr(ticket_ingest, "hash_file", lambda path: pytest.fail("CSV rehashed"))
+    assert ticket_ingest.ingest(csv, cache, chunk_rows=2) == first
+    assert first.stat().st_mtime_ns == mtime
+    monkeypatch.undo()
+
+    csv.write_text(HEADER + "\n".join(ROWS[:3]) + "\n")
+    second = ticket_ingest.ingest(csv, cache, chunk_rows=2)
+    assert second != first
+    assert pq.ParquetFile(second).metadata.num_rows == 3
+    assert not list(cache.glob("*.tmp"))